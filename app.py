@@ -3,6 +3,11 @@ from flask_cors import CORS
 from config import Config
 import os
 from utils.storage import JSONStorage
+from utils.sqlite_storage import SQLiteStorage
+from utils.sharded_storage import ShardedStorage
+from services.question_bank import QuestionBank
+from services.code_executor import CodeExecutor
+from services.local_executor import LocalExecutor
 
 # Import routes
 from routes.user_routes import user_bp
@@ -23,6 +28,34 @@ def create_app():
     # Initialize app directories
     Config.init_app()
     
+    # Select storage backend and file encoding
+    JSONStorage.set_format(Config.STORAGE_FORMAT)
+    if Config.STORAGE_BACKEND == 'sqlite':
+        JSONStorage.set_backend(SQLiteStorage(Config.SQLITE_DB_FILE))
+    elif Config.STORAGE_BACKEND == 'sharded':
+        JSONStorage.set_backend(ShardedStorage(Config.SHARDED_DATA_DIR))
+    
+    # Finish storage batches interrupted by a crash
+    for data_dir in {Config.DATA_DIR, Config.SHARDED_DATA_DIR}:
+        JSONStorage.recover(data_dir)
+    
+    # Parse and index the question banks once; they reload when the files change
+    for questions_file in [Config.MCQ_QUESTIONS_FILE, Config.CODING_QUESTIONS_FILE]:
+        QuestionBank.for_path(questions_file).load()
+    
+    # Every worker must accept the callbacks Judge0 sends for submissions from any of them
+    if Config.JUDGE0_CALLBACK_URL and not Config.JUDGE0_CALLBACK_SECRET:
+        raise RuntimeError('JUDGE0_CALLBACK_SECRET must be set when JUDGE0_CALLBACK_URL is')
+    
+    result_cache = CodeExecutor.get_result_cache()
+    
+    # Start the warm Python interpreters before the first submission needs one
+    python_pool = None
+    if Config.EXECUTION_BACKEND == 'local':
+        # Refuse to start rather than run submissions without the sandbox
+        LocalExecutor.check_available()
+        python_pool = LocalExecutor.python_pool()
+    
     # Register blueprints
     app.register_blueprint(user_bp)
     app.register_blueprint(resume_bp)
@@ -36,7 +69,16 @@ def create_app():
     def health_check():
         return jsonify({
             'status': 'healthy',
-            'message': 'AI Interview Platform API is running'
+            'message': 'AI Interview Platform API is running',
+            'storage_cache': JSONStorage.cache_stats(),
+            'question_banks': [
+                QuestionBank.for_path(path).stats()
+                for path in [Config.MCQ_QUESTIONS_FILE, Config.CODING_QUESTIONS_FILE]
+            ],
+            'result_cache': result_cache.stats() if result_cache is not None else None,
+            'python_pool': python_pool.stats() if python_pool is not None else None,
+            'program_cache': (LocalExecutor.program_cache().stats()
+                              if Config.EXECUTION_BACKEND == 'local' and Config.LOCAL_EXECUTOR_CACHE_SIZE > 0 else None)
         }), 200
     
     # Root endpoint
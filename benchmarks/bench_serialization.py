@@ -0,0 +1,95 @@
+"""
+Compare JSONStorage file formats on a synthetic users.json
+
+Measures dump (write_json) and load (read_json) time and on-disk size for
+every storage format whose codec is installed.
+
+Usage:
+    python -m benchmarks.bench_serialization [--users 50000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.storage import JSONStorage
+
+SKILLS = ['Python', 'JavaScript', 'React', 'SQL', 'Docker', 'AWS', 'Java', 'Go',
+          'Kubernetes', 'Flask', 'Node.js', 'TypeScript', 'C++', 'Git', 'Linux']
+SOFT_SKILLS = ['Communication', 'Teamwork', 'Leadership', 'Problem Solving', 'Time Management']
+LEVELS = ['Fresher', 'Junior', 'Mid-Level', 'Senior']
+ROLES = ['Backend Developer', 'Frontend Developer', 'Full Stack Developer', 'Data Engineer', 'DevOps Engineer']
+
+def make_user(rng: random.Random, username: str) -> dict:
+    """Build a user record shaped like the ones the API stores"""
+    words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(90)]
+    return {
+        'username': username,
+        'experience_level': rng.choice(LEVELS),
+        'target_role': rng.choice(ROLES),
+        'target_company_type': rng.choice(['Startup', 'MNC', 'Product', 'Service']),
+        'skills': {
+            'technical': rng.sample(SKILLS, rng.randint(3, 8)),
+            'soft': rng.sample(SOFT_SKILLS, rng.randint(1, 3)),
+            'domain': rng.sample(['FinTech', 'EdTech', 'HealthTech', 'E-commerce'], 1)
+        },
+        'interview_count': rng.randint(0, 20),
+        'total_score': rng.randint(0, 1500),
+        'resume_text': ' '.join(words)[:500],
+        'voice_intro_data': {
+            'confidence_score': rng.randint(1, 10),
+            'clarity_score': rng.randint(1, 10),
+            'key_points': rng.sample(words, 4)
+        },
+        'created_at': '2026-01-15T10:30:00.000000',
+        'updated_at': '2026-03-02T18:45:12.123456'
+    }
+
+def make_users(count: int, seed: int = 42) -> dict:
+    rng = random.Random(seed)
+    return {f'candidate_{i:06d}': make_user(rng, f'candidate_{i:06d}') for i in range(count)}
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSONStorage serialization formats')
+    parser.add_argument('--users', type=int, default=50000, help='Number of synthetic users')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is reported)')
+    args = parser.parse_args()
+
+    print(f"Generating {args.users} synthetic users...")
+    users = make_users(args.users)
+
+    print(f"{'format':<10}{'dump (s)':>12}{'load (s)':>12}{'size (MB)':>12}{'vs pretty':>12}")
+    baseline_size = None
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for fmt in JSONStorage.FORMATS:
+            if JSONStorage.set_format(fmt) != fmt:
+                print(f"{fmt:<10}{'(codec not installed)':>48}")
+                continue
+
+            path = os.path.join(tmp_dir, f'users.{fmt}')
+            dump_time = best_of(args.repeat, lambda: JSONStorage.write_json(path, users))
+            load_time = best_of(args.repeat, lambda: JSONStorage.read_json(path))
+            size = os.path.getsize(path)
+            baseline_size = baseline_size or size
+
+            print(f"{fmt:<10}{dump_time:>12.3f}{load_time:>12.3f}{size / 1e6:>12.2f}{size / baseline_size:>11.0%}")
+
+            assert JSONStorage.read_json(path) == users, f'{fmt} round trip changed the data'
+
+if __name__ == '__main__':
+    main()
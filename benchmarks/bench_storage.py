@@ -0,0 +1,232 @@
+"""
+Micro-benchmark JSONStorage operations on synthetic datasets
+
+Generates users with interview and feedback histories, loads them into the
+selected storage backend, then times get_user, save_user, save_interview,
+get_user_interviews and update_user_skills on random users. For each
+operation it reports p50/p99 latency, the process peak RSS after the run and
+the bytes written per call (from /proc/self/io, so Linux only).
+
+Each dataset is measured in a fresh process, so peak RSS reflects the
+storage layer rather than dataset generation or a previous, larger run.
+
+Usage:
+    python -m benchmarks.bench_storage [--sizes 1000,10000,100000] [--ops 500]
+                                       [--backend json|jsonl|sqlite|sharded] [--format pretty]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_serialization import make_user, SKILLS, SOFT_SKILLS
+from utils.append_log import AppendLog
+from utils.storage import JSONStorage
+
+BACKENDS = ('json', 'jsonl', 'sqlite', 'sharded')
+OPERATIONS = ('get_user', 'save_user', 'save_interview', 'get_user_interviews', 'update_user_skills')
+ROUND_TYPES = ['HR', 'Technical', 'Coding', 'Managerial']
+
+def make_interview(rng: random.Random, timestamp: str) -> dict:
+    """Build a completed interview record shaped like the ones the API stores"""
+    round_type = rng.choice(ROUND_TYPES)
+    answers = [
+        {
+            'question': f'{round_type} question {i}',
+            'answer': ' '.join(rng.choice(SKILLS + SOFT_SKILLS) for _ in range(40)),
+            'score': rng.randint(1, 10),
+            'feedback': 'Clear structure; add a concrete example next time.'
+        }
+        for i in range(rng.randint(3, 6))
+    ]
+    return {
+        'interview_id': f'{rng.getrandbits(64):016x}',
+        'round_type': round_type,
+        'difficulty': rng.choice(['Easy', 'Medium', 'Hard']),
+        'status': 'completed',
+        'answers': answers,
+        'overall_score': round(sum(a['score'] for a in answers) / len(answers), 2),
+        'timestamp': timestamp
+    }
+
+def make_feedback(rng: random.Random, interview: dict) -> dict:
+    return {
+        'interview_id': interview['interview_id'],
+        'overall_score': interview['overall_score'],
+        'strengths': rng.sample(SKILLS, 3),
+        'weaknesses': rng.sample(SKILLS, 2),
+        'recommendations': ['Practice system design', 'Review data structures'],
+        'summary': 'Solid fundamentals with room to go deeper on trade-offs.',
+        'timestamp': interview['timestamp']
+    }
+
+def make_dataset(count: int, seed: int = 42):
+    """Build users, interviews and feedback collections for count users"""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    users, interviews, feedback = {}, {}, {}
+
+    for i in range(count):
+        username = f'candidate_{i:06d}'
+        users[username] = make_user(rng, username)
+        history = []
+        for _ in range(rng.randint(0, 6)):
+            timestamp = (start + timedelta(minutes=rng.randint(0, 600 * 24 * 60))).isoformat()
+            history.append(make_interview(rng, timestamp))
+        if history:
+            history.sort(key=lambda record: record['timestamp'])
+            interviews[username] = history
+            feedback[username] = [make_feedback(rng, interview) for interview in history]
+
+    return users, interviews, feedback
+
+def setup_storage(backend: str, data_dir: str, users: dict, interviews: dict, feedback: dict):
+    """Load the dataset into a backend and return the (users, interviews, feedback) paths"""
+    users_file = os.path.join(data_dir, 'users.json')
+    json_files = [os.path.join(data_dir, f'{name}.json') for name in ('interviews', 'feedback')]
+    JSONStorage.write_json(users_file, users)
+    JSONStorage.write_json(json_files[0], interviews)
+    JSONStorage.write_json(json_files[1], feedback)
+
+    if backend == 'jsonl':
+        log_files = []
+        for json_file in json_files:
+            log_file = os.path.splitext(json_file)[0] + '.jsonl'
+            AppendLog(log_file).import_json(json_file)
+            log_files.append(log_file)
+        return users_file, log_files[0], log_files[1]
+
+    if backend in ('sqlite', 'sharded'):
+        use_backend(backend, data_dir).migrate_from_json(users_file, *json_files)
+
+    return users_file, json_files[0], json_files[1]
+
+def use_backend(backend: str, data_dir: str):
+    """Route JSONStorage to the backend under test; returns it (None for file storage)"""
+    storage = None
+    if backend == 'sqlite':
+        from utils.sqlite_storage import SQLiteStorage
+        storage = SQLiteStorage(os.path.join(data_dir, 'platform.db'))
+    elif backend == 'sharded':
+        from utils.sharded_storage import ShardedStorage
+        storage = ShardedStorage(os.path.join(data_dir, 'sharded'))
+
+    JSONStorage.set_backend(storage)
+    return storage
+
+def bytes_written() -> int:
+    """Bytes this process has passed to write() so far, or -1 if unknown"""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            for line in f:
+                if line.startswith('wchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return -1
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def run_operations(users_file: str, interviews_file: str, usernames: list, ops: int, seed: int) -> dict:
+    """Time each operation on random users; returns per-operation stats"""
+    rng = random.Random(seed)
+    results = {}
+
+    # name -> (prepare(username) -> payload, untimed; call(username, payload), timed)
+    operations = {
+        'get_user': (
+            lambda username: None,
+            lambda username, _: JSONStorage.get_user(username, users_file)),
+        'save_user': (
+            lambda username: dict(JSONStorage.get_user(username, users_file), interview_count=rng.randint(0, 20)),
+            lambda username, user: JSONStorage.save_user(username, user, users_file)),
+        'save_interview': (
+            lambda username: make_interview(rng, datetime.now().isoformat()),
+            lambda username, interview: JSONStorage.save_interview(username, interview, interviews_file)),
+        'get_user_interviews': (
+            lambda username: None,
+            lambda username, _: JSONStorage.get_user_interviews(username, interviews_file)),
+        'update_user_skills': (
+            lambda username: {'technical': rng.sample(SKILLS, 5), 'soft': rng.sample(SOFT_SKILLS, 2)},
+            lambda username, skills: JSONStorage.update_user_skills(username, skills, users_file))
+    }
+
+    for name in OPERATIONS:
+        prepare, call = operations[name]
+        sample = [rng.choice(usernames) for _ in range(ops)]
+        timings = []
+        written = 0
+
+        for username in sample:
+            payload = prepare(username)
+            written_before = bytes_written()
+            start = time.perf_counter()
+            call(username, payload)
+            timings.append(time.perf_counter() - start)
+            written += bytes_written() - written_before
+
+        timings.sort()
+        results[name] = {
+            'p50_ms': percentile(timings, 0.50) * 1000,
+            'p99_ms': percentile(timings, 0.99) * 1000,
+            'peak_rss_mb': peak_rss_mb(),
+            'bytes_per_op': written / ops if bytes_written() >= 0 else None
+        }
+
+    return results
+
+def build_size(size: int, args, data_dir: str):
+    """Generate and load one dataset; runs in its own process"""
+    JSONStorage.set_format(args.format)
+    users, interviews, feedback = make_dataset(size, args.seed)
+    users_file, interviews_file, _ = setup_storage(args.backend, data_dir, users, interviews, feedback)
+    return users_file, interviews_file, list(users)
+
+def measure_size(args, data_dir: str, users_file: str, interviews_file: str, usernames: list) -> dict:
+    """Time the operations on a loaded dataset; runs in a fresh process"""
+    JSONStorage.set_format(args.format)
+    use_backend(args.backend, data_dir)
+    return run_operations(users_file, interviews_file, usernames, args.ops, args.seed)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSONStorage operations')
+    parser.add_argument('--sizes', default='1000,10000,100000', help='Comma-separated user counts')
+    parser.add_argument('--ops', type=int, default=500, help='Calls timed per operation')
+    parser.add_argument('--backend', choices=BACKENDS, default='json', help='Storage backend to measure')
+    parser.add_argument('--format', choices=JSONStorage.FORMATS, default='pretty', help='Storage file format')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"backend={args.backend} format={args.format} ops={args.ops}")
+    print(f"{'users':>8}  {'operation':<22}{'p50 (ms)':>10}{'p99 (ms)':>10}{'peak RSS (MB)':>15}{'bytes/op':>12}")
+
+    for size in (int(value) for value in args.sizes.split(',')):
+        with tempfile.TemporaryDirectory() as data_dir:
+            # Build and measure in separate processes so generating the
+            # dataset does not count towards the measured peak RSS
+            with multiprocessing.Pool(1) as pool:
+                users_file, interviews_file, usernames = pool.apply(build_size, (size, args, data_dir))
+            with multiprocessing.Pool(1) as pool:
+                results = pool.apply(measure_size, (args, data_dir, users_file, interviews_file, usernames))
+
+        for name, stats in results.items():
+            written = f"{stats['bytes_per_op']:>12,.0f}" if stats['bytes_per_op'] is not None else f"{'n/a':>12}"
+            print(f"{size:>8}  {name:<22}{stats['p50_ms']:>10.3f}{stats['p99_ms']:>10.3f}"
+                  f"{stats['peak_rss_mb']:>15.1f}{written}")
+
+if __name__ == '__main__':
+    main()
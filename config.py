@@ -15,6 +15,47 @@ class Config:
     # Judge0 Configuration
     JUDGE0_API_KEY = os.getenv('JUDGE0_API_KEY')
     JUDGE0_API_URL = os.getenv('JUDGE0_API_URL', 'https://judge0-ce.p.rapidapi.com')
+    # Where code runs: 'judge0' (mock execution without an API key) or 'local' sandboxed subprocesses
+    EXECUTION_BACKEND = os.getenv('EXECUTION_BACKEND', 'judge0')
+    # The local backend runs untrusted code on this host, so it must be enabled explicitly
+    LOCAL_EXECUTOR_ENABLED = os.getenv('LOCAL_EXECUTOR_ENABLED', 'False') == 'True'
+    # Unprivileged uids submissions run as (LOCAL_EXECUTOR_UID_COUNT uids from LOCAL_EXECUTOR_UID,
+    # one per running sandbox, unused by anything else) and their group, the most processes
+    # (threads included) each may have at once, and extra comma-separated paths they can read
+    # (e.g. a Ruby install)
+    LOCAL_EXECUTOR_UID = int(os.getenv('LOCAL_EXECUTOR_UID', 60000))
+    LOCAL_EXECUTOR_UID_COUNT = int(os.getenv('LOCAL_EXECUTOR_UID_COUNT', 256))
+    LOCAL_EXECUTOR_GID = int(os.getenv('LOCAL_EXECUTOR_GID', 65534))
+    LOCAL_EXECUTOR_MAX_PROCESSES = int(os.getenv('LOCAL_EXECUTOR_MAX_PROCESSES', 256))
+    LOCAL_EXECUTOR_READONLY_PATHS = os.getenv('LOCAL_EXECUTOR_READONLY_PATHS', '')
+    # Local executor: parent of the per-submission temp dirs (system default if unset), maximum
+    # bytes a program may write, and whether to run without a private network namespace
+    LOCAL_EXECUTOR_DIR = os.getenv('LOCAL_EXECUTOR_DIR') or None
+    LOCAL_EXECUTOR_MAX_OUTPUT = int(os.getenv('LOCAL_EXECUTOR_MAX_OUTPUT', 16 * 1024 * 1024))
+    LOCAL_EXECUTOR_ALLOW_NETWORK = os.getenv('LOCAL_EXECUTOR_ALLOW_NETWORK', 'False') == 'True'
+    # Compiled programs kept for reuse by runs of the same source (0 compiles every run)
+    LOCAL_EXECUTOR_CACHE_SIZE = int(os.getenv('LOCAL_EXECUTOR_CACHE_SIZE', 64))
+    # Warm Python interpreters the local executor keeps ready (0 disables the pool), and
+    # seconds an unused one waits before it is replaced (0 keeps it until it is used)
+    PYTHON_POOL_SIZE = int(os.getenv('PYTHON_POOL_SIZE', 4))
+    PYTHON_POOL_MAX_IDLE = float(os.getenv('PYTHON_POOL_MAX_IDLE', 300))
+    # Test results cached by code and test case: entries kept in memory (0 disables the cache),
+    # optional directory shared by all workers, and seconds before an entry expires
+    RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', 1024))
+    RESULT_CACHE_DIR = os.getenv('RESULT_CACHE_DIR', '')
+    RESULT_CACHE_TTL = float(os.getenv('RESULT_CACHE_TTL', 86400))
+    # Concurrent test executions per process, and per user within a process
+    EXECUTION_WORKERS = int(os.getenv('EXECUTION_WORKERS', 16))
+    EXECUTION_WORKERS_PER_USER = int(os.getenv('EXECUTION_WORKERS_PER_USER', 4))
+    # Result polling: first poll after POLL_INITIAL seconds, doubling up to POLL_MAX,
+    # giving up after RESULT_TIMEOUT seconds
+    JUDGE0_POLL_INITIAL = float(os.getenv('JUDGE0_POLL_INITIAL', 0.02))
+    JUDGE0_POLL_MAX = float(os.getenv('JUDGE0_POLL_MAX', 1.0))
+    JUDGE0_RESULT_TIMEOUT = float(os.getenv('JUDGE0_RESULT_TIMEOUT', 30))
+    # Public URL of /api/coding/judge0/callback; when set, Judge0 pushes results there
+    JUDGE0_CALLBACK_URL = os.getenv('JUDGE0_CALLBACK_URL')
+    # Shared secret Judge0 echoes back in the callback URL; required with JUDGE0_CALLBACK_URL
+    JUDGE0_CALLBACK_SECRET = os.getenv('JUDGE0_CALLBACK_SECRET', '')
     
     # Flask Configuration
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
@@ -26,10 +67,42 @@ class Config:
     
     # Data Storage Configuration
     DATA_DIR = 'data'
+    # Store interview/feedback/submission history as append-only JSONL logs
+    STORAGE_APPEND_LOG = os.getenv('STORAGE_APPEND_LOG', 'False') == 'True'
+    HISTORY_EXT = '.jsonl' if STORAGE_APPEND_LOG else '.json'
     USERS_FILE = os.path.join(DATA_DIR, 'users.json')
-    INTERVIEWS_FILE = os.path.join(DATA_DIR, 'interviews.json')
-    FEEDBACK_FILE = os.path.join(DATA_DIR, 'feedback.json')
+    INTERVIEWS_FILE = os.path.join(DATA_DIR, 'interviews' + HISTORY_EXT)
+    FEEDBACK_FILE = os.path.join(DATA_DIR, 'feedback' + HISTORY_EXT)
+    SUBMISSIONS_FILE = os.path.join(DATA_DIR, 'submissions' + HISTORY_EXT)
     RESUMES_DIR = os.path.join(DATA_DIR, 'resumes')
+    MCQ_QUESTIONS_FILE = os.path.join(DATA_DIR, 'questions_mcq.json')
+    CODING_QUESTIONS_FILE = os.path.join(DATA_DIR, 'questions_coding.json')
+    # Out-of-line test cases: <FIXTURES_DIR>/<problem_id>/<name>.in and .out
+    FIXTURES_DIR = os.path.join(DATA_DIR, 'fixtures')
+    # Cumulative MCQ answer statistics per question and category
+    QUESTION_STATS_FILE = os.path.join(DATA_DIR, 'question_stats.json')
+    # 2PL item parameters fitted by `python -m services.item_calibration`
+    ITEM_PARAMS_FILE = os.path.join(DATA_DIR, 'item_params.json')
+    ADAPTIVE_SESSIONS_DIR = os.path.join(DATA_DIR, 'adaptive_sessions')
+    
+    # Storage backend: 'json' (files above), 'sqlite' or 'sharded'
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'json')
+    SQLITE_DB_FILE = os.getenv('SQLITE_DB_FILE', os.path.join(DATA_DIR, 'platform.db'))
+    # Encoding for storage writes: 'pretty', 'compact', 'orjson', 'msgpack' or 'zstd'
+    # (existing files are detected automatically on read)
+    STORAGE_FORMAT = os.getenv('STORAGE_FORMAT', 'pretty')
+    # Root of the per-user layout: <root>/<collection>/<hash-prefix>/<username>.json
+    SHARDED_DATA_DIR = os.getenv('SHARDED_DATA_DIR', DATA_DIR)
+    # Interview/submission records older than this move to data/archive/<collection>/<YYYY-MM>.jsonl.gz
+    # when `python -m utils.archive` runs
+    ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 180))
+    
+    # Adaptive MCQ tests stop once the ability standard error reaches the target
+    ADAPTIVE_TARGET_SE = float(os.getenv('ADAPTIVE_TARGET_SE', 0.3))
+    ADAPTIVE_MIN_QUESTIONS = int(os.getenv('ADAPTIVE_MIN_QUESTIONS', 5))
+    ADAPTIVE_MAX_QUESTIONS = int(os.getenv('ADAPTIVE_MAX_QUESTIONS', 20))
+    # Seconds after its last answer before a session expires and its file is deleted
+    ADAPTIVE_SESSION_TTL = float(os.getenv('ADAPTIVE_SESSION_TTL', 86400))
     
     # Interview Configuration
     INTERVIEW_ROUNDS = ['HR', 'Technical', 'Coding', 'Managerial']
@@ -44,9 +117,9 @@ class Config:
         os.makedirs(Config.DATA_DIR, exist_ok=True)
         os.makedirs(Config.RESUMES_DIR, exist_ok=True)
         
-        # Create empty JSON files if they don't exist
+        # Create empty JSON files if they don't exist (JSONL logs are created on first append)
         for file_path in [Config.USERS_FILE, Config.INTERVIEWS_FILE, Config.FEEDBACK_FILE]:
-            if not os.path.exists(file_path):
+            if file_path.endswith('.json') and not os.path.exists(file_path):
                 with open(file_path, 'w') as f:
                     import json
                     json.dump({}, f)
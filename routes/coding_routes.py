@@ -1,49 +1,52 @@
 from flask import Blueprint, request, jsonify
 from services.code_executor import CodeExecutor
+from services.judge0_callbacks import Judge0Callbacks
 from services.plagiarism_detector import PlagiarismDetector
-import json
-import os
+from services.question_bank import QuestionBank
+from services.question_sets import QuestionSets
+from services.test_fixtures import TestFixtures
+from utils.http_cache import conditional_listing, listing_key
+from utils.storage import JSONStorage
+from config import Config
+import hmac
 
 coding_bp = Blueprint('coding', __name__, url_prefix='/api/coding')
 
-# Load coding questions
-def load_coding_questions():
-    questions_file = 'data/questions_coding.json'
-    if os.path.exists(questions_file):
-        with open(questions_file, 'r') as f:
-            return json.load(f)
-    return []
+def public_problem(problem):
+    """Problem as sent to candidates, without hidden test cases"""
+    p_copy = problem.copy()
+    p_copy['test_cases'] = [tc for tc in p_copy.get('test_cases', []) if not tc.get('is_hidden', False)]
+    return p_copy
+
+problem_bank = QuestionBank.for_path(Config.CODING_QUESTIONS_FILE, public_view=public_problem)
+problem_sets = QuestionSets()
+fixtures = TestFixtures.for_dir(Config.FIXTURES_DIR)
 
 @coding_bp.route('/problems', methods=['GET'])
 def get_problems():
     """Get coding problems"""
-    difficulty = request.args.get('difficulty', 'Medium')
-    category = request.args.get('category', 'all')
-    
-    all_problems = load_coding_questions()
-    
-    # Filter
-    filtered = [p for p in all_problems if p.get('difficulty') == difficulty]
-    
-    # Shuffle filtered list to randomize order
-    import random
-    random.shuffle(filtered)
-    
-    if category != 'all':
-        filtered = [p for p in filtered if p.get('category') == category]
-    
-    # Remove hidden test cases
-    problems_for_user = []
-    for p in filtered:
-        p_copy = p.copy()
-        # Only show non-hidden test cases
-        p_copy['test_cases'] = [tc for tc in p_copy.get('test_cases', []) if not tc.get('is_hidden', False)]
-        problems_for_user.append(p_copy)
-    
-    return jsonify({
-        'problems': problems_for_user,
-        'total': len(problems_for_user)
-    }), 200
+    try:
+        version, difficulty, category, _, fixed_seed = QuestionSets.parse_params(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    bank = problem_bank.current()
+    if not QuestionSets.same_version(version, bank):
+        return jsonify({'error': 'The problem bank has changed since this set_id was issued'}), 409
+    
+    def build(seed):
+        # Filter, then shuffle in an order fixed by the seed
+        if fixed_seed is None:
+            filtered = QuestionSets.select(bank, difficulty, category, None, seed)
+        else:
+            filtered = problem_sets.get(bank, difficulty, category, None, seed)
+        set_id = QuestionSets.encode_set_id(bank, difficulty, category, None, seed)
+        
+        # Public views (hidden test cases removed) are serialized once per bank load
+        return (b'{"problems":' + bank.public_json(filtered) + b',"total":' + str(len(filtered)).encode()
+                + b',"set_id":"' + set_id.encode('ascii') + b'"}')
+    
+    return conditional_listing(listing_key(bank.version, difficulty, category), build, fixed_seed)
 
 @coding_bp.route('/execute', methods=['POST'])
 def execute_code():
@@ -56,16 +59,15 @@ def execute_code():
     if not code:
         return jsonify({'error': 'Code is required'}), 400
     
-    # Get problem with all test cases (including hidden)
-    all_problems = load_coding_questions()
-    problem = next((p for p in all_problems if p['id'] == problem_id), None)
+    # Get problem with all test cases (including hidden and out-of-line fixtures)
+    problem = problem_bank.get(problem_id)
     
     if not problem:
         return jsonify({'error': 'Problem not found'}), 404
     
     # Execute code
     executor = CodeExecutor()
-    result = executor.execute_code(code, language, problem.get('test_cases', []))
+    result = executor.execute_code(code, language, fixtures.test_cases(problem), data.get('username'))
     
     return jsonify({
         'result': result,
@@ -75,7 +77,6 @@ def execute_code():
 @coding_bp.route('/submit', methods=['POST'])
 def submit_solution():
     """Submit final solution with plagiarism check"""
-    submissions_file = 'data/submissions.json'
     data = request.json
     username = data.get('username')
     problem_id = data.get('problem_id')
@@ -83,14 +84,13 @@ def submit_solution():
     language = data.get('language', 'python') or 'python'
     
     # Execute with all test cases
-    all_problems = load_coding_questions()
-    problem = next((p for p in all_problems if p['id'] == problem_id), None)
+    problem = problem_bank.get(problem_id)
     
     if not problem:
         return jsonify({'error': 'Problem not found'}), 404
     
     executor = CodeExecutor()
-    result = executor.execute_code(code, language, problem.get('test_cases', []))
+    result = executor.execute_code(code, language, fixtures.test_cases(problem), username)
     
     # Check for plagiarism using AI (Mistral)
     from services.mistral_service import MistralService
@@ -110,25 +110,28 @@ def submit_solution():
     }
     
     # Store submission
-    if os.path.exists(submissions_file):
-        with open(submissions_file, 'r') as f:
-            try:
-                all_submissions = json.load(f)
-            except:
-                all_submissions = {}
-    else:
-        all_submissions = {}
-    
-    if username not in all_submissions:
-        all_submissions[username] = []
-    
-    all_submissions[username].append(submission)
-    
-    with open(submissions_file, 'w') as f:
-        json.dump(all_submissions, f, indent=2)
+    JSONStorage.save_submission(username, submission, Config.SUBMISSIONS_FILE)
     
     return jsonify({
         'message': 'Solution submitted',
         'result': result,
         'plagiarism_check': plagiarism_result
     }), 200
+
+
+@coding_bp.route('/judge0/callback', methods=['PUT', 'POST'])
+def judge0_callback():
+    """Receive a finished submission from Judge0 and wake the request waiting for it"""
+    secret = request.args.get('secret', '')
+    if not Config.JUDGE0_CALLBACK_SECRET or not hmac.compare_digest(secret, Config.JUDGE0_CALLBACK_SECRET):
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    try:
+        result = Judge0Callbacks.decode(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if Judge0Callbacks.deliver(result) is None:
+        return jsonify({'error': 'token is required'}), 400
+    
+    return '', 204
@@ -156,22 +156,23 @@ def complete_interview(username):
     data = request.json
     interview_data = data.get('interview_data')
     
-    # Save interview
-    JSONStorage.save_interview(username, interview_data, Config.INTERVIEWS_FILE)
-    
     # Update user stats
     user['interview_count'] = user.get('interview_count', 0) + 1
     overall_score = interview_data.get('overall_score', 0)
     user['total_score'] = user.get('total_score', 0) + overall_score
     
-    JSONStorage.save_user(username, user, Config.USERS_FILE)
-    
     # Generate feedback using Mistral
     mistral = MistralService()
     feedback = mistral.generate_feedback(interview_data)
     
-    # Save feedback
-    JSONStorage.save_feedback(username, feedback, Config.FEEDBACK_FILE)
+    # Save interview, user stats and feedback together so they never diverge
+    with JSONStorage.batch() as batch:
+        batch.save_interview(username, interview_data, Config.INTERVIEWS_FILE)
+        batch.save_user(username, user, Config.USERS_FILE)
+        batch.save_feedback(username, feedback, Config.FEEDBACK_FILE)
+    
+    if not batch.committed:
+        return jsonify({'error': 'Failed to save interview results'}), 500
     
     return jsonify({
         'message': 'Interview completed',
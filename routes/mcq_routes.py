@@ -1,83 +1,194 @@
 from flask import Blueprint, request, jsonify
+from services.adaptive_testing import AdaptiveTest, ItemParameters
 from services.mcq_evaluator import MCQEvaluator
-import json
-import os
-import random
+from services.question_bank import QuestionBank
+from services.question_sets import QuestionSets
+from services.question_stats import QuestionStats
+from utils.http_cache import conditional_listing, listing_key
+from config import Config
 
 mcq_bp = Blueprint('mcq', __name__, url_prefix='/api/mcq')
 
-# Load MCQ questions from JSON file
-def load_questions():
-    questions_file = 'data/questions_mcq.json'
-    if os.path.exists(questions_file):
-        with open(questions_file, 'r') as f:
-            return json.load(f)
-    return []
+def public_question(question):
+    """Question as sent to candidates; correct_answer stays on the server"""
+    return {
+        'id': question['id'],
+        'question': question['question'],
+        'options': question['options'],
+        'category': question.get('category', ''),
+        'difficulty': question.get('difficulty', '')
+    }
+
+question_bank = QuestionBank.for_path(Config.MCQ_QUESTIONS_FILE, public_view=public_question)
+question_stats = QuestionStats.for_path(Config.QUESTION_STATS_FILE)
+question_sets = QuestionSets()
+item_params = ItemParameters.for_path(Config.ITEM_PARAMS_FILE)
+adaptive_test = AdaptiveTest(Config.ADAPTIVE_SESSIONS_DIR, Config.ADAPTIVE_TARGET_SE,
+                             Config.ADAPTIVE_MIN_QUESTIONS, Config.ADAPTIVE_MAX_QUESTIONS,
+                             session_ttl=Config.ADAPTIVE_SESSION_TTL)
 
 @mcq_bp.route('/questions', methods=['GET'])
 def get_questions():
     """Get MCQ questions based on difficulty and category"""
-    difficulty = request.args.get('difficulty', 'Medium')
-    category = request.args.get('category', 'all')
-    count = int(request.args.get('count', 10))
-    
-    all_questions = load_questions()
-    
-    # Filter by difficulty
-    if difficulty != 'all':
-        filtered = [q for q in all_questions if q.get('difficulty') == difficulty]
-    else:
-        filtered = all_questions
+    try:
+        version, difficulty, category, count, fixed_seed = QuestionSets.parse_params(request.args,
+                                                                                    default_count=10)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Filter by category if specified
-    if category != 'all':
-        filtered = [q for q in filtered if q.get('category') == category]
+    bank = question_bank.current()
+    if not QuestionSets.same_version(version, bank):
+        return jsonify({'error': 'The question bank has changed since this set_id was issued'}), 409
     
-    # Limit count and randomize
-    try:
-        if len(filtered) < count:
-            selected = filtered
+    def build(seed):
+        # Filter by difficulty and category ('all' matches any), then pick
+        # count questions in an order fixed by the seed
+        if fixed_seed is None:
+            selected = QuestionSets.select(bank, difficulty, category, count, seed)
         else:
-            selected = random.sample(filtered, count)
-    except Exception:
-        selected = filtered[:count]
-    
-    # Remove correct answers before sending
-    questions_for_user = []
-    for q in selected:
-        q_copy = q.copy()
-        # Keep correct_answer on server side only
-        questions_for_user.append({
-            'id': q_copy['id'],
-            'question': q_copy['question'],
-            'options': q_copy['options'],
-            'category': q_copy.get('category', ''),
-            'difficulty': q_copy.get('difficulty', '')
-        })
+            selected = question_sets.get(bank, difficulty, category, count, seed)
+        set_id = QuestionSets.encode_set_id(bank, difficulty, category, count, seed)
+        
+        # Public views are serialized once per bank load
+        return (b'{"questions":' + bank.public_json(selected) + b',"total":' + str(len(selected)).encode()
+                + b',"set_id":"' + set_id.encode('ascii') + b'"}')
     
-    return jsonify({
-        'questions': questions_for_user,
-        'total': len(selected)
-    }), 200
+    return conditional_listing(listing_key(bank.version, difficulty, category, count), build, fixed_seed)
 
 @mcq_bp.route('/evaluate', methods=['POST'])
 def evaluate_answers():
     """Evaluate MCQ answers"""
     data = request.json
     user_answers = data.get('answers', {})  # {question_id: answer}
+    set_id = data.get('set_id')
     
-    all_questions = load_questions()
-    
-    # Get questions that were answered
-    answered_questions = [q for q in all_questions if q['id'] in user_answers]
+    if set_id:
+        # Grade against the whole set; unanswered questions count as wrong
+        try:
+            version, *params = QuestionSets.decode_set_id(set_id)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        bank = question_bank.current()
+        if not QuestionSets.same_version(version, bank):
+            # The set cannot be rebuilt; grading it would use other questions
+            return jsonify({'error': 'The question bank has changed since this set_id was issued; '
+                                     'submit the answers without set_id to grade the answered questions'}), 409
+        answered_questions = list(question_sets.get(bank, *params))
+    else:
+        # Get questions that were answered
+        answered_questions = question_bank.get_many(user_answers)
     
     # Evaluate
     result = MCQEvaluator.evaluate_mcq_set(answered_questions, user_answers)
     
-    # Get performance analysis
-    analysis = MCQEvaluator.get_performance_analysis(result)
+    # Update cohort statistics with these answers
+    question_stats.record(answered_questions, result)
+    
+    # Get performance analysis, grouped by topic and compared with the cohort
+    question_categories = {q['id']: q.get('category', '') for q in answered_questions}
+    cohort_stats = question_stats.lookup(list(question_categories), set(question_categories.values()))
+    analysis = MCQEvaluator.get_performance_analysis(result, question_categories, cohort_stats)
     
     return jsonify({
         'evaluation': result,
         'analysis': analysis
     }), 200
+
+@mcq_bp.route('/stats', methods=['GET'])
+def get_stats():
+    """Get answer statistics per question and category"""
+    category = request.args.get('category', 'all')
+    
+    stats = question_stats.snapshot()
+    # Option pick counts next to the number correct would give away the
+    # answer key, so questions only report attempts and p-value
+    questions = {
+        qid: {'category': q['category'], 'attempts': q['attempts'], 'p_value': q['p_value']}
+        for qid, q in stats['questions'].items() if category in ('all', q['category'])
+    }
+    categories = {c: s for c, s in stats['categories'].items() if category in ('all', c)}
+    
+    return jsonify({'questions': questions, 'categories': categories}), 200
+
+@mcq_bp.route('/evaluate/bulk', methods=['POST'])
+def evaluate_bulk():
+    """Grade a cohort's answer sheets in one pass"""
+    data = request.json or {}
+    answer_sheets = data.get('answer_sheets', {})  # {candidate_id: {question_id: answer}}
+    
+    if not isinstance(answer_sheets, dict) or not all(isinstance(sheet, dict) for sheet in answer_sheets.values()):
+        return jsonify({'error': 'answer_sheets must map candidate IDs to {question_id: answer}'}), 400
+    
+    # Every question answered by at least one candidate, in bank order
+    answered_ids = {question_id for sheet in answer_sheets.values() for question_id in sheet}
+    questions = question_bank.get_many(answered_ids)
+    
+    return jsonify(MCQEvaluator.evaluate_bulk(questions, answer_sheets)), 200
+
+def adaptive_candidates(difficulty, category):
+    """
+    Bank version, questions an adaptive test may draw from, and their item parameter cache key
+    
+    The chosen question is looked up in the returned bank, which is the
+    version it was chosen from even if the file reloads meanwhile.
+    """
+    bank = question_bank.current()
+    return bank, bank.filter(difficulty, category), (bank.version, difficulty, category)
+
+@mcq_bp.route('/adaptive/start', methods=['POST'])
+def start_adaptive():
+    """Start an adaptive MCQ test"""
+    data = request.json or {}
+    difficulty = data.get('difficulty', 'all')
+    category = data.get('category', 'all')
+    
+    bank, candidates, cache_key = adaptive_candidates(difficulty, category)
+    session = adaptive_test.start(data.get('username'), candidates, item_params,
+                                  difficulty, category, cache_key)
+    if session is None:
+        return jsonify({'error': 'No questions match the requested difficulty and category'}), 404
+    
+    return jsonify({
+        'session_id': session['session_id'],
+        'question': public_question(bank.get(session['current_question'])),
+        'progress': AdaptiveTest.ability_report(session)
+    }), 201
+
+@mcq_bp.route('/adaptive/answer', methods=['POST'])
+def answer_adaptive():
+    """Answer the current question of an adaptive MCQ test"""
+    data = request.json or {}
+    session_id = data.get('session_id')
+    
+    session = adaptive_test.load(session_id)
+    if session is None:
+        return jsonify({'error': 'Session not found'}), 404
+    
+    bank, candidates, cache_key = adaptive_candidates(session['difficulty'], session['category'])
+    try:
+        session, result = adaptive_test.answer(session_id, data.get('question_id'), data.get('answer', ''),
+                                               candidates, item_params, cache_key)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if result is None:
+        # The question left the bank after it was asked; it is not graded
+        response = {'question_removed': True}
+    else:
+        response = {'is_correct': result['is_correct'], 'correct_answer': result['correct_answer']}
+    response['progress'] = AdaptiveTest.ability_report(session)
+    
+    if session['status'] == 'in_progress':
+        response['question'] = public_question(bank.get(session['current_question']))
+        return jsonify(response), 200
+    
+    # Test finished: grade the whole sheet like a fixed-form test
+    answered_questions = bank.get_many(session['answers'])
+    evaluation = MCQEvaluator.evaluate_mcq_set(answered_questions, session['answers'])
+    question_stats.record(answered_questions, evaluation)
+    
+    question_categories = {q['id']: q.get('category', '') for q in answered_questions}
+    cohort_stats = question_stats.lookup(list(question_categories), set(question_categories.values()))
+    response['evaluation'] = evaluation
+    response['analysis'] = MCQEvaluator.get_performance_analysis(evaluation, question_categories, cohort_stats)
+    return jsonify(response), 200
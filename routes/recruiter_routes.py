@@ -28,9 +28,12 @@ def register_recruiter():
     
     # Save to recruiters.json
     recruiters_file = Config.DATA_DIR + '/recruiters.json'
-    recruiters = JSONStorage.read_json(recruiters_file)
-    recruiters[company_name] = recruiter_data
-    JSONStorage.write_json(recruiters_file, recruiters)
+    
+    def add_recruiter(recruiters):
+        recruiters[company_name] = recruiter_data
+    
+    if not JSONStorage.update_json(recruiters_file, add_recruiter):
+        return jsonify({'error': 'Failed to save recruiter'}), 500
     
     return jsonify({
         'message': 'Recruiter registered successfully',
@@ -48,10 +51,6 @@ def create_batch():
         return jsonify({'error': 'Company name and batch name are required'}), 400
     
     recruiters_file = Config.DATA_DIR + '/recruiters.json'
-    recruiters = JSONStorage.read_json(recruiters_file)
-    
-    if company_name not in recruiters:
-        return jsonify({'error': 'Recruiter not found'}), 404
     
     batch = {
         'batch_id': str(uuid.uuid4()),
@@ -65,8 +64,19 @@ def create_batch():
         'status': 'Active'
     }
     
-    recruiters[company_name]['batches'].append(batch)
-    JSONStorage.write_json(recruiters_file, recruiters)
+    found = True
+    
+    def add_batch(recruiters):
+        nonlocal found
+        if company_name not in recruiters:
+            found = False
+            return False
+        recruiters[company_name]['batches'].append(batch)
+    
+    if not JSONStorage.update_json(recruiters_file, add_batch):
+        if not found:
+            return jsonify({'error': 'Recruiter not found'}), 404
+        return jsonify({'error': 'Failed to save batch'}), 500
     
     return jsonify({
         'message': 'Batch created successfully',
@@ -98,13 +108,10 @@ def get_batch_candidates(batch_id):
         return jsonify({'error': 'Batch not found'}), 404
     
     # Get interview data for candidates
-    interviews_file = Config.INTERVIEWS_FILE
-    all_interviews = JSONStorage.read_json(interviews_file)
-    
     candidates_data = []
     for candidate in batch['candidates']:
         username = candidate['username']
-        interviews = all_interviews.get(username, [])
+        interviews = JSONStorage.get_user_interviews(username, Config.INTERVIEWS_FILE)
         
         # Calculate average score
         total_score = sum([i.get('overall_score', 0) for i in interviews])
@@ -133,27 +140,31 @@ def add_candidate_to_batch(batch_id):
         return jsonify({'error': 'Company name and username are required'}), 400
     
     recruiters_file = Config.DATA_DIR + '/recruiters.json'
-    recruiters = JSONStorage.read_json(recruiters_file)
-    
-    if company_name not in recruiters:
-        return jsonify({'error': 'Recruiter not found'}), 404
+    error = None
     
-    # Find and update batch
-    batch_found = False
-    for batch in recruiters[company_name]['batches']:
-        if batch['batch_id'] == batch_id:
-            batch['candidates'].append({
-                'username': username,
-                'added_date': data.get('added_date', ''),
-                'status': 'Pending'
-            })
-            batch_found = True
-            break
-    
-    if not batch_found:
-        return jsonify({'error': 'Batch not found'}), 404
+    def add_candidate(recruiters):
+        nonlocal error
+        if company_name not in recruiters:
+            error = 'Recruiter not found'
+            return False
+        
+        # Find and update batch
+        for batch in recruiters[company_name]['batches']:
+            if batch['batch_id'] == batch_id:
+                batch['candidates'].append({
+                    'username': username,
+                    'added_date': data.get('added_date', ''),
+                    'status': 'Pending'
+                })
+                return True
+        
+        error = 'Batch not found'
+        return False
     
-    JSONStorage.write_json(recruiters_file, recruiters)
+    if not JSONStorage.update_json(recruiters_file, add_candidate):
+        if error:
+            return jsonify({'error': error}), 404
+        return jsonify({'error': 'Failed to save candidate'}), 500
     
     return jsonify({'message': 'Candidate added to batch'}), 200
 
@@ -167,48 +178,63 @@ def auto_shortlist(batch_id):
         return jsonify({'error': 'Company name is required'}), 400
     
     recruiters_file = Config.DATA_DIR + '/recruiters.json'
-    recruiters = JSONStorage.read_json(recruiters_file)
     
+    def find_batch(recruiters):
+        for b in recruiters.get(company_name, {}).get('batches', []):
+            if b['batch_id'] == batch_id:
+                return b
+        return None
+    
+    recruiters = JSONStorage.read_json(recruiters_file)
     if company_name not in recruiters:
         return jsonify({'error': 'Recruiter not found'}), 404
-    
-    # Find batch
-    batch = None
-    for b in recruiters[company_name]['batches']:
-        if b['batch_id'] == batch_id:
-            batch = b
-            break
-    
+    batch = find_batch(recruiters)
     if not batch:
         return jsonify({'error': 'Batch not found'}), 404
     
-    threshold = batch.get('shortlist_threshold', 70)
-    
-    # Get interview scores
-    interviews_file = Config.INTERVIEWS_FILE
-    all_interviews = JSONStorage.read_json(interviews_file)
+    # Look up every candidate's latest interview score before taking the
+    # recruiters.json lock, so other recruiter writes don't wait on these reads
+    latest_scores = {}
+    for candidate in batch['candidates']:
+        username = candidate['username']
+        interviews = JSONStorage.get_user_interviews(username, Config.INTERVIEWS_FILE)
+        latest_scores[username] = interviews[-1].get('overall_score', 0) if interviews else None
     
+    error = None
+    threshold = None
     shortlisted = []
     rejected = []
     
-    for candidate in batch['candidates']:
-        username = candidate['username']
-        interviews = all_interviews.get(username, [])
+    def shortlist(recruiters):
+        nonlocal error, threshold
+        # The batch may have changed since it was read above
+        batch = find_batch(recruiters)
+        if not batch:
+            error = 'Batch not found'
+            return False
+        
+        threshold = batch.get('shortlist_threshold', 70)
         
-        if interviews:
-            # Get latest interview score
-            latest_score = interviews[-1].get('overall_score', 0)
+        for candidate in batch['candidates']:
+            username = candidate['username']
+            if username not in latest_scores:
+                # Added after the scores were read; left for the next run
+                continue
+            latest_score = latest_scores[username]
             
-            if latest_score >= threshold:
+            if latest_score is None:
+                candidate['status'] = 'Pending'
+            elif latest_score >= threshold:
                 candidate['status'] = 'Shortlisted'
                 shortlisted.append(username)
             else:
                 candidate['status'] = 'Rejected'
                 rejected.append(username)
-        else:
-            candidate['status'] = 'Pending'
     
-    JSONStorage.write_json(recruiters_file, recruiters)
+    if not JSONStorage.update_json(recruiters_file, shortlist):
+        if error:
+            return jsonify({'error': error}), 404
+        return jsonify({'error': 'Failed to save shortlist'}), 500
     
     return jsonify({
         'message': 'Auto-shortlisting completed',
@@ -220,16 +246,20 @@ def auto_shortlist(batch_id):
 @recruiter_bp.route('/candidate/<username>/report', methods=['GET'])
 def get_candidate_report(username):
     """Get detailed skill report for candidate"""
-    user = JSONStorage.get_user(username, Config.USERS_FILE)
+    # Read-only: look up just this candidate instead of parsing whole files
+    user = JSONStorage.get_user(username, Config.USERS_FILE, stream=True)
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
     # Get interviews
-    interviews = JSONStorage.get_user_interviews(username, Config.INTERVIEWS_FILE)
+    # ?include_archived=true adds sessions moved to the monthly archive
+    include_archived = request.args.get('include_archived', 'false').lower() == 'true'
+    interviews = JSONStorage.get_user_interviews(username, Config.INTERVIEWS_FILE, stream=True,
+                                                 include_archived=include_archived)
     
     # Get feedback
-    feedback = JSONStorage.get_user_feedback(username, Config.FEEDBACK_FILE)
+    feedback = JSONStorage.get_user_feedback(username, Config.FEEDBACK_FILE, stream=True)
     
     # Calculate stats
     total_interviews = len(interviews)
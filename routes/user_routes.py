@@ -49,13 +49,17 @@ def register_user():
 @user_bp.route('/profile/<username>', methods=['GET'])
 def get_profile(username):
     """Get user profile"""
-    user = JSONStorage.get_user(username, Config.USERS_FILE)
+    # Read-only: look up just this user instead of parsing the whole file
+    user = JSONStorage.get_user(username, Config.USERS_FILE, stream=True)
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
     # Get interview history
-    interviews = JSONStorage.get_user_interviews(username, Config.INTERVIEWS_FILE)
+    # ?include_archived=true adds sessions moved to the monthly archive
+    include_archived = request.args.get('include_archived', 'false').lower() == 'true'
+    interviews = JSONStorage.get_user_interviews(username, Config.INTERVIEWS_FILE, stream=True,
+                                                 include_archived=include_archived)
     
     return jsonify({
         'user': user,
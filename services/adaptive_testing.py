@@ -0,0 +1,343 @@
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.mcq_evaluator import MCQEvaluator
+from utils.locks import file_lock
+from utils.storage import JSONStorage
+
+# Default item parameters for questions the calibration has not covered yet
+DIFFICULTY_PRIORS = {'Easy': -1.0, 'Medium': 0.0, 'Hard': 1.0}
+DEFAULT_DISCRIMINATION = 1.0
+
+# Ability scale: posterior is tracked on this fixed grid under a N(0, 1) prior
+THETA_GRID = np.linspace(-4.0, 4.0, 81)
+
+class ItemParameters:
+    """Precomputed 2PL item parameters (discrimination a, difficulty b) per question
+
+    Fitted offline by ``python -m services.item_calibration`` and stored as
+    ``{"items": {question_id: {"a": ..., "b": ...}}}``. The file is re-read
+    when it changes.
+    """
+
+    # Distinct question lists (bank version x filters) whose arrays are kept
+    MAX_CACHED_ARRAYS = 32
+
+    _instances: Dict[str, 'ItemParameters'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature = None
+        self._items: Dict[str, Dict[str, float]] = {}
+        self._arrays: Dict[Tuple, Tuple[np.ndarray, np.ndarray, Dict[str, int]]] = {}
+
+    @classmethod
+    def for_path(cls, path: str) -> 'ItemParameters':
+        """Get the shared parameters for a file path"""
+        with cls._instances_lock:
+            params = cls._instances.get(path)
+            if params is None:
+                params = cls._instances[path] = cls(path)
+            return params
+
+    def items(self) -> Dict[str, Dict[str, float]]:
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+
+        with self._lock:
+            if signature != self._signature:
+                self._items = JSONStorage.read_json(self.path).get('items', {}) if signature else {}
+                self._signature = signature
+            return self._items
+
+    def arrays(self, questions: List[Dict], cache_key=None) -> Tuple[np.ndarray, np.ndarray, Dict[str, int]]:
+        """
+        Discrimination and difficulty arrays aligned with questions
+
+        Args:
+            questions: Questions to look up
+            cache_key: Hashable identity of the questions list (e.g. bank
+                version and filters); arrays are then built once per key and
+                parameters file version
+
+        Returns:
+            (a, b, question id -> position)
+        """
+        items = self.items()
+        key = (cache_key, self._signature)
+        if cache_key is not None:
+            cached = self._arrays.get(key)
+            if cached is not None:
+                return cached
+
+        a = np.empty(len(questions))
+        b = np.empty(len(questions))
+        positions = {}
+        for i, question in enumerate(questions):
+            positions[question.get('id')] = i
+            fitted = items.get(question.get('id'))
+            if fitted:
+                a[i], b[i] = fitted['a'], fitted['b']
+            else:
+                a[i] = DEFAULT_DISCRIMINATION
+                b[i] = DIFFICULTY_PRIORS.get(question.get('difficulty'), 0.0)
+
+        if cache_key is not None:
+            with self._lock:
+                if len(self._arrays) >= self.MAX_CACHED_ARRAYS:
+                    self._arrays.clear()
+                self._arrays[key] = (a, b, positions)
+        return a, b, positions
+
+def probability_correct(theta, a, b):
+    """2PL probability of a correct answer"""
+    return 1.0 / (1.0 + np.exp(-a * (theta - b)))
+
+class AdaptiveTest:
+    """Computerized adaptive MCQ test driven by item response theory
+
+    The candidate's ability is a posterior over THETA_GRID that is multiplied
+    by the likelihood of each answer as it arrives (O(grid) per answer). The
+    next question is the unanswered one with maximum Fisher information
+    a^2 P (1 - P) at the current ability estimate, and the test stops once the
+    posterior standard deviation falls below a target, so strong and weak
+    candidates are both pinned down in far fewer questions than a fixed form.
+
+    Sessions are small JSON files (one per session) in sessions_dir, so any
+    worker can serve the next answer. A session untouched for session_ttl
+    seconds has expired: it can no longer be loaded, and its file is deleted
+    by prune(), which start() runs every PRUNE_INTERVAL seconds.
+    """
+
+    # Seconds between sweeps of expired sessions in each process
+    PRUNE_INTERVAL = 600
+
+    def __init__(self, sessions_dir: str, target_se: float = 0.3,
+                 min_questions: int = 5, max_questions: int = 20, top_k: int = 3,
+                 session_ttl: float = 86400):
+        self.sessions_dir = sessions_dir
+        self.target_se = target_se
+        self.min_questions = min_questions
+        self.max_questions = max_questions
+        # Pick randomly among the top_k most informative questions so every
+        # candidate does not see the same sequence
+        self.top_k = top_k
+        self.session_ttl = session_ttl
+        self._pruned_at = 0.0
+
+    def _session_path(self, session_id: str) -> Optional[str]:
+        try:
+            # Only well-formed ids map to files, so ids can never escape the directory
+            session_id = str(uuid.UUID(session_id))
+        except (ValueError, TypeError, AttributeError):
+            return None
+        return os.path.join(self.sessions_dir, f'{session_id}.json')
+
+    def _expired(self, path: str, now: float) -> bool:
+        try:
+            # Every save rewrites the file, so mtime is the session's last activity
+            return now - os.path.getmtime(path) >= self.session_ttl
+        except OSError:
+            return True
+
+    def load(self, session_id: str) -> Optional[Dict]:
+        """Get a session by id, or None if it does not exist or has expired"""
+        path = self._session_path(session_id)
+        if path is None or self._expired(path, time.time()):
+            return None
+        return JSONStorage.read_json(path) or None
+
+    def prune(self) -> int:
+        """Delete expired session files; returns how many"""
+        self._pruned_at = time.monotonic()
+        try:
+            names = os.listdir(self.sessions_dir)
+        except OSError:
+            return 0
+
+        removed = 0
+        now = time.time()
+        for name in names:
+            session_id, ext = os.path.splitext(name)
+            path = self._session_path(session_id)
+            if ext != '.json' or path is None or not self._expired(path, now):
+                continue
+            # Under the session's lock, so a concurrent answer finishes first
+            with file_lock(self.sessions_dir, session_id):
+                if not self._expired(path, time.time()):
+                    continue
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def save(self, session: Dict) -> bool:
+        """Persist a session"""
+        os.makedirs(self.sessions_dir, exist_ok=True)
+        return JSONStorage.write_json(self._session_path(session['session_id']), session)
+
+    @staticmethod
+    def estimate(posterior: np.ndarray) -> Tuple[float, float]:
+        """Posterior mean ability and its standard deviation (standard error)"""
+        theta = float(np.dot(THETA_GRID, posterior))
+        variance = float(np.dot((THETA_GRID - theta) ** 2, posterior))
+        return theta, math.sqrt(variance)
+
+    def start(self, username: Optional[str], candidates: List[Dict], params: ItemParameters,
+              difficulty: str = 'all', category: str = 'all', cache_key=None) -> Optional[Dict]:
+        """
+        Create and save a session with a standard normal ability prior
+
+        Args:
+            username: Candidate taking the test (optional)
+            candidates: Questions the test may draw from
+            params: Item parameters for those questions
+            difficulty: Difficulty the candidates were filtered by
+            category: Category the candidates were filtered by
+            cache_key: See ItemParameters.arrays
+
+        Returns:
+            The session with its first question id in 'current_question',
+            or None if there are no questions
+        """
+        if time.monotonic() - self._pruned_at >= self.PRUNE_INTERVAL:
+            self.prune()
+
+        prior = np.exp(-0.5 * THETA_GRID ** 2)
+        theta, standard_error = self.estimate(prior / prior.sum())
+        session = {
+            'session_id': str(uuid.uuid4()),
+            'username': username,
+            'difficulty': difficulty,
+            'category': category,
+            'status': 'in_progress',
+            'started_at': datetime.now().isoformat(),
+            'posterior': (prior / prior.sum()).tolist(),
+            'ability': theta,
+            'standard_error': standard_error,
+            'answers': {},
+            'current_question': None
+        }
+
+        first = self.select_next(session, candidates, params, cache_key)
+        if first is None:
+            return None
+        session['current_question'] = first['id']
+        self.save(session)
+        return session
+
+    def answer(self, session_id: str, question_id: str, answer: str, candidates: List[Dict],
+               params: ItemParameters, cache_key=None) -> Tuple[Dict, Dict]:
+        """
+        Grade the current question, update the ability and choose the next question
+
+        Args:
+            session_id: Session to answer in
+            question_id: Must be the session's current question
+            answer: Candidate's answer
+            candidates: Questions the test may draw from
+            params: Item parameters for those questions
+            cache_key: See ItemParameters.arrays
+
+        Returns:
+            (updated session, MCQEvaluator.evaluate_mcq result for the answer);
+            the result is None if the question was removed from the bank since
+            it was asked, in which case the answer is not graded and the test
+            moves on
+
+        Raises:
+            ValueError: If the session does not exist, is finished, or is
+                waiting for a different question
+        """
+        with file_lock(self.sessions_dir, str(session_id)):
+            session = self.load(session_id)
+            if session is None:
+                raise ValueError('Session not found')
+            if session['status'] != 'in_progress':
+                raise ValueError('Session already completed')
+            if question_id != session['current_question']:
+                raise ValueError(f"Expected an answer to {session['current_question']}")
+
+            a, b, positions = params.arrays(candidates, cache_key)
+            result = None
+            if question_id in positions:
+                position = positions[question_id]
+                result = MCQEvaluator.evaluate_mcq(candidates[position], answer)
+                session['answers'][question_id] = answer
+                self.record_answer(session, a[position], b[position], result['is_correct'])
+
+            next_question = None
+            if not self.is_finished(session):
+                next_question = self.select_next(session, candidates, params, cache_key)
+            if next_question is None:
+                session['status'] = 'completed'
+                session['completed_at'] = datetime.now().isoformat()
+                session['current_question'] = None
+            else:
+                session['current_question'] = next_question['id']
+
+            self.save(session)
+            return session, result
+
+    def select_next(self, session: Dict, candidates: List[Dict], params: ItemParameters,
+                    cache_key=None) -> Optional[Dict]:
+        """Pick an unanswered question with (near) maximum information at the current ability"""
+        if not candidates:
+            return None
+
+        a, b, positions = params.arrays(candidates, cache_key)
+        p = probability_correct(session['ability'], a, b)
+        information = a ** 2 * p * (1 - p)
+        for question_id in session['answers']:
+            if question_id in positions:
+                information[positions[question_id]] = -np.inf
+
+        k = min(self.top_k, len(candidates))
+        best = np.argpartition(-information, k - 1)[:k]
+        best = best[information[best] > -np.inf]
+        if best.size == 0:
+            return None
+        return candidates[int(random.choice(best.tolist()))]
+
+    def record_answer(self, session: Dict, a: float, b: float, is_correct: bool) -> None:
+        """Update the ability posterior with one answer to an item with parameters (a, b)"""
+        likelihood = probability_correct(THETA_GRID, a, b)
+        if not is_correct:
+            likelihood = 1.0 - likelihood
+
+        posterior = np.asarray(session['posterior']) * likelihood
+        posterior /= posterior.sum()
+        session['posterior'] = posterior.tolist()
+        session['ability'], session['standard_error'] = self.estimate(posterior)
+
+    def is_finished(self, session: Dict) -> bool:
+        answered = len(session['answers'])
+        if answered >= self.max_questions:
+            return True
+        return answered >= self.min_questions and session['standard_error'] <= self.target_se
+
+    @staticmethod
+    def ability_report(session: Dict) -> Dict:
+        """Ability estimate with a 0-100 score (the ability's percentile under N(0, 1))"""
+        theta = session['ability']
+        return {
+            'ability': round(theta, 3) + 0.0,
+            'standard_error': round(session['standard_error'], 3),
+            'questions_answered': len(session['answers']),
+            'score': round(50 * (1 + math.erf(theta / math.sqrt(2))), 2)
+        }
@@ -0,0 +1,314 @@
+"""
+Compact binary question banks
+
+A compiled bank (``questions_mcq.qbank`` next to ``questions_mcq.json``) is
+memory-mapped instead of parsed, so every worker shares the same pages
+through the OS page cache, startup does not depend on the bank size, and
+only the questions actually served are decoded.
+
+File layout (little-endian)::
+
+    magic (8 bytes) | header length (u32) | header JSON | padding to 8 bytes
+    rows       one fixed-width ROW per question, in source file order
+    id order   u32 positions of questions with an id, sorted by id bytes
+    positions  u32 positions grouped by difficulty, category and both
+    blob       each question's id followed by its compact JSON
+
+The header holds the source file's sha1 (so the bank version, and with it
+every ETag, is the same as when the JSON file is loaded), the difficulty and
+category names the rows' codes refer to, the position groups and the
+section offsets.
+
+Usage:
+    python -m services.compiled_bank [questions.json ...]
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+MAGIC = b'QBANK\x00\x01\x00'
+HEADER_LENGTH = struct.Struct('<I')
+# record offset, id offset (both relative to the blob), record length, id length,
+# difficulty code, category code
+ROW = struct.Struct('<QQIIHH')
+POSITION = struct.Struct('<I')
+
+def compiled_path(source_path: str) -> str:
+    """Path of the compiled bank built from a JSON question file"""
+    return os.path.splitext(source_path)[0] + '.qbank'
+
+def _positions(values: Iterable[int]) -> bytes:
+    data = array('I', values)
+    if sys.byteorder != 'little':
+        data.byteswap()
+    return data.tobytes()
+
+def _pad(size: int) -> bytes:
+    return b'\x00' * (-size % 8)
+
+def compile_bank(source_path: str, output_path: Optional[str] = None) -> str:
+    """
+    Compile a JSON question file into a binary bank
+
+    Args:
+        source_path: JSON list of question dicts
+        output_path: Where to write the bank (default: compiled_path(source_path))
+
+    Returns:
+        The output path
+    """
+    output_path = output_path or compiled_path(source_path)
+    with open(source_path, 'rb') as f:
+        raw = f.read()
+    questions = json.loads(raw)
+
+    difficulties: Dict = {}
+    categories: Dict = {}
+    rows = []
+    blob = bytearray()
+    ids: Dict[bytes, int] = {}
+    groups: Dict[str, Dict] = {'pair': {}, 'difficulty': {}, 'category': {}}
+
+    for position, question in enumerate(questions):
+        question_id = question.get('id')
+        id_bytes = str(question_id).encode('utf-8') if question_id is not None else b''
+        record = json.dumps(question, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        difficulty = difficulties.setdefault(question.get('difficulty'), len(difficulties))
+        category = categories.setdefault(question.get('category'), len(categories))
+
+        id_offset = len(blob)
+        blob += id_bytes
+        rows.append(ROW.pack(len(blob), id_offset, len(record), len(id_bytes), difficulty, category))
+        blob += record
+
+        if question_id is not None:
+            # Like the in-memory index, a repeated id refers to its last question
+            ids[id_bytes] = position
+        groups['pair'].setdefault((difficulty, category), []).append(position)
+        groups['difficulty'].setdefault(difficulty, []).append(position)
+        groups['category'].setdefault(category, []).append(position)
+
+    id_order = _positions(ids[id_bytes] for id_bytes in sorted(ids))
+
+    grouped = bytearray()
+    header_groups: Dict[str, List] = {'pair': [], 'difficulty': [], 'category': []}
+    for kind, by_key in groups.items():
+        for key, members in by_key.items():
+            start = len(grouped) // POSITION.size
+            grouped += _positions(members)
+            header_groups[kind].append([*(key if kind == 'pair' else (key,)), start, len(members)])
+
+    header = {
+        'version': hashlib.sha1(raw).hexdigest(),
+        'count': len(questions),
+        'ids': len(ids),
+        'difficulties': list(difficulties),
+        'categories': list(categories),
+        'groups': header_groups
+    }
+    sections = [b''.join(rows), id_order, bytes(grouped), bytes(blob)]
+
+    # Offsets depend on the header length, which depends on the offsets:
+    # re-encode until they stop changing (they only grow, so this converges)
+    header['sections'] = [0] * len(sections)
+    while True:
+        encoded = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        offset = len(MAGIC) + HEADER_LENGTH.size + len(encoded)
+        offset += len(_pad(offset))
+        offsets = []
+        for section in sections:
+            offsets.append(offset)
+            offset += len(section) + len(_pad(len(section)))
+        if offsets == header['sections']:
+            break
+        header['sections'] = offsets
+
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + HEADER_LENGTH.pack(len(encoded)) + encoded)
+        f.write(_pad(len(MAGIC) + HEADER_LENGTH.size + len(encoded)))
+        for section in sections:
+            f.write(section)
+            f.write(_pad(len(section)))
+    os.replace(tmp_path, output_path)
+    return output_path
+
+class QuestionList(Sequence):
+    """Questions of a compiled bank, decoded only when an item is accessed"""
+
+    def __init__(self, index: 'CompiledQuestionIndex', positions):
+        self._index = index
+        self._positions = positions
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return QuestionList(self._index, self._positions[item])
+        return self._index.at(self._positions[item])
+
+class CompiledQuestionIndex:
+    """Read-only view of a compiled bank with the QuestionIndex interface
+
+    Only the header is parsed when the bank is opened. Lookups by id binary
+    search the id order section, filters slice a precomputed position group,
+    and questions are decoded on access; recently decoded questions and
+    their serialized public views are kept in small bounded caches.
+    """
+
+    format = 'compiled'
+
+    # Decoded questions / public views kept per index
+    CACHE_SIZE = 1024
+
+    def __init__(self, path: str, public_view: Optional[Callable[[Dict], Dict]] = None):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        mm = self._mm
+        if mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a compiled question bank")
+        (header_length,) = HEADER_LENGTH.unpack_from(mm, len(MAGIC))
+        start = len(MAGIC) + HEADER_LENGTH.size
+        header = json.loads(mm[start:start + header_length])
+
+        self.version = header['version']
+        self.loaded_at = datetime.now().isoformat()
+        self.count = header['count']
+        self._rows, self._id_order, self._grouped, self._blob = header['sections']
+        self._id_count = header['ids']
+        self._difficulties = {name: code for code, name in enumerate(header['difficulties'])}
+        self._categories = {name: code for code, name in enumerate(header['categories'])}
+        self._groups = {
+            'pair': {(d, c): (s, n) for d, c, s, n in header['groups']['pair']},
+            'difficulty': {d: (s, n) for d, s, n in header['groups']['difficulty']},
+            'category': {c: (s, n) for c, s, n in header['groups']['category']}
+        }
+        self._public_view = public_view
+        self._lock = threading.Lock()
+        self._decoded: Dict[int, Dict] = {}
+        self._public: Dict[str, bytes] = {}
+
+    @property
+    def questions(self) -> QuestionList:
+        return QuestionList(self, range(self.count))
+
+    def _id_at(self, position: int) -> bytes:
+        _, id_offset, _, id_length, _, _ = ROW.unpack_from(self._mm, self._rows + position * ROW.size)
+        start = self._blob + id_offset
+        return self._mm[start:start + id_length]
+
+    def at(self, position: int) -> Dict:
+        """Decode the question at a position in the source file"""
+        question = self._decoded.get(position)
+        if question is not None:
+            return question
+
+        record_offset, _, record_length, _, _, _ = ROW.unpack_from(self._mm, self._rows + position * ROW.size)
+        start = self._blob + record_offset
+        question = json.loads(self._mm[start:start + record_length])
+        with self._lock:
+            if len(self._decoded) >= self.CACHE_SIZE:
+                self._decoded.clear()
+            self._decoded[position] = question
+        return question
+
+    def _position(self, question_id: str) -> Optional[int]:
+        """Binary search the id order section"""
+        if not isinstance(question_id, str):
+            return None
+        key = question_id.encode('utf-8')
+        low, high = 0, self._id_count
+        while low < high:
+            middle = (low + high) // 2
+            (position,) = POSITION.unpack_from(self._mm, self._id_order + middle * POSITION.size)
+            if self._id_at(position) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self._id_count:
+            return None
+        (position,) = POSITION.unpack_from(self._mm, self._id_order + low * POSITION.size)
+        return position if self._id_at(position) == key else None
+
+    def get(self, question_id: str) -> Optional[Dict]:
+        """Get a question by id"""
+        position = self._position(question_id)
+        return None if position is None else self.at(position)
+
+    def get_many(self, question_ids: Iterable[str]) -> List[Dict]:
+        """Get the questions with the given ids, in file order; unknown ids are skipped"""
+        positions = {self._position(question_id) for question_id in question_ids}
+        positions.discard(None)
+        return [self.at(position) for position in sorted(positions)]
+
+    def _group(self, kind: str, key) -> QuestionList:
+        start, length = self._groups[kind].get(key, (0, 0))
+        offset = self._grouped + start * POSITION.size
+        positions = array('I', self._mm[offset:offset + length * POSITION.size])
+        if sys.byteorder != 'little':
+            positions.byteswap()
+        return QuestionList(self, positions)
+
+    def filter(self, difficulty: str = 'all', category: str = 'all') -> QuestionList:
+        """
+        Get questions matching a difficulty and category
+
+        Args:
+            difficulty: Difficulty level, or 'all'
+            category: Category name, or 'all'
+
+        Returns:
+            Matching questions in file order, decoded lazily
+        """
+        if difficulty == 'all' and category == 'all':
+            return self.questions
+
+        difficulty_code = self._difficulties.get(difficulty, -1)
+        category_code = self._categories.get(category, -1)
+        if difficulty == 'all':
+            return self._group('category', category_code)
+        if category == 'all':
+            return self._group('difficulty', difficulty_code)
+        return self._group('pair', (difficulty_code, category_code))
+
+    def public_json(self, questions: Iterable[Dict]) -> bytes:
+        """Serialized JSON array of the public views of questions from this index"""
+        parts = []
+        for question in questions:
+            serialized = self._public.get(question['id'])
+            if serialized is None:
+                serialized = json.dumps(self._public_view(question), separators=(',', ':'),
+                                        ensure_ascii=False).encode('utf-8')
+                with self._lock:
+                    if len(self._public) >= self.CACHE_SIZE:
+                        self._public.clear()
+                    self._public[question['id']] = serialized
+            parts.append(serialized)
+        return b'[' + b','.join(parts) + b']'
+
+def main():
+    """Command line entry point for compiling question banks"""
+    from config import Config
+
+    parser = argparse.ArgumentParser(description='Compile JSON question files into binary banks')
+    parser.add_argument('files', nargs='*', default=[Config.MCQ_QUESTIONS_FILE, Config.CODING_QUESTIONS_FILE])
+    args = parser.parse_args()
+
+    for source_path in args.files:
+        output_path = compile_bank(source_path)
+        print(f"Compiled {source_path} -> {output_path} ({os.path.getsize(output_path)} bytes)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Fit 2PL item parameters for adaptive MCQ tests
+
+From historical answer sheets ({candidate: {question_id: answer}}, the same
+shape /api/mcq/evaluate/bulk accepts), discrimination a and difficulty b are
+fitted per question by joint maximum likelihood with NumPy. Questions with
+too few responses fall back to a difficulty derived from the cumulative
+answer statistics (p-value), or from their Easy/Medium/Hard label.
+
+Usage (from the project root, so the services and utils packages import):
+    python -m services.item_calibration [--sheets answer_sheets.json] [--output data/item_params.json]
+"""
+
+import argparse
+import json
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+from services.adaptive_testing import DEFAULT_DISCRIMINATION, DIFFICULTY_PRIORS
+from utils.storage import JSONStorage
+
+# Responses needed before an item is fitted rather than given a prior
+MIN_RESPONSES = 30
+
+def fit_2pl(responses: np.ndarray, iterations: int = 500, learning_rate: float = 0.05):
+    """
+    Joint maximum likelihood fit of a 2PL model
+
+    Args:
+        responses: candidates x items matrix of 1 (correct), 0 (wrong) or NaN (not answered)
+
+    Returns:
+        (a, b, theta) arrays
+    """
+    answered = ~np.isnan(responses)
+    x = np.where(answered, responses, 0.0)
+    n_items = responses.shape[1]
+
+    # Start from standardized raw scores and logit p-values
+    scores = np.divide(x.sum(axis=1) + 0.5, answered.sum(axis=1) + 1.0)
+    theta = np.log(scores / (1 - scores))
+    theta = (theta - theta.mean()) / (theta.std() or 1.0)
+    p_values = np.clip(np.divide(x.sum(axis=0) + 0.5, answered.sum(axis=0) + 1.0), 0.01, 0.99)
+    b = -np.log(p_values / (1 - p_values))
+    a = np.full(n_items, DEFAULT_DISCRIMINATION)
+
+    for _ in range(iterations):
+        p = 1.0 / (1.0 + np.exp(-a * (theta[:, None] - b)))
+        residual = np.where(answered, x - p, 0.0)
+
+        # Gradient ascent on the log-likelihood, one block of parameters at a time
+        theta += learning_rate * (residual * a).sum(axis=1) / np.maximum(answered.sum(axis=1), 1)
+        theta = np.clip((theta - theta.mean()) / (theta.std() or 1.0), -4, 4)
+
+        p = 1.0 / (1.0 + np.exp(-a * (theta[:, None] - b)))
+        residual = np.where(answered, x - p, 0.0)
+        counts = np.maximum(answered.sum(axis=0), 1)
+        a += learning_rate * (residual * (theta[:, None] - b)).sum(axis=0) / counts
+        b -= learning_rate * (residual * a).sum(axis=0) / counts
+        a = np.clip(a, 0.2, 3.0)
+        b = np.clip(b, -4.0, 4.0)
+
+    return a, b, theta
+
+def calibrate(questions: List[Dict], answer_sheets: Dict[str, Dict[str, str]], question_stats: Dict) -> Dict:
+    """
+    Build item parameters for every question
+
+    Args:
+        questions: Question bank
+        answer_sheets: Historical candidate answers (may be empty)
+        question_stats: QuestionStats.snapshot()['questions'] (may be empty)
+
+    Returns:
+        question ID -> {'a', 'b', 'source'}
+    """
+    items = {}
+    ids = [question['id'] for question in questions if 'id' in question]
+    keys = {question['id']: question.get('correct_answer', '').strip().upper() for question in questions if 'id' in question}
+    column_of = {question_id: column for column, question_id in enumerate(ids)}
+
+    if answer_sheets:
+        responses = np.full((len(answer_sheets), len(ids)), np.nan)
+        for row, sheet in enumerate(answer_sheets.values()):
+            for question_id, answer in sheet.items():
+                column = column_of.get(question_id)
+                if column is not None:
+                    responses[row, column] = float(str(answer).strip().upper() == keys[question_id])
+
+        counts = (~np.isnan(responses)).sum(axis=0)
+        fitted = counts >= MIN_RESPONSES
+        if fitted.any():
+            a, b, _ = fit_2pl(responses[:, fitted])
+            for column, a_value, b_value in zip(np.flatnonzero(fitted), a, b):
+                items[ids[column]] = {'a': round(float(a_value), 4), 'b': round(float(b_value), 4), 'source': 'fit'}
+
+    for question in questions:
+        question_id = question.get('id')
+        if question_id is None or question_id in items:
+            continue
+
+        stats = question_stats.get(question_id)
+        if stats and stats.get('attempts', 0) >= MIN_RESPONSES:
+            # Smoothed p-value of the whole cohort, assumed centred on ability 0
+            p = (stats['correct'] + 1) / (stats['attempts'] + 2)
+            items[question_id] = {'a': DEFAULT_DISCRIMINATION, 'b': round(float(np.log((1 - p) / p)), 4),
+                                  'source': 'p_value'}
+        else:
+            items[question_id] = {'a': DEFAULT_DISCRIMINATION,
+                                  'b': DIFFICULTY_PRIORS.get(question.get('difficulty'), 0.0),
+                                  'source': 'prior'}
+
+    return items
+
+def main():
+    from config import Config
+    from services.question_stats import QuestionStats
+
+    parser = argparse.ArgumentParser(description='Fit 2PL item parameters for adaptive MCQ tests')
+    parser.add_argument('--questions', default=Config.MCQ_QUESTIONS_FILE)
+    parser.add_argument('--sheets', help='JSON file of {candidate: {question_id: answer}} answer sheets')
+    parser.add_argument('--output', default=Config.ITEM_PARAMS_FILE)
+    args = parser.parse_args()
+
+    with open(args.questions, 'r', encoding='utf-8') as f:
+        questions = json.load(f)
+    answer_sheets = JSONStorage.read_json(args.sheets) if args.sheets else {}
+    question_stats = QuestionStats.for_path(Config.QUESTION_STATS_FILE).snapshot()['questions']
+
+    items = calibrate(questions, answer_sheets, question_stats)
+    JSONStorage.write_json(args.output, {'fitted_at': datetime.now().isoformat(), 'items': items})
+
+    sources = {}
+    for item in items.values():
+        sources[item['source']] = sources.get(item['source'], 0) + 1
+    print(f"Wrote parameters for {len(items)} questions to {args.output}: {sources}")
+
+if __name__ == '__main__':
+    main()
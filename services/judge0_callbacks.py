@@ -0,0 +1,114 @@
+import base64
+import binascii
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+# Submission fields Judge0 base64-encodes in callback bodies
+ENCODED_FIELDS = ('stdout', 'stderr', 'compile_output', 'message')
+
+class ResultWaiter:
+    """Results delivered by Judge0 callbacks for one group of tokens"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._results: Dict[str, Dict] = {}
+
+    def deliver(self, token: str, result: Dict) -> None:
+        with self._lock:
+            self._results[token] = result
+        self._event.set()
+
+    def take(self) -> Dict[str, Dict]:
+        """Results delivered since the last call"""
+        with self._lock:
+            results, self._results = self._results, {}
+            self._event.clear()
+        return results
+
+    def wait(self, timeout: float) -> bool:
+        """Block until a result is delivered or timeout expires; returns whether one was"""
+        return self._event.wait(timeout)
+
+class Judge0Callbacks:
+    """Hands results that Judge0 PUTs to our callback_url to the requests waiting for them
+
+    Waiters register their tokens before waiting; a callback for a token
+    that is not registered yet (Judge0 finished before the submitting
+    request got to wait) is kept briefly, so registering picks it up.
+    Callbacks only reach the worker process that received them; waiters in
+    other processes find their results by polling.
+    """
+
+    # Unclaimed callback results kept for late registrations
+    MAX_EARLY_RESULTS = 1024
+
+    _lock = threading.Lock()
+    _waiters: Dict[str, ResultWaiter] = {}
+    _early: 'OrderedDict[str, Dict]' = OrderedDict()
+
+    @classmethod
+    def register(cls, tokens: Iterable[str]) -> ResultWaiter:
+        """Start waiting for callbacks for tokens"""
+        waiter = ResultWaiter()
+        with cls._lock:
+            for token in tokens:
+                cls._waiters[token] = waiter
+                early = cls._early.pop(token, None)
+                if early is not None:
+                    waiter.deliver(token, early)
+        return waiter
+
+    @classmethod
+    def unregister(cls, tokens: Iterable[str]) -> None:
+        with cls._lock:
+            for token in tokens:
+                cls._waiters.pop(token, None)
+
+    @staticmethod
+    def decode(result: Dict) -> Dict:
+        """
+        Decode a callback body into the plain-text form our polls return
+
+        Judge0 always sends callback submissions base64-encoded, wrapped
+        with newlines.
+
+        Raises:
+            ValueError: If an encoded field is not valid base64
+        """
+        decoded = dict(result)
+        for field in ENCODED_FIELDS:
+            value = decoded.get(field)
+            if value is None:
+                continue
+            try:
+                raw = base64.b64decode(''.join(value.split()), validate=True)
+                decoded[field] = raw.decode('utf-8', errors='replace')
+            except (binascii.Error, AttributeError, TypeError):
+                raise ValueError(f'{field} is not valid base64')
+        return decoded
+
+    @classmethod
+    def deliver(cls, result: Dict) -> Optional[bool]:
+        """
+        Pass a callback's submission to its waiter
+
+        Returns:
+            True if a request was waiting for it, False if it was kept for a
+            later registration, None if it has no token
+        """
+        token = result.get('token')
+        if not token:
+            return None
+
+        with cls._lock:
+            waiter = cls._waiters.get(token)
+            if waiter is None:
+                cls._early[token] = result
+                while len(cls._early) > cls.MAX_EARLY_RESULTS:
+                    cls._early.popitem(last=False)
+                return False
+
+        waiter.deliver(token, result)
+        return True
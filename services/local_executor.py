@@ -0,0 +1,541 @@
+import atexit
+import json
+import math
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from config import Config
+from services.program_cache import ProgramCache
+from services.python_pool import PythonWorkerPool, Worker
+from services.uid_pool import UidPool
+
+# Judge0 status ids and descriptions, so results look the same for both backends
+STATUS_ACCEPTED = (3, 'Accepted')
+STATUS_TIME_LIMIT = (5, 'Time Limit Exceeded')
+STATUS_COMPILATION_ERROR = (6, 'Compilation Error')
+STATUS_SIGNALS = {
+    signal.SIGSEGV: (7, 'Runtime Error (SIGSEGV)'),
+    signal.SIGXFSZ: (8, 'Runtime Error (SIGXFSZ)'),
+    signal.SIGFPE: (9, 'Runtime Error (SIGFPE)'),
+    signal.SIGABRT: (10, 'Runtime Error (SIGABRT)')
+}
+STATUS_NZEC = (11, 'Runtime Error (NZEC)')
+STATUS_OTHER = (12, 'Runtime Error (Other)')
+STATUS_INTERNAL_ERROR = (13, 'Internal Error')
+
+class Program:
+    """A submission written (and compiled, if needed) into its own temporary directory
+
+    The source and build output live in ``src`` (mounted read-only at
+    /sandbox when the program runs); each run's input and output files go
+    to ``io``, which the sandbox cannot see.
+    """
+
+    def __init__(self, basedir: str, language: str, command, limit_address_space: bool):
+        self.basedir = basedir
+        self.workdir = os.path.join(basedir, 'src')
+        self.iodir = os.path.join(basedir, 'io')
+        self.language = language
+        self.command = command
+        self.limit_address_space = limit_address_space
+        # Compiler diagnostics if the code does not compile
+        self.compile_output: Optional[str] = None
+        # Set instead if compiling failed for reasons other than the code (the
+        # compiler could not start, was killed or timed out); runs then report
+        # an Internal Error and the program is not cached
+        self.build_error: Optional[str] = None
+
+    @property
+    def cacheable(self) -> bool:
+        """Whether the build outcome depends only on the source"""
+        return self.build_error is None
+
+    def cleanup(self) -> None:
+        shutil.rmtree(self.basedir, ignore_errors=True)
+
+class LocalExecutor:
+    """Run submissions in sandboxed local processes instead of Judge0
+
+    Every process (compiler included) is started through
+    services/sandbox.py, which gives it a private root containing only the
+    system directories toolchains need and the submission directory,
+    no network, its own pid namespace (so nothing it starts outlives it)
+    and rlimits on CPU time, address space, written file size, processes,
+    open files and core dumps, and runs it as one of the
+    LOCAL_EXECUTOR_UID_COUNT unprivileged uids from LOCAL_EXECUTOR_UID that
+    no other sandbox is using (see UidPool), with LOCAL_EXECUTOR_GID. Output goes to files outside the sandbox,
+    bounded by the file size limit, and the input is a file too (fixtures
+    are used in place). CPU time and peak memory come from wait4().
+    Python submissions start in a pre-started interpreter from a shared
+    PythonWorkerPool when PYTHON_POOL_SIZE is set. Compiled programs are
+    kept in a shared ProgramCache, so the same source is compiled once and
+    then run for every test case of every run.
+
+    Setting up the sandbox needs root, and the backend only runs when
+    LOCAL_EXECUTOR_ENABLED is set. It is still no substitute for a
+    separate machine when running fully untrusted code.
+    """
+
+    # file name, compile command (or None), run command, limit the address space
+    # (runtimes that reserve lots of virtual memory up front cannot start under an
+    # address space limit; their memory use is only reported)
+    LANGUAGES = {
+        'python': ('main.py', None, [sys.executable, '-I', 'main.py'], True),
+        'javascript': ('main.js', None, ['node', 'main.js'], False),
+        'java': ('Main.java', ['javac', 'Main.java'], ['java', '-Xss64m', 'Main'], False),
+        'cpp': ('main.cpp', ['g++', '-O2', '-std=c++17', '-o', 'main', 'main.cpp'], ['./main'], True),
+        'c': ('main.c', ['gcc', '-O2', '-o', 'main', 'main.c', '-lm'], ['./main'], True),
+        'csharp': ('main.cs', ['mcs', '-out:main.exe', 'main.cs'], ['mono', 'main.exe'], False),
+        'go': ('main.go', ['go', 'build', '-o', 'main', 'main.go'], ['./main'], False),
+        'ruby': ('main.rb', None, ['ruby', 'main.rb'], False),
+        'php': ('main.php', None, ['php', 'main.php'], True),
+    }
+
+    SANDBOX_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sandbox.py')
+    # Visible (read-only) inside the sandbox, besides LOCAL_EXECUTOR_READONLY_PATHS and the Python installation
+    READONLY_PATHS = ('/usr', '/bin', '/sbin', '/lib', '/lib32', '/lib64', '/etc/alternatives', '/etc/ld.so.cache')
+    OPEN_FILES = 256
+    # Size of the sandbox's tmpfs (its /tmp) for programs and for compilers
+    RUN_TMP_SIZE = 64 * 1024 * 1024
+    COMPILE_TMP_SIZE = 1024 * 1024 * 1024
+
+    # Limits for compilers, which need more room than the programs they build
+    COMPILE_TIME_LIMIT = 30
+    COMPILE_FILE_SIZE = 256 * 1024 * 1024
+
+    # Seconds to wait for a warm Python worker before starting a fresh interpreter
+    POOL_WAIT = 1
+    # Seconds to wait for a free sandbox uid
+    UID_WAIT = 10
+
+    _sandbox_checked = False
+    _sandbox_error: Optional[str] = None
+    _sandbox_lock = threading.Lock()
+    _python_pool: Optional[PythonWorkerPool] = None
+    _python_pool_lock = threading.Lock()
+    _programs: Optional[ProgramCache] = None
+    _programs_lock = threading.Lock()
+    _uids: Optional[UidPool] = None
+    _uids_lock = threading.Lock()
+
+    @classmethod
+    def check_available(cls) -> None:
+        """
+        Make sure submissions can be run in the sandbox (checked once)
+
+        Raises:
+            RuntimeError: If the local backend is not enabled or the sandbox cannot be set up
+        """
+        if not Config.LOCAL_EXECUTOR_ENABLED:
+            raise RuntimeError('Local execution is disabled (set LOCAL_EXECUTOR_ENABLED=True to opt in)')
+        with cls._sandbox_lock:
+            if not cls._sandbox_checked:
+                cls._sandbox_error = cls._probe_sandbox()
+                if cls._sandbox_error:
+                    print(f"Local executor: sandbox unavailable: {cls._sandbox_error}")
+                cls._sandbox_checked = True
+        if cls._sandbox_error:
+            raise RuntimeError(f'Local execution sandbox unavailable: {cls._sandbox_error}')
+
+    @classmethod
+    def _probe_sandbox(cls) -> Optional[str]:
+        """Start one sandboxed process; returns why that failed, or None"""
+        if os.geteuid() != 0:
+            return 'the server must run as root to set up the sandbox'
+        program = cls._new_program('python', [sys.executable, '-I', '-c', 'pass'], False)
+        try:
+            result = cls._spawn(program, program.command, os.devnull, 10, None, 1024 * 1024, 20)
+        except (OSError, subprocess.SubprocessError) as e:
+            return str(e)
+        finally:
+            program.cleanup()
+        if result['returncode'] != 0:
+            return result['stderr'].strip() or f"exit code {result['returncode']}"
+        return None
+
+    @classmethod
+    def python_pool(cls) -> Optional[PythonWorkerPool]:
+        """The shared pool of warm Python workers (started on first use), or None if disabled"""
+        if Config.PYTHON_POOL_SIZE <= 0:
+            return None
+        with cls._python_pool_lock:
+            if cls._python_pool is None:
+                cls._python_pool = PythonWorkerPool(cls._start_python_worker, Config.PYTHON_POOL_SIZE,
+                                                    Config.PYTHON_POOL_MAX_IDLE)
+            return cls._python_pool
+
+    @classmethod
+    def program_cache(cls) -> Optional[ProgramCache]:
+        """The shared cache of compiled programs, or None if disabled"""
+        if Config.LOCAL_EXECUTOR_CACHE_SIZE <= 0:
+            return None
+        with cls._programs_lock:
+            if cls._programs is None:
+                cls._programs = ProgramCache(Config.LOCAL_EXECUTOR_CACHE_SIZE)
+                # Cached programs live in temporary directories
+                atexit.register(cls._programs.clear)
+            return cls._programs
+
+    @classmethod
+    def uid_pool(cls) -> UidPool:
+        """The uids sandboxes run as, shared by all server processes through lock files"""
+        with cls._uids_lock:
+            if cls._uids is None:
+                lock_dir = os.path.join(Config.LOCAL_EXECUTOR_DIR or tempfile.gettempdir(), 'sandbox-uids')
+                cls._uids = UidPool(Config.LOCAL_EXECUTOR_UID, Config.LOCAL_EXECUTOR_UID_COUNT, lock_dir)
+            return cls._uids
+
+    @classmethod
+    def _new_program(cls, language: str, command, limit_address_space: bool) -> Program:
+        """
+        Create a program's directories
+
+        src is writable by the sandbox group rather than one uid: the
+        compiler and each run of the program get uids of their own.
+        """
+        basedir = tempfile.mkdtemp(prefix='submission-', dir=Config.LOCAL_EXECUTOR_DIR)
+        program = Program(basedir, language, command, limit_address_space)
+        os.mkdir(program.workdir, 0o700)
+        os.mkdir(program.iodir, 0o700)
+        os.chown(program.workdir, -1, Config.LOCAL_EXECUTOR_GID)
+        os.chmod(program.workdir, 0o770)
+        return program
+
+    @staticmethod
+    def _readonly_paths() -> List[str]:
+        paths = list(LocalExecutor.READONLY_PATHS)
+        paths += [path for path in Config.LOCAL_EXECUTOR_READONLY_PATHS.split(',') if path]
+        # The interpreter running submissions (and workers) may live outside /usr, e.g. in a virtualenv
+        for prefix in {sys.base_prefix, sys.prefix}:
+            if not any(prefix == path or prefix.startswith(path.rstrip('/') + '/') for path in paths):
+                paths.append(prefix)
+        return paths
+
+    @staticmethod
+    def _mountpoint() -> str:
+        """Empty directory each sandbox mounts its private root on (in its own mount namespace)"""
+        path = os.path.join(Config.LOCAL_EXECUTOR_DIR or tempfile.gettempdir(), 'sandbox-root')
+        os.makedirs(path, mode=0o755, exist_ok=True)
+        return path
+
+    @classmethod
+    def _sandbox_command(cls, workdir: str, result_path: str, command, uid: int, cpu_seconds: Optional[int],
+                         memory_bytes: Optional[int], file_size: int, writable: bool = False) -> List[str]:
+        """Command line running command in the sandbox (see services/sandbox.py)"""
+        home = '/sandbox' if writable else '/tmp'
+        spec = {
+            'root': cls._mountpoint(),
+            'workdir': workdir,
+            'writable': writable,
+            'readonly_paths': cls._readonly_paths(),
+            'tmp_size': cls.COMPILE_TMP_SIZE if writable else cls.RUN_TMP_SIZE,
+            'network': Config.LOCAL_EXECUTOR_ALLOW_NETWORK,
+            'uid': uid,
+            'gid': Config.LOCAL_EXECUTOR_GID,
+            'cpu_seconds': cpu_seconds,
+            'memory_bytes': memory_bytes,
+            'file_size': file_size,
+            'open_files': cls.OPEN_FILES,
+            'max_processes': Config.LOCAL_EXECUTOR_MAX_PROCESSES,
+            'result': result_path,
+            'env': {
+                'PATH': os.environ.get('PATH', '/usr/bin:/bin'),
+                'HOME': home,
+                'TMPDIR': '/tmp',
+                'LANG': 'C.UTF-8',
+                # Go keeps its build cache under the home directory
+                'GOCACHE': os.path.join(home, '.gocache')
+            }
+        }
+        return [sys.executable, '-I', '-S', cls.SANDBOX_SCRIPT, json.dumps(spec)] + list(command)
+
+    @classmethod
+    def _spawn(cls, program: Program, command, stdin_path: str, cpu_seconds: int, memory_bytes: Optional[int],
+               file_size: int, wall_seconds: float, writable: bool = False) -> Dict:
+        """
+        Run one sandboxed process to completion
+
+        Returns:
+            stdout, stderr, exit status (None if the sandbox did not report
+            one), CPU time and real time (seconds), peak memory (KB) and
+            whether the wall clock limit killed it
+        """
+        # Tests of one program may run concurrently, so every run gets its own files
+        run_id = uuid.uuid4().hex
+        stdout_path = os.path.join(program.iodir, f'stdout-{run_id}')
+        stderr_path = os.path.join(program.iodir, f'stderr-{run_id}')
+        result_path = os.path.join(program.iodir, f'result-{run_id}')
+        # The uid is free again once the sandbox has exited, as nothing it started outlives it
+        with cls.uid_pool().lease(cls.UID_WAIT) as uid:
+            argv = cls._sandbox_command(program.workdir, result_path, command, uid, cpu_seconds, memory_bytes,
+                                        file_size, writable)
+            with open(stdin_path, 'rb') as stdin, open(stdout_path, 'wb') as stdout, \
+                    open(stderr_path, 'wb') as stderr:
+                started = time.monotonic()
+                process = subprocess.Popen(argv, stdin=stdin, stdout=stdout, stderr=stderr, close_fds=True,
+                                           start_new_session=True, env={'PATH': os.environ.get('PATH', '')})
+            return cls._collect(process, started, 0.0, stdout_path, stderr_path, result_path, wall_seconds)
+
+    @classmethod
+    def _start_python_worker(cls) -> Worker:
+        """Start a sandboxed interpreter for the pool; its CPU and memory limits are set once it has a job"""
+        # Held for the worker's lifetime, and given back by Worker.cleanup()
+        lease = cls.uid_pool().acquire(cls.UID_WAIT)
+        try:
+            program = cls._new_program('python', None, True)
+        except BaseException:
+            lease.release()
+            raise
+        ready_read, ready_write = os.pipe()
+        try:
+            argv = cls._sandbox_command(
+                program.workdir, os.path.join(program.iodir, 'result'),
+                [sys.executable, '-I', '-c', PythonWorkerPool.worker_source(), str(ready_write)],
+                lease.uid, None, None, Config.LOCAL_EXECUTOR_MAX_OUTPUT)
+            with open(os.path.join(program.iodir, 'stdout'), 'wb') as stdout, \
+                    open(os.path.join(program.iodir, 'stderr'), 'wb') as stderr:
+                process = subprocess.Popen(argv, stdin=subprocess.PIPE, stdout=stdout, stderr=stderr,
+                                           pass_fds=(ready_write,), close_fds=True, start_new_session=True,
+                                           env={'PATH': os.environ.get('PATH', '')})
+        except BaseException:
+            os.close(ready_read)
+            program.cleanup()
+            lease.release()
+            raise
+        finally:
+            os.close(ready_write)
+        return Worker(process, os.fdopen(ready_read, 'rb'), program.basedir, lease)
+
+    def _run_in_worker(self, worker: Worker, program: Program, stdin_path: str, cpu_seconds: int,
+                       memory_bytes: Optional[int], wall_seconds: float) -> Dict:
+        """Like _spawn(), but hand the program to a warm Python worker"""
+        filename = self.LANGUAGES[program.language][0]
+        worker_src = os.path.join(worker.basedir, 'src')
+        worker_io = os.path.join(worker.basedir, 'io')
+        shutil.copyfile(os.path.join(program.workdir, filename), os.path.join(worker_src, filename))
+        os.chmod(os.path.join(worker_src, filename), 0o644)
+        job = {'file': filename, 'cpu_seconds': cpu_seconds, 'memory_bytes': memory_bytes}
+
+        def feed():
+            # The input follows the job on the worker's stdin
+            try:
+                with open(stdin_path, 'rb') as f:
+                    shutil.copyfileobj(f, worker.process.stdin)
+            except (OSError, ValueError):
+                # The program exited without reading all of it
+                pass
+            finally:
+                try:
+                    worker.process.stdin.close()
+                except OSError:
+                    pass
+
+        started = time.monotonic()
+        try:
+            worker.process.stdin.write(json.dumps(job).encode('utf-8') + b'\n')
+            worker.process.stdin.flush()
+        except OSError:
+            # It died since it was taken; _collect() reports how
+            pass
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        try:
+            return self._collect(worker.process, started, worker.cpu_used, os.path.join(worker_io, 'stdout'),
+                                 os.path.join(worker_io, 'stderr'), os.path.join(worker_io, 'result'),
+                                 wall_seconds)
+        finally:
+            feeder.join()
+            worker.cleanup()
+
+    @staticmethod
+    def _collect(process: subprocess.Popen, started: float, cpu_offset: float, stdout_path: str,
+                 stderr_path: str, result_path: str, wall_seconds: float) -> Dict:
+        """Wait for a sandboxed process and gather its output and resource usage"""
+        timed_out = threading.Event()
+
+        def kill():
+            # The whole sandbox dies with the wrapper (see services/sandbox.py)
+            timed_out.set()
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+        # Catches programs that sleep or block instead of using CPU
+        timer = threading.Timer(wall_seconds, kill)
+        timer.start()
+        try:
+            process.wait()
+        finally:
+            timer.cancel()
+        elapsed = time.monotonic() - started
+
+        try:
+            with open(result_path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            result = {'exitcode': None, 'cpu_time': 0.0, 'memory': None}
+        try:
+            with open(stdout_path, 'r', encoding='utf-8', errors='replace') as f:
+                output = f.read()
+            with open(stderr_path, 'r', encoding='utf-8', errors='replace') as f:
+                errors = f.read()
+        finally:
+            for path in (stdout_path, stderr_path, result_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        return {
+            'stdout': output,
+            'stderr': errors,
+            'returncode': result['exitcode'],
+            'cpu_time': result['cpu_time'] - cpu_offset,
+            'wall_time': elapsed,
+            'memory': result['memory'],
+            'timed_out': timed_out.is_set()
+        }
+
+    def prepare(self, code: str, language: str) -> Program:
+        """
+        Write a submission to a new temporary directory and compile it
+
+        Returns:
+            The program; if the code does not compile its compile_output is
+            set, and if compiling failed otherwise its build_error. The
+            caller must cleanup() it.
+
+        Raises:
+            KeyError: If the language is not supported
+            RuntimeError: If the local backend is disabled or the sandbox is unavailable
+        """
+        filename, compile_command, run_command, limit_address_space = self.LANGUAGES[language]
+        self.check_available()
+
+        program = self._new_program(language, run_command, limit_address_space)
+        with open(os.path.join(program.workdir, filename), 'w', encoding='utf-8') as f:
+            f.write(code)
+
+        if compile_command:
+            try:
+                result = self._spawn(program, compile_command, os.devnull, self.COMPILE_TIME_LIMIT, None,
+                                     self.COMPILE_FILE_SIZE, self.COMPILE_TIME_LIMIT * 2, writable=True)
+            except (OSError, subprocess.SubprocessError) as e:
+                program.build_error = f'Compiler unavailable: {e}'
+                return program
+            returncode = result['returncode']
+            if result['timed_out'] or returncode is None or returncode < 0:
+                # Timed out, killed by a signal or limit, or the sandbox failed
+                program.build_error = (f"Compiler did not finish (exit status {returncode}): "
+                                       f"{result['stderr'][-500:]}").strip()
+            elif returncode == 127 and result['stderr'].startswith('sandbox:'):
+                # The sandbox could not start the compiler (see services/sandbox.py)
+                program.build_error = result['stderr'].strip()
+            elif returncode != 0:
+                program.compile_output = (result['stdout'] + result['stderr']).strip() or 'Compilation failed'
+        return program
+
+    @contextmanager
+    def compiled(self, code: str, language: str) -> Iterator[Program]:
+        """
+        prepare() a submission, or reuse the program compiled for the same source
+
+        Yields:
+            The program (see prepare()). It is cleaned up (or left in the
+            cache) when the block exits.
+
+        Raises:
+            KeyError: If the language is not supported
+            RuntimeError: If the local backend is disabled or the sandbox is unavailable
+        """
+        cache = self.program_cache()
+        if cache is not None:
+            with cache.program(language, code, lambda: self.prepare(code, language)) as program:
+                yield program
+            return
+
+        program = self.prepare(code, language)
+        try:
+            yield program
+        finally:
+            program.cleanup()
+
+    def run(self, program: Program, stdin: str, time_limit: float, memory_limit: int,
+            stdin_path: Optional[str] = None) -> Dict:
+        """
+        Run a prepared program on one input
+
+        Args:
+            program: Result of prepare()
+            stdin: Standard input
+            time_limit: CPU seconds
+            memory_limit: KB
+            stdin_path: File to use as standard input instead of stdin
+                (e.g. a fixture, which is then streamed rather than copied)
+
+        Returns:
+            A Judge0-style submission: stdout, stderr, compile_output, status
+            ({id, description}), time (real seconds, as a string) and memory
+            (peak KB)
+        """
+        if program.build_error is not None:
+            return {'stdout': '', 'stderr': program.build_error, 'compile_output': None,
+                    'status': dict(zip(('id', 'description'), STATUS_INTERNAL_ERROR)),
+                    'time': None, 'memory': None}
+        if program.compile_output is not None:
+            return {'stdout': '', 'stderr': None, 'compile_output': program.compile_output,
+                    'status': dict(zip(('id', 'description'), STATUS_COMPILATION_ERROR)),
+                    'time': None, 'memory': None}
+
+        memory_bytes = memory_limit * 1024 if program.limit_address_space else None
+        input_file = None
+        try:
+            if stdin_path is None:
+                input_file = stdin_path = os.path.join(program.iodir, f'stdin-{uuid.uuid4().hex}')
+                with open(input_file, 'w', encoding='utf-8') as f:
+                    f.write(stdin)
+            cpu_seconds = max(1, math.ceil(time_limit))
+            pool = self.python_pool() if program.language == 'python' else None
+            worker = pool.acquire(self.POOL_WAIT) if pool is not None else None
+            if worker is not None:
+                result = self._run_in_worker(worker, program, stdin_path, cpu_seconds, memory_bytes,
+                                             time_limit * 2 + 1)
+            else:
+                result = self._spawn(program, program.command, stdin_path, cpu_seconds, memory_bytes,
+                                     Config.LOCAL_EXECUTOR_MAX_OUTPUT, time_limit * 2 + 1)
+        except (OSError, subprocess.SubprocessError) as e:
+            return {'stdout': '', 'stderr': str(e), 'compile_output': None,
+                    'status': dict(zip(('id', 'description'), STATUS_INTERNAL_ERROR)),
+                    'time': None, 'memory': None}
+        finally:
+            if input_file is not None:
+                os.remove(input_file)
+
+        returncode = result['returncode']
+        if result['timed_out'] or result['cpu_time'] > time_limit or returncode == -signal.SIGXCPU:
+            status = STATUS_TIME_LIMIT
+        elif returncode is None:
+            status = STATUS_INTERNAL_ERROR
+        elif returncode == 0:
+            status = STATUS_ACCEPTED
+        elif returncode > 0:
+            status = STATUS_NZEC
+        else:
+            status = STATUS_SIGNALS.get(-returncode, STATUS_OTHER)
+
+        return {
+            'stdout': result['stdout'],
+            'stderr': result['stderr'] or None,
+            'compile_output': None,
+            'status': dict(zip(('id', 'description'), status)),
+            'time': f"{result['wall_time']:.3f}",
+            'memory': result['memory']
+        }
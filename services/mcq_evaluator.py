@@ -1,4 +1,6 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+import numpy as np
 
 class MCQEvaluator:
     """Evaluate Multiple Choice Questions"""
@@ -68,12 +70,133 @@ class MCQEvaluator:
         }
     
     @staticmethod
-    def get_performance_analysis(evaluation_result: Dict) -> Dict:
+    def evaluate_bulk(questions: List[Dict], answer_sheets: Dict[str, Dict[str, str]]) -> Dict:
+        """
+        Grade many answer sheets against the same questions in one vectorized pass
+
+        Answers and the answer key are encoded as integer arrays (one row per
+        candidate, one column per question), so scores, per-question p-values
+        and per-category subscores are computed with array operations instead
+        of per-answer string comparisons.
+        
+        Args:
+            questions: Question dicts with IDs, in the order results are listed
+            answer_sheets: Dict mapping candidate ID to {question_id: answer}
+        
+        Returns:
+            'results': candidate ID -> evaluation shaped like evaluate_mcq_set,
+            'question_stats': question ID -> attempts, correct and p_value
+                (share of attempts answered correctly),
+            'category_scores': candidate ID -> category -> correct/total/percentage
+        """
+        candidates = list(answer_sheets)
+        question_ids = [question.get('id') for question in questions]
+        categories = sorted({question.get('category', '') for question in questions})
+        
+        # Normalized answer strings -> integer codes; -1 marks "not answered"
+        codes: Dict[str, int] = {}
+        
+        def encode(answer) -> int:
+            normalized = str(answer).strip().upper() if answer is not None else ''
+            return codes.setdefault(normalized, len(codes))
+        
+        key = np.array([encode(question.get('correct_answer', '')) for question in questions], dtype=np.int32)
+        column_of = {question_id: column for column, question_id in enumerate(question_ids)}
+        answers = np.full((len(candidates), len(questions)), -1, dtype=np.int32)
+        for row, candidate in enumerate(candidates):
+            for question_id, answer in answer_sheets[candidate].items():
+                column = column_of.get(question_id)
+                if column is not None:
+                    answers[row, column] = encode(answer)
+        
+        attempted = answers >= 0
+        correct = attempted & (answers == key)
+        
+        attempts_per_candidate = attempted.sum(axis=1)
+        correct_per_candidate = correct.sum(axis=1)
+        # Same operation order as evaluate_mcq_set, so percentages round identically
+        percentages = np.divide(correct_per_candidate, attempts_per_candidate,
+                                out=np.zeros(len(candidates)), where=attempts_per_candidate > 0) * 100
+        
+        attempts_per_question = attempted.sum(axis=0)
+        correct_per_question = correct.sum(axis=0)
+        
+        # One-hot question -> category matrix turns subscores into two matrix products
+        category_of = {category: index for index, category in enumerate(categories)}
+        membership = np.zeros((len(questions), len(categories)), dtype=np.int32)
+        for column, question in enumerate(questions):
+            membership[column, category_of[question.get('category', '')]] = 1
+        correct_by_category = correct.astype(np.int32) @ membership
+        attempts_by_category = attempted.astype(np.int32) @ membership
+        
+        labels = list(codes)
+        explanations = [question.get('explanation', 'No explanation available') for question in questions]
+        texts = [question.get('question', '') for question in questions]
+        results = {}
+        category_scores = {}
+        for row, candidate in enumerate(candidates):
+            columns = np.flatnonzero(attempted[row])
+            question_results = [
+                {
+                    'is_correct': is_correct,
+                    'user_answer': labels[answer],
+                    'correct_answer': labels[key[column]],
+                    'score': 1 if is_correct else 0,
+                    'explanation': explanations[column],
+                    'question_id': question_ids[column],
+                    'question_text': texts[column]
+                }
+                for column, answer, is_correct in zip(columns.tolist(), answers[row, columns].tolist(),
+                                                      correct[row, columns].tolist())
+            ]
+            
+            total = int(attempts_per_candidate[row])
+            correct_count = int(correct_per_candidate[row])
+            results[candidate] = {
+                'total_questions': total,
+                'correct_answers': correct_count,
+                'incorrect_answers': total - correct_count,
+                'score_percentage': round(float(percentages[row]), 2),
+                'results': question_results
+            }
+            category_scores[candidate] = {
+                category: {
+                    'correct': int(correct_by_category[row, index]),
+                    'total': int(attempts_by_category[row, index]),
+                    'percentage': round(int(correct_by_category[row, index]) * 100 / int(attempts_by_category[row, index]), 2)
+                }
+                for category, index in category_of.items()
+                if attempts_by_category[row, index] > 0
+            }
+        
+        question_stats = {
+            question_id: {
+                'attempts': int(attempts_per_question[column]),
+                'correct': int(correct_per_question[column]),
+                'p_value': round(int(correct_per_question[column]) / int(attempts_per_question[column]), 4)
+                           if attempts_per_question[column] > 0 else None
+            }
+            for column, question_id in enumerate(question_ids)
+        }
+        
+        return {
+            'results': results,
+            'question_stats': question_stats,
+            'category_scores': category_scores
+        }
+    
+    @staticmethod
+    def get_performance_analysis(evaluation_result: Dict, question_categories: Optional[Dict[str, str]] = None,
+                                 cohort_stats: Optional[Dict] = None) -> Dict:
         """
         Analyze performance on MCQ set
         
         Args:
             evaluation_result: Result from evaluate_mcq_set
+            question_categories: Optional question ID -> category, to group
+                mistakes into weak topics
+            cohort_stats: Optional QuestionStats.lookup() result for these
+                questions and categories, to compare against all candidates
         
         Returns:
             Performance analysis
@@ -93,16 +216,47 @@ class MCQEvaluator:
             performance_level = 'Needs Improvement'
             feedback = 'Keep practicing! Review the concepts and try again.'
         
-        # Identify weak topics
-        weak_topics = []
+        # Identify weak questions and tally answers per category
+        weak_questions = []
+        by_category: Dict[str, List[int]] = {}
         for result in evaluation_result['results']:
             if not result['is_correct']:
-                # You can add topic categorization here
-                weak_topics.append(result['question_id'])
+                weak_questions.append(result['question_id'])
+            if question_categories is not None:
+                tally = by_category.setdefault(question_categories.get(result['question_id'], ''), [0, 0])
+                tally[0] += 1
+                tally[1] += 1 if result['is_correct'] else 0
         
-        return {
+        analysis = {
             'performance_level': performance_level,
             'feedback': feedback,
-            'weak_questions': weak_topics,
+            'weak_questions': weak_questions,
             'score': score
         }
+        
+        if question_categories is not None:
+            cohort_categories = (cohort_stats or {}).get('categories', {})
+            weak_topics = []
+            for category, (total, correct) in by_category.items():
+                accuracy = round(correct / total * 100, 2)
+                if accuracy >= 60:
+                    continue
+                cohort_accuracy = cohort_categories.get(category, {}).get('rolling_accuracy')
+                weak_topics.append({
+                    'category': category,
+                    'correct': correct,
+                    'total': total,
+                    'accuracy': accuracy,
+                    'cohort_accuracy': round(cohort_accuracy * 100, 2) if cohort_accuracy is not None else None
+                })
+            analysis['weak_topics'] = sorted(weak_topics, key=lambda topic: topic['accuracy'])
+        
+        if cohort_stats is not None:
+            # Share of all candidates answering each missed question correctly
+            cohort_questions = cohort_stats.get('questions', {})
+            analysis['weak_question_p_values'] = {
+                question_id: cohort_questions.get(question_id, {}).get('p_value')
+                for question_id in weak_questions
+            }
+        
+        return analysis
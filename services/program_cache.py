@@ -0,0 +1,118 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List
+
+class _Entry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.program = None
+        # Runs currently using the program; it is not evicted while any are
+        self.users = 0
+
+class ProgramCache:
+    """Compiled submissions shared by every run of the same source
+
+    Programs are keyed by a hash of language and source code, so a
+    submission run again (Run pressed repeatedly, then Submit) is compiled
+    only once. Concurrent requests for the same source wait for a single
+    build. Compile errors are cached too, as they fail the same way every
+    time; builds that failed for other reasons (a program whose
+    ``cacheable`` is false) are used by the run that built them and then
+    deleted, so the next run compiles again. The least recently used
+    programs are deleted once more than max_entries are kept, but never
+    while a run is using them.
+    """
+
+    # Compiled programs kept
+    MAX_ENTRIES = 64
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, _Entry]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(language: str, code: str) -> str:
+        return hashlib.sha256(f'{language}\x00{code}'.encode('utf-8')).hexdigest()
+
+    @contextmanager
+    def program(self, language: str, code: str, build: Callable[[], object]) -> Iterator:
+        """
+        Use the compiled program for a source, building it if needed
+
+        Args:
+            language: Programming language
+            code: Source code
+            build: Compiles the source; returns a program with cleanup() and cacheable
+
+        Yields:
+            The program, kept until the block exits
+        """
+        key = self.key(language, code)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+            else:
+                self._entries.move_to_end(key)
+            entry.users += 1
+
+        uncached = None
+        try:
+            with entry.lock:
+                if entry.program is None:
+                    program = build()
+                    if program.cacheable:
+                        entry.program = program
+                    else:
+                        uncached = program
+                    hit = False
+                else:
+                    program = entry.program
+                    hit = True
+            with self._lock:
+                if hit:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            yield program
+        finally:
+            if uncached is not None:
+                uncached.cleanup()
+            with self._lock:
+                entry.users -= 1
+                evicted = self._evict()
+            for program in evicted:
+                program.cleanup()
+
+    def _evict(self) -> List:
+        """Drop unused entries beyond max_entries, oldest first (call with the lock held)"""
+        evicted = []
+        excess = len(self._entries) - self.max_entries
+        for key, entry in list(self._entries.items()):
+            if excess <= 0:
+                break
+            if entry.users == 0:
+                del self._entries[key]
+                excess -= 1
+                if entry.program is not None:
+                    evicted.append(entry.program)
+        return evicted
+
+    def clear(self) -> None:
+        """Delete every program not in use"""
+        with self._lock:
+            unused = [key for key, entry in self._entries.items() if entry.users == 0]
+            programs = [self._entries.pop(key).program for key in unused]
+        for program in programs:
+            if program is not None:
+                program.cleanup()
+
+    def stats(self) -> Dict:
+        """Report cache size and hit/miss counters"""
+        with self._lock:
+            return {'programs': len(self._entries), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,206 @@
+import os
+import select
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import BinaryIO, Callable, Deque, Dict, Optional
+
+from services.uid_pool import UidLease
+
+class Worker:
+    """A started interpreter waiting for its one job"""
+
+    def __init__(self, process: subprocess.Popen, ready: BinaryIO, basedir: str,
+                 lease: Optional[UidLease] = None):
+        self.process = process
+        # The worker reports here once it is ready for a job
+        self.ready = ready
+        # Its directory (see LocalExecutor._start_python_worker)
+        self.basedir = basedir
+        # The uid it runs as, given back once it has exited
+        self.lease = lease
+        # CPU seconds spent starting up, not charged to the submission
+        self.cpu_used = 0.0
+        self.taken = threading.Event()
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def cleanup(self) -> None:
+        """Release the worker's pipes, directory and uid once its process has exited"""
+        for pipe in (self.ready, self.process.stdin):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+        shutil.rmtree(self.basedir, ignore_errors=True)
+        if self.lease is not None:
+            self.lease.release()
+
+    def kill(self) -> None:
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        self.process.wait()
+        self.cleanup()
+
+    def retire(self) -> None:
+        """Stop a worker that will not get a job (it exits when its stdin closes)"""
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+        self.cleanup()
+
+class PythonWorkerPool:
+    """Pre-started Python interpreters for the local executor
+
+    Starting ``python`` and importing the usual modules takes tens of
+    milliseconds, which every test case of every run would otherwise pay.
+    The pool keeps ``size`` workers (services/python_worker.py) started and
+    waiting; a run takes one, sends it the submission and collects it like
+    any other process. Workers run a single submission and exit, so nothing
+    carries over between submissions: each slot starts a replacement as
+    soon as its worker is taken. A worker left idle for ``max_idle``
+    seconds is replaced too, so long-lived workers do not go stale.
+    """
+
+    WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'python_worker.py')
+    _worker_source: Optional[str] = None
+    # Seconds to wait for a new worker to report ready
+    READY_TIMEOUT = 10
+    # Seconds to wait before starting again after a worker failed to start
+    RETRY_DELAY = 1
+
+    def __init__(self, spawn: Callable[[], Worker], size: int, max_idle: float = 0):
+        """
+        Args:
+            spawn: Starts a sandboxed worker process with piped stdin
+            size: Workers kept ready
+            max_idle: Seconds before an unused worker is replaced (0 keeps it forever)
+        """
+        self._spawn = spawn
+        self.size = size
+        self.max_idle = max_idle
+        self._cond = threading.Condition()
+        self._idle: Deque[Worker] = deque()
+        self._closed = False
+        self.waiting = 0
+        self.spawned = 0
+        self.served = 0
+        self.recycled = 0
+        self.failed = 0
+        self._slots = [threading.Thread(target=self._keep_slot, name=f'python-pool-{n}', daemon=True)
+                       for n in range(size)]
+        for slot in self._slots:
+            slot.start()
+
+    @classmethod
+    def worker_source(cls) -> str:
+        """Source of services/python_worker.py, run with -c since the sandbox cannot see this tree"""
+        if cls._worker_source is None:
+            with open(cls.WORKER_SCRIPT, 'r', encoding='utf-8') as f:
+                cls._worker_source = f.read()
+        return cls._worker_source
+
+    def _start_worker(self) -> Optional[Worker]:
+        worker = self._spawn()
+        try:
+            ready, _, _ = select.select([worker.ready], [], [], self.READY_TIMEOUT)
+            line = worker.ready.readline() if ready else b''
+            if not line.startswith(b'ready '):
+                worker.kill()
+                return None
+            worker.cpu_used = float(line.split()[1])
+        except BaseException:
+            worker.kill()
+            raise
+        return worker
+
+    def _keep_slot(self) -> None:
+        """Keep one worker ready, starting a new one whenever it is taken or recycled"""
+        while not self._closed:
+            try:
+                worker = self._start_worker()
+            except Exception as e:
+                # Whatever went wrong, keep the slot: it retries after RETRY_DELAY
+                print(f"Python pool: could not start worker: {e!r}")
+                worker = None
+            if worker is None:
+                with self._cond:
+                    self.failed += 1
+                time.sleep(self.RETRY_DELAY)
+                continue
+
+            with self._cond:
+                self.spawned += 1
+                if self._closed:
+                    worker.retire()
+                    return
+                self._idle.append(worker)
+                self._cond.notify()
+
+            if worker.taken.wait(self.max_idle or None):
+                continue
+            with self._cond:
+                if worker.taken.is_set():
+                    continue
+                self._idle.remove(worker)
+                self.recycled += 1
+            worker.retire()
+
+    def acquire(self, timeout: float) -> Optional[Worker]:
+        """
+        Take a ready worker, waiting up to timeout seconds for one
+
+        Returns:
+            The worker, or None if none became ready in time. The caller
+            owns the worker's process and must wait for it.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self.waiting += 1
+            try:
+                while True:
+                    while self._idle:
+                        worker = self._idle.popleft()
+                        worker.taken.set()
+                        if worker.alive():
+                            self.served += 1
+                            return worker
+                        worker.cleanup()
+                    remaining = deadline - time.monotonic()
+                    if self._closed or remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+            finally:
+                self.waiting -= 1
+
+    def close(self) -> None:
+        """Stop the idle workers and stop starting new ones"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            for worker in idle:
+                worker.taken.set()
+            self._cond.notify_all()
+        for worker in idle:
+            worker.retire()
+
+    def stats(self) -> Dict:
+        """Report pool size, ready workers, queue depth and lifetime counters"""
+        with self._cond:
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'queue_depth': self.waiting,
+                'spawned': self.spawned,
+                'served': self.served,
+                'recycled': self.recycled,
+                'failed': self.failed
+            }
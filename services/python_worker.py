@@ -0,0 +1,74 @@
+"""
+Pre-started interpreter for one Python submission (see PythonWorkerPool)
+
+Started as ``python -I -c <this file> <ready fd>`` inside the local
+executor's sandbox, with the submission directory as its working
+directory and stdout/stderr already going to the run's output files. It
+imports the modules submissions commonly use, reports
+``ready <cpu seconds used so far>`` on the ready fd and waits for a job:
+one JSON line on stdin with the file to run and its limits, followed by
+the run's input. It then applies the limits and runs the submission as
+``__main__`` with the rest of stdin as its input. The process exits with
+the submission, so every worker runs exactly one.
+
+Only the standard library may be imported here: the worker runs isolated
+from the application and its environment.
+"""
+import json
+import os
+import resource
+import runpy
+import sys
+import traceback
+
+# Warm-up: modules submissions commonly import, so they are loaded before the clock starts
+import bisect, collections, functools, heapq, itertools, math, re, string  # noqa: E401,F401
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+def _read_job() -> bytes:
+    """The job line, read byte by byte so none of the input after it is consumed"""
+    line = b''
+    while not line.endswith(b'\n'):
+        byte = os.read(0, 1)
+        if not byte:
+            break
+        line += byte
+    return line
+
+def main() -> None:
+    with os.fdopen(int(sys.argv[1]), 'w') as ready:
+        ready.write(f'ready {_cpu_seconds():.6f}\n')
+
+    line = _read_job()
+    if not line.strip():
+        # The pool closed us without a job
+        return
+    job = json.loads(line)
+
+    # CPU time is counted from here: the limit allows what warm-up already used
+    cpu_limit = int(_cpu_seconds()) + job['cpu_seconds']
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, cpu_limit + 1))
+    if job['memory_bytes']:
+        resource.setrlimit(resource.RLIMIT_AS, (job['memory_bytes'], job['memory_bytes']))
+
+    path = job['file']
+    sys.argv = [job['file']]
+    try:
+        runpy.run_path(path, run_name='__main__')
+    except SystemExit:
+        raise
+    except BaseException as e:
+        # Show the traceback from the submission's frames on, as a plain run would
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != path:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb or e.__traceback__)
+        sys.exit(1)
+    finally:
+        sys.stdout.flush()
+
+if __name__ == '__main__':
+    main()
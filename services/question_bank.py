@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from services.compiled_bank import CompiledQuestionIndex, compiled_path
+
+class QuestionBank:
+    """Question file parsed once and indexed in memory
+
+    Questions are indexed by id, difficulty, category and (difficulty,
+    category), so lookups and filters never scan the whole bank. The file's
+    (inode, mtime, size) is checked on access; when it changes, a new
+    QuestionIndex is built on the side and swapped in with a single
+    assignment, so concurrent requests see either the old bank or the new
+    one, never a mix.
+
+    If a public view function is set, every question's public representation
+    (e.g. without answers or hidden test cases) is serialized once per load
+    instead of once per request.
+
+    If a compiled bank (``python -m services.compiled_bank``) at least as new
+    as the JSON file sits next to it, it is memory-mapped instead: see
+    CompiledQuestionIndex. A stale compiled bank is ignored.
+
+    Returned questions are shared between requests and must be treated as
+    read-only; copy them before modifying.
+    """
+
+    _instances: Dict[str, 'QuestionBank'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+        self.compiled_path = compiled_path(path)
+        self._reload_lock = threading.Lock()
+        self._index: Optional['QuestionIndex'] = None
+        self._public_view: Optional[Callable[[Dict], Dict]] = None
+        # Signature of the last version tried, so a broken file is parsed once
+        self._seen_signature: Optional[Tuple] = None
+        self.reloads = 0
+
+    @classmethod
+    def for_path(cls, path: str, public_view: Optional[Callable[[Dict], Dict]] = None) -> 'QuestionBank':
+        """Get the shared bank for a question file, optionally setting its public view"""
+        with cls._instances_lock:
+            bank = cls._instances.get(path)
+            if bank is None:
+                bank = cls._instances[path] = cls(path)
+
+        if public_view is not None:
+            bank.set_public_view(public_view)
+        return bank
+
+    def set_public_view(self, public_view: Callable[[Dict], Dict]) -> None:
+        """Set the function producing a question's client-facing representation"""
+        with self._reload_lock:
+            if public_view is not self._public_view:
+                self._public_view = public_view
+                # Rebuild with the new view on next access
+                self._index = None
+
+    @staticmethod
+    def _file_signature(path: str) -> Optional[Tuple]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _signature(self) -> Tuple:
+        return (self._file_signature(self.path), self._file_signature(self.compiled_path))
+
+    def load(self) -> 'QuestionBank':
+        """Load the file now if it is new or changed; returns the bank"""
+        self.current()
+        return self
+
+    def current(self) -> 'QuestionIndex':
+        """Get the index of the latest version of the file
+
+        Use it when several lookups must see the same version of the bank.
+        """
+        signature = self._signature()
+        index = self._index
+        if index is not None and signature == self._seen_signature:
+            return index
+
+        with self._reload_lock:
+            # Another thread may have reloaded while we waited
+            if self._index is None or signature != self._seen_signature:
+                self._reload(signature)
+            return self._index
+
+    def _reload(self, signature: Tuple) -> None:
+        self._seen_signature = signature
+        source, compiled = signature
+        if compiled is not None:
+            if source is None or compiled[1] >= source[1]:
+                try:
+                    self._index = CompiledQuestionIndex(self.compiled_path, self._public_view)
+                    self.reloads += 1
+                    return
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Error loading compiled question bank {self.compiled_path}: {e}")
+            else:
+                print(f"Ignoring stale compiled question bank {self.compiled_path}; rebuild it")
+
+        if source is None:
+            self._index = QuestionIndex([], '', self._public_view)
+            return
+
+        try:
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+            questions = json.loads(raw)
+        except (OSError, ValueError) as e:
+            print(f"Error loading question bank {self.path}: {e}")
+            if self._index is None:
+                self._index = QuestionIndex([], '', self._public_view)
+            return
+
+        self._index = QuestionIndex(questions, hashlib.sha1(raw).hexdigest(), self._public_view)
+        self.reloads += 1
+
+    def all(self) -> List[Dict]:
+        """All questions in file order"""
+        return list(self.current().questions)
+
+    def get(self, question_id: str) -> Optional[Dict]:
+        """Get a question by id"""
+        return self.current().get(question_id)
+
+    def get_many(self, question_ids: Iterable[str]) -> List[Dict]:
+        """Get the questions with the given ids, in file order; unknown ids are skipped"""
+        return self.current().get_many(question_ids)
+
+    def filter(self, difficulty: str = 'all', category: str = 'all') -> List[Dict]:
+        """Get questions matching a difficulty and category ('all' matches any)"""
+        return self.current().filter(difficulty, category)
+
+    def stats(self) -> Dict:
+        """Report the loaded bank's size and reload count"""
+        index = self.current()
+        return {
+            'path': self.path,
+            'questions': len(index.questions),
+            'format': index.format,
+            'version': index.version,
+            'loaded_at': index.loaded_at,
+            'reloads': self.reloads
+        }
+
+class QuestionIndex:
+    """Immutable lookup tables over one version of a question file"""
+
+    format = 'json'
+
+    def __init__(self, questions: List[Dict], version: str,
+                 public_view: Optional[Callable[[Dict], Dict]] = None):
+        self.questions: Tuple[Dict, ...] = tuple(questions)
+        # Hash of the file contents; identical across workers and restarts
+        self.version = version
+        self.loaded_at = datetime.now().isoformat()
+        self.by_id: Dict[str, Dict] = {}
+        self.positions: Dict[str, int] = {}
+        # Serialized public view of each question, by id() of the question dict
+        self._public: Dict[int, bytes] = {}
+        by_difficulty: Dict[str, List[Dict]] = {}
+        by_category: Dict[str, List[Dict]] = {}
+        by_difficulty_category: Dict[Tuple[str, str], List[Dict]] = {}
+
+        for position, question in enumerate(self.questions):
+            question_id = question.get('id')
+            if question_id is not None:
+                self.by_id[question_id] = question
+                self.positions[question_id] = position
+
+            difficulty = question.get('difficulty')
+            category = question.get('category')
+            by_difficulty.setdefault(difficulty, []).append(question)
+            by_category.setdefault(category, []).append(question)
+            by_difficulty_category.setdefault((difficulty, category), []).append(question)
+
+        self.by_difficulty = {key: tuple(value) for key, value in by_difficulty.items()}
+        self.by_category = {key: tuple(value) for key, value in by_category.items()}
+        self.by_difficulty_category = {key: tuple(value) for key, value in by_difficulty_category.items()}
+
+        if public_view is not None:
+            self._public = {
+                id(question): json.dumps(public_view(question), separators=(',', ':'),
+                                         ensure_ascii=False).encode('utf-8')
+                for question in self.questions
+            }
+
+    def get(self, question_id: str) -> Optional[Dict]:
+        """Get a question by id"""
+        return self.by_id.get(question_id)
+
+    def get_many(self, question_ids: Iterable[str]) -> List[Dict]:
+        """Get the questions with the given ids, in file order; unknown ids are skipped"""
+        found = {question_id for question_id in question_ids if question_id in self.by_id}
+        return sorted((self.by_id[question_id] for question_id in found),
+                      key=lambda question: self.positions[question['id']])
+
+    def filter(self, difficulty: str = 'all', category: str = 'all') -> List[Dict]:
+        """
+        Get questions matching a difficulty and category
+
+        Args:
+            difficulty: Difficulty level, or 'all'
+            category: Category name, or 'all'
+
+        Returns:
+            Matching questions in file order (a new list the caller may reorder)
+        """
+        if difficulty == 'all' and category == 'all':
+            return list(self.questions)
+        if difficulty == 'all':
+            return list(self.by_category.get(category, ()))
+        if category == 'all':
+            return list(self.by_difficulty.get(difficulty, ()))
+        return list(self.by_difficulty_category.get((difficulty, category), ()))
+
+    def public_json(self, questions: Iterable[Dict]) -> bytes:
+        """Serialized JSON array of the public views of questions from this index"""
+        return b'[' + b','.join(self._public[id(question)] for question in questions) + b']'
@@ -0,0 +1,146 @@
+import base64
+import json
+import random
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Mapping, Optional, Tuple
+
+class QuestionSets:
+    """Deterministic question sets with a bounded LRU cache
+
+    A set is fully described by its filters, size and seed: the same inputs
+    select and order the same questions from a given bank version in every
+    worker, so a set can be handed out as an opaque set_id (the encoded
+    inputs and bank version) and regenerated or graded anywhere. A set_id
+    issued for an older version of the bank no longer names the same
+    questions and is refused (see same_version). Recently used sets are
+    cached by (bank version, filters, count, seed).
+    """
+
+    # Generated sets kept in memory
+    MAX_CACHED_SETS = 256
+    # Characters of the bank version kept in a set_id
+    VERSION_CHARS = 12
+
+    def __init__(self, max_cached: int = MAX_CACHED_SETS):
+        self.max_cached = max_cached
+        self._lock = threading.Lock()
+        self._sets: 'OrderedDict[Tuple, Tuple[Dict, ...]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def select(index, difficulty: str, category: str, count: Optional[int], seed: int) -> List[Dict]:
+        """
+        Pick and order questions deterministically
+
+        Args:
+            index: QuestionIndex (or compiled index) to draw from
+            difficulty: Difficulty level, or 'all'
+            category: Category name, or 'all'
+            count: Number of questions, or None for all matching questions
+            seed: Seed for the selection and order
+
+        Returns:
+            The selected questions
+        """
+        filtered = index.filter(difficulty, category)
+        rng = random.Random(seed)
+        if count is None:
+            return rng.sample(filtered, len(filtered))
+        if len(filtered) < count:
+            return list(filtered)
+        return rng.sample(filtered, count)
+
+    def get(self, index, difficulty: str, category: str, count: Optional[int], seed: int) -> Tuple[Dict, ...]:
+        """Like select(), but served from the cache when the set was generated recently"""
+        key = (index.version, difficulty, category, count, seed)
+        with self._lock:
+            questions = self._sets.get(key)
+            if questions is not None:
+                self._sets.move_to_end(key)
+                self.hits += 1
+                return questions
+            self.misses += 1
+
+        questions = tuple(self.select(index, difficulty, category, count, seed))
+        with self._lock:
+            self._sets[key] = questions
+            while len(self._sets) > self.max_cached:
+                self._sets.popitem(last=False)
+        return questions
+
+    @classmethod
+    def encode_set_id(cls, index, difficulty: str, category: str, count: Optional[int], seed: int) -> str:
+        """Opaque, URL-safe id from which the set can be regenerated from the same bank version"""
+        raw = json.dumps([index.version[:cls.VERSION_CHARS], difficulty, category, count, seed],
+                         separators=(',', ':'), ensure_ascii=False)
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode_set_id(set_id: str) -> Tuple[str, str, str, Optional[int], int]:
+        """
+        Get (bank version, difficulty, category, count, seed) back from a set_id
+
+        Raises:
+            ValueError: If set_id was not produced by encode_set_id
+        """
+        try:
+            raw = base64.urlsafe_b64decode(set_id + '=' * (-len(set_id) % 4))
+            version, difficulty, category, count, seed = json.loads(raw)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise ValueError('Invalid set_id')
+
+        if (not isinstance(version, str) or not isinstance(difficulty, str) or not isinstance(category, str)
+                or not (count is None or (isinstance(count, int) and count > 0))
+                or not isinstance(seed, int) or seed < 0):
+            raise ValueError('Invalid set_id')
+        return version, difficulty, category, count, seed
+
+    @classmethod
+    def same_version(cls, version: Optional[str], index) -> bool:
+        """Whether a set_id's bank version (None if there was no set_id) matches the index"""
+        return version is None or version == index.version[:cls.VERSION_CHARS]
+
+    @staticmethod
+    def parse_params(args: Mapping[str, str],
+                     default_count: Optional[int] = None
+                     ) -> Tuple[Optional[str], str, str, Optional[int], Optional[int]]:
+        """
+        Read a set's parameters from query arguments
+
+        Either set_id alone, or difficulty/category (and count, if the listing
+        is limited) with an optional seed for a reproducible set.
+
+        Args:
+            args: Query arguments
+            default_count: Set size when count is not given; None for
+                listings that return every matching question
+
+        Returns:
+            (bank version, difficulty, category, count, seed); the version is
+            None unless a set_id was given, the seed unless one was requested
+
+        Raises:
+            ValueError: If set_id, count or seed is malformed
+        """
+        set_id = args.get('set_id')
+        if set_id:
+            return QuestionSets.decode_set_id(set_id)
+
+        seed = args.get('seed')
+        if seed is not None and not seed.isdigit():
+            raise ValueError('seed must be a non-negative integer')
+        count = default_count
+        if default_count is not None:
+            count = args.get('count', str(default_count))
+            if not count.isdigit() or int(count) == 0:
+                raise ValueError('count must be a positive integer')
+            count = int(count)
+        return (None, args.get('difficulty', 'Medium'), args.get('category', 'all'), count,
+                int(seed) if seed is not None else None)
+
+    def stats(self) -> Dict:
+        """Report cache size and hit/miss counters"""
+        with self._lock:
+            return {'sets': len(self._sets), 'hits': self.hits, 'misses': self.misses}
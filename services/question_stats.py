@@ -0,0 +1,233 @@
+import atexit
+import copy
+import os
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, Iterable, List
+
+from utils.storage import JSONStorage
+
+class QuestionStats:
+    """Incrementally updated answer statistics per question and category
+
+    Each evaluation adds its answers to in-memory counters (O(answers)):
+    attempts, correct answers and per-option pick counts per question
+    (answers that are not one of the question's option letters share one
+    OTHER bucket, so clients cannot add keys), and
+    attempts/correct per category, also bucketed by day for a rolling
+    accuracy. Counters are additive, so every worker process keeps its own
+    pending deltas and periodically merges them into the shared stats file
+    under its lock; nothing ever rescans historical results.
+
+    Stats file layout::
+
+        {
+            "questions": {qid: {"category": c, "attempts": n, "correct": n, "options": {"A": n, ...}}},
+            "categories": {c: {"attempts": n, "correct": n, "days": {"2026-10-17": [attempts, correct]}}}
+        }
+    """
+
+    # Days of history behind the rolling category accuracy
+    ROLLING_DAYS = 30
+    # Pick count key for answers that are not an option of the question
+    OTHER = 'other'
+    # Pending answers / seconds after which a worker merges its deltas into the file
+    FLUSH_EVERY = 100
+    FLUSH_INTERVAL = 5.0
+
+    _instances: Dict[str, 'QuestionStats'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending = self._empty()
+        self._pending_answers = 0
+        self._last_flush = time.monotonic()
+        # Persisted document cached by file signature
+        self._persisted: Dict = self._empty()
+        self._persisted_signature = None
+        atexit.register(self.flush)
+
+    @classmethod
+    def for_path(cls, path: str) -> 'QuestionStats':
+        """Get the shared stats store for a file path"""
+        with cls._instances_lock:
+            stats = cls._instances.get(path)
+            if stats is None:
+                stats = cls._instances[path] = cls(path)
+            return stats
+
+    @staticmethod
+    def _empty() -> Dict:
+        return {'questions': {}, 'categories': {}}
+
+    def record(self, questions: List[Dict], evaluation_result: Dict) -> None:
+        """
+        Add the answers of one evaluation to the statistics
+
+        Args:
+            questions: The evaluated question dicts (for their categories)
+            evaluation_result: Result from MCQEvaluator.evaluate_mcq_set
+        """
+        categories = {question.get('id'): question.get('category', '') for question in questions}
+        # Options are listed as "A) ...", "B) ..." in order
+        letters = {question.get('id'): {chr(ord('A') + i) for i in range(len(question.get('options') or []))}
+                   for question in questions}
+        today = date.today().isoformat()
+
+        with self._lock:
+            for result in evaluation_result['results']:
+                question_id = result['question_id']
+                category = categories.get(question_id, '')
+                correct = 1 if result['is_correct'] else 0
+
+                question = self._pending['questions'].setdefault(
+                    question_id, {'category': category, 'attempts': 0, 'correct': 0, 'options': {}})
+                question['attempts'] += 1
+                question['correct'] += correct
+                option = result['user_answer']
+                if option not in letters.get(question_id, ()):
+                    option = self.OTHER
+                question['options'][option] = question['options'].get(option, 0) + 1
+
+                category_stats = self._pending['categories'].setdefault(
+                    category, {'attempts': 0, 'correct': 0, 'days': {}})
+                category_stats['attempts'] += 1
+                category_stats['correct'] += correct
+                day = category_stats['days'].setdefault(today, [0, 0])
+                day[0] += 1
+                day[1] += correct
+
+            self._pending_answers += len(evaluation_result['results'])
+            due = (self._pending_answers >= self.FLUSH_EVERY
+                   or time.monotonic() - self._last_flush >= self.FLUSH_INTERVAL)
+
+        if due:
+            self.flush()
+
+    @staticmethod
+    def _merge(target: Dict, delta: Dict, oldest_day: str) -> None:
+        """Add delta counters into target, dropping day buckets older than oldest_day"""
+        for question_id, stats in delta['questions'].items():
+            question = target['questions'].setdefault(
+                question_id, {'category': stats['category'], 'attempts': 0, 'correct': 0, 'options': {}})
+            question['category'] = stats['category']
+            question['attempts'] += stats['attempts']
+            question['correct'] += stats['correct']
+            for option, count in stats['options'].items():
+                question['options'][option] = question['options'].get(option, 0) + count
+
+        for category, stats in delta['categories'].items():
+            category_stats = target['categories'].setdefault(category, {'attempts': 0, 'correct': 0, 'days': {}})
+            category_stats['attempts'] += stats['attempts']
+            category_stats['correct'] += stats['correct']
+            for day, (attempts, correct) in stats['days'].items():
+                bucket = category_stats['days'].setdefault(day, [0, 0])
+                bucket[0] += attempts
+                bucket[1] += correct
+
+        for category_stats in target['categories'].values():
+            category_stats['days'] = {day: bucket for day, bucket in category_stats['days'].items()
+                                      if day >= oldest_day}
+
+    def _oldest_day(self) -> str:
+        return (date.today() - timedelta(days=self.ROLLING_DAYS - 1)).isoformat()
+
+    def flush(self) -> bool:
+        """Merge this worker's pending counters into the stats file"""
+        with self._lock:
+            delta = self._pending
+            if not self._pending_answers:
+                return True
+            self._pending = self._empty()
+            self._pending_answers = 0
+            self._last_flush = time.monotonic()
+
+        def update(document: Dict) -> None:
+            document.setdefault('questions', {})
+            document.setdefault('categories', {})
+            self._merge(document, delta, self._oldest_day())
+
+        if JSONStorage.update_json(self.path, update):
+            return True
+
+        # Keep the counters for the next attempt rather than losing them
+        with self._lock:
+            self._merge(self._pending, delta, self._oldest_day())
+            self._pending_answers += sum(stats['attempts'] for stats in delta['questions'].values())
+        return False
+
+    def _load_persisted(self) -> Dict:
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+
+        if signature != self._persisted_signature:
+            document = JSONStorage.read_json(self.path)
+            self._persisted = {
+                'questions': document.get('questions', {}),
+                'categories': document.get('categories', {})
+            }
+            self._persisted_signature = signature
+        return self._persisted
+
+    @staticmethod
+    def _derive_question(stats: Dict) -> Dict:
+        stats['p_value'] = round(stats['correct'] / stats['attempts'], 4) if stats['attempts'] else None
+        return stats
+
+    @staticmethod
+    def _derive_category(stats: Dict) -> Dict:
+        recent_attempts = sum(bucket[0] for bucket in stats['days'].values())
+        recent_correct = sum(bucket[1] for bucket in stats['days'].values())
+        stats['accuracy'] = round(stats['correct'] / stats['attempts'], 4) if stats['attempts'] else None
+        stats['rolling_accuracy'] = round(recent_correct / recent_attempts, 4) if recent_attempts else None
+        stats['rolling_attempts'] = recent_attempts
+        del stats['days']
+        return stats
+
+    def _merged(self, question_ids=None, categories=None) -> Dict:
+        """Persisted plus pending counters, restricted to the given keys if any"""
+        with self._lock:
+            persisted = self._load_persisted()
+            if question_ids is None:
+                merged = copy.deepcopy(persisted)
+                self._merge(merged, self._pending, self._oldest_day())
+                return merged
+
+            merged = self._empty()
+            for source in (persisted, self._pending):
+                self._merge(merged, {
+                    'questions': {question_id: source['questions'][question_id]
+                                  for question_id in question_ids if question_id in source['questions']},
+                    'categories': {category: source['categories'][category]
+                                   for category in categories if category in source['categories']}
+                }, self._oldest_day())
+            return merged
+
+    def snapshot(self) -> Dict:
+        """
+        Current statistics with derived rates, including unflushed answers
+
+        Returns:
+            'questions': question ID -> counters plus p_value (share answered correctly),
+            'categories': category -> counters plus accuracy and rolling_accuracy
+                over the last ROLLING_DAYS days
+        """
+        merged = self._merged()
+        return {
+            'questions': {key: self._derive_question(stats) for key, stats in merged['questions'].items()},
+            'categories': {key: self._derive_category(stats) for key, stats in merged['categories'].items()}
+        }
+
+    def lookup(self, question_ids: Iterable[str], categories: Iterable[str]) -> Dict:
+        """Like snapshot(), but only for the given questions and categories (cost independent of bank size)"""
+        merged = self._merged(question_ids, categories)
+        return {
+            'questions': {key: self._derive_question(stats) for key, stats in merged['questions'].items()},
+            'categories': {key: self._derive_category(stats) for key, stats in merged['categories'].items()}
+        }
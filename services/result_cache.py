@@ -0,0 +1,178 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+class ResultCache:
+    """Test case results by content hash, in memory and optionally on disk
+
+    Keys hash everything a result depends on (see CodeExecutor._result_key),
+    so the same code run on the same test again, by Run, by Submit or by
+    another candidate, is answered without executing anything. The memory
+    tier keeps the max_entries most recently used results. With a
+    directory, results are also written to ``<dir>/<key[:2]>/<key>.json``
+    and shared by every worker. Entries expire after ttl seconds in both
+    tiers.
+
+    Only results the program itself determines are cached: limits
+    exceeded, internal errors and the like may go differently next time.
+    A compile error is cached only when it carries ``deterministic``, set
+    for genuine compiler diagnostics (see LocalExecutor.prepare); Judge0
+    cannot tell those apart from compiles cut short, so its are not.
+    """
+
+    # Results kept in memory
+    MAX_ENTRIES = 1024
+    # Statuses that depend only on the code and its input
+    CACHEABLE_STATUSES = {
+        'Accepted',
+        'Compilation Error',
+        'Runtime Error (SIGSEGV)',
+        'Runtime Error (SIGXFSZ)',
+        'Runtime Error (SIGFPE)',
+        'Runtime Error (SIGABRT)',
+        'Runtime Error (NZEC)'
+    }
+    # Larger outputs are not worth keeping
+    MAX_OUTPUT_CHARS = 64 * 1024
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, cache_dir: Optional[str] = None, ttl: float = 86400):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Tuple[float, Dict]]' = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(*parts) -> str:
+        """sha256 of the parts"""
+        return hashlib.sha256('\x1f'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+    def cacheable(self, result: Dict) -> bool:
+        """Whether a test case result is deterministic and small enough to keep"""
+        status = result.get('status')
+        if status == 'Compilation Error' and not result.get('deterministic'):
+            return False
+        return (status in self.CACHEABLE_STATUSES and 'error' not in result
+                and len(result.get('actual_output') or '') <= self.MAX_OUTPUT_CHARS
+                and len(result.get('stderr') or '') <= self.MAX_OUTPUT_CHARS)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f'{key}.json')
+
+    def get(self, key: str) -> Optional[Dict]:
+        """A copy of the cached result for key, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(entry[1])
+                del self._entries[key]
+
+        entry = self._read(key, now) if self.cache_dir else None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, entry)
+        return dict(entry[1])
+
+    def put(self, key: str, result: Dict) -> None:
+        """Cache a result if it is cacheable"""
+        if not self.cacheable(result):
+            return
+        entry = (time.time(), dict(result))
+        with self._lock:
+            self._remember(key, entry)
+        if self.cache_dir:
+            self._write(key, entry)
+
+    def _remember(self, key: str, entry: Tuple[float, Dict]) -> None:
+        """Add to the memory tier (call with the lock held)"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _read(self, key: str, now: float) -> Optional[Tuple[float, Dict]]:
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if now - data.get('stored_at', 0) >= self.ttl:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return data['stored_at'], data['result']
+
+    def _write(self, key: str, entry: Tuple[float, Dict]) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'stored_at': entry[0], 'result': entry[1]}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing result cache entry {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def prune(self) -> int:
+        """Delete expired entries from the disk tier; returns how many"""
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return 0
+        removed = 0
+        now = time.time()
+        for shard in os.listdir(self.cache_dir):
+            shard_dir = os.path.join(self.cache_dir, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                path = os.path.join(shard_dir, name)
+                try:
+                    # Entries are never rewritten in place, so mtime is when they were stored
+                    if now - os.path.getmtime(path) >= self.ttl:
+                        os.remove(path)
+                        removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def stats(self) -> Dict:
+        """Report cache size and hit/miss counters"""
+        with self._lock:
+            return {'results': len(self._entries), 'hits': self.hits, 'disk_hits': self.disk_hits,
+                    'misses': self.misses}
+
+def main():
+    from config import Config
+
+    parser = argparse.ArgumentParser(description='Delete expired entries from the on-disk result cache')
+    parser.add_argument('--dir', default=Config.RESULT_CACHE_DIR)
+    parser.add_argument('--ttl', type=float, default=Config.RESULT_CACHE_TTL)
+    args = parser.parse_args()
+
+    if not args.dir:
+        print("No result cache directory configured (RESULT_CACHE_DIR)")
+        return
+    removed = ResultCache(cache_dir=args.dir, ttl=args.ttl).prune()
+    print(f"Removed {removed} expired results from {args.dir}")
+
+if __name__ == '__main__':
+    main()
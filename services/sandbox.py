@@ -0,0 +1,179 @@
+"""
+Sandbox wrapper for the local executor (see LocalExecutor)
+
+Run as ``python -I -S services/sandbox.py <spec json> <command...>`` by a
+root server. The wrapper moves into new mount, pid, IPC and (unless
+allowed) network namespaces and forks the namespace's init process, which:
+
+- mounts a private tmpfs root with read-only bind mounts of the system
+  directories the toolchains need, a few device nodes, a fresh /proc, a
+  writable /tmp and the submission directory at /sandbox (read-only
+  unless compiling)
+- forks the command, which chroots into that root, applies rlimits
+  (CPU, address space, file size, processes, open files, core dumps),
+  drops to the unprivileged uid/gid it was given (a uid no other
+  sandbox is using) with no supplementary groups and no_new_privs, and execs
+- waits for the command and writes its exit code, CPU time and peak
+  memory to the spec's result file
+
+When the command exits, init exits and the kernel kills everything left
+in the pid namespace, so background processes cannot outlive a run.
+Every process also dies with its parent (PR_SET_PDEATHSIG), so killing
+the wrapper tears the whole sandbox down.
+
+Only the standard library may be imported: this runs as a separate
+script, before any privileges are dropped.
+"""
+import ctypes
+import json
+import os
+import resource
+import signal
+import sys
+
+CLONE_NEWNS = 0x00020000
+CLONE_NEWIPC = 0x08000000
+CLONE_NEWPID = 0x20000000
+CLONE_NEWNET = 0x40000000
+
+MS_RDONLY = 0x1
+MS_NOSUID = 0x2
+MS_NODEV = 0x4
+MS_NOEXEC = 0x8
+MS_REMOUNT = 0x20
+MS_BIND = 0x1000
+MS_REC = 0x4000
+MS_PRIVATE = 0x40000
+
+PR_SET_PDEATHSIG = 1
+PR_SET_NO_NEW_PRIVS = 38
+
+DEVICES = ('null', 'zero', 'random', 'urandom')
+
+_libc = ctypes.CDLL(None, use_errno=True)
+
+def _check(result: int, what: str) -> None:
+    if result != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, f'{what}: {os.strerror(errno)}')
+
+def _mount(source, target, fstype, flags: int, data=None) -> None:
+    encode = lambda value: value.encode() if value is not None else None
+    _check(_libc.mount(encode(source), encode(target), encode(fstype), ctypes.c_ulong(flags), encode(data)),
+           f'mount {target}')
+
+def _die_with_parent() -> None:
+    _check(_libc.prctl(PR_SET_PDEATHSIG, signal.SIGKILL, 0, 0, 0), 'prctl')
+
+def _bind(source: str, target: str, writable: bool) -> None:
+    _mount(source, target, None, MS_BIND | MS_REC)
+    flags = MS_BIND | MS_REMOUNT | MS_NOSUID | MS_NODEV
+    if not writable:
+        flags |= MS_RDONLY
+    _mount(None, target, None, flags)
+
+def _build_root(spec) -> None:
+    """Populate the new root at spec['root'] (in this process's private mount namespace)"""
+    root = spec['root']
+    os.umask(0o022)
+    _mount(None, '/', None, MS_REC | MS_PRIVATE)
+    _mount('tmpfs', root, 'tmpfs', MS_NOSUID | MS_NODEV, f"size={spec['tmp_size']},mode=755")
+
+    for path in spec['readonly_paths']:
+        target = root + path
+        if os.path.islink(path):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.symlink(os.readlink(path), target)
+        elif os.path.isdir(path):
+            os.makedirs(target, exist_ok=True)
+            _bind(path, target, writable=False)
+        elif os.path.isfile(path):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            open(target, 'w').close()
+            _bind(path, target, writable=False)
+
+    os.makedirs(root + '/dev', exist_ok=True)
+    for device in DEVICES:
+        target = f'{root}/dev/{device}'
+        open(target, 'w').close()
+        _mount(f'/dev/{device}', target, None, MS_BIND)
+    os.makedirs(root + '/proc', exist_ok=True)
+    _mount('proc', root + '/proc', 'proc', MS_NOSUID | MS_NODEV | MS_NOEXEC)
+    os.makedirs(root + '/tmp', exist_ok=True)
+    os.chmod(root + '/tmp', 0o1777)
+    os.makedirs(root + '/sandbox', exist_ok=True)
+    _bind(spec['workdir'], root + '/sandbox', writable=spec['writable'])
+
+def _exec(spec, command) -> None:
+    """Confine this process and replace it with the command"""
+    os.chroot(spec['root'])
+    os.chdir('/sandbox')
+
+    limits = [
+        (resource.RLIMIT_FSIZE, spec['file_size']),
+        (resource.RLIMIT_CORE, 0),
+        (resource.RLIMIT_NOFILE, spec['open_files']),
+        (resource.RLIMIT_NPROC, spec['max_processes'])
+    ]
+    if spec['cpu_seconds']:
+        resource.setrlimit(resource.RLIMIT_CPU, (spec['cpu_seconds'], spec['cpu_seconds'] + 1))
+    if spec['memory_bytes']:
+        limits.append((resource.RLIMIT_AS, spec['memory_bytes']))
+    for limit, value in limits:
+        resource.setrlimit(limit, (value, value))
+
+    os.setgroups([])
+    os.setgid(spec['gid'])
+    os.setuid(spec['uid'])
+    _check(_libc.prctl(PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0), 'prctl')
+    # Changing credentials clears the parent death signal, so set it afterwards
+    _die_with_parent()
+    os.execvpe(command[0], command, spec['env'])
+
+def _init(spec, command) -> int:
+    """pid 1 of the sandbox: build the root, run the command and report how it went"""
+    _die_with_parent()
+    _build_root(spec)
+    pid = os.fork()
+    if pid == 0:
+        try:
+            _exec(spec, command)
+        except BaseException as e:
+            os.write(2, f'sandbox: {e}\n'.encode())
+        os._exit(127)
+
+    _, status, usage = os.wait4(pid, 0)
+    result = {
+        'exitcode': os.waitstatus_to_exitcode(status),
+        'cpu_time': usage.ru_utime + usage.ru_stime,
+        'memory': usage.ru_maxrss
+    }
+    with open(spec['result'], 'w') as f:
+        json.dump(result, f)
+    return 0
+
+def main() -> None:
+    spec = json.loads(sys.argv[1])
+    command = sys.argv[2:]
+
+    # A private IPC namespace keeps System V and POSIX shared memory, semaphores
+    # and message queues away from other sandboxes
+    flags = CLONE_NEWNS | CLONE_NEWPID | CLONE_NEWIPC
+    if not spec['network']:
+        flags |= CLONE_NEWNET
+    _check(_libc.unshare(flags), 'unshare')
+
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            code = _init(spec, command)
+        except BaseException as e:
+            os.write(2, f'sandbox: {e}\n'.encode())
+        os._exit(code)
+
+    _, status, _ = os.wait4(pid, 0)
+    sys.exit(os.waitstatus_to_exitcode(status) if os.WIFEXITED(status) else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+import hashlib
+import os
+import re
+import threading
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+# Fixture and problem names may not contain path separators or start with a dot
+_NAME_RE = re.compile(r'^[A-Za-z0-9_-][A-Za-z0-9_.-]*$')
+
+CHUNK_SIZE = 1024 * 1024
+WHITESPACE = b' \t\n\r\x0b\x0c'
+
+def _stripped_digest(f: BinaryIO) -> Tuple[str, int]:
+    """sha256 and length of a file's contents with surrounding whitespace removed, read in chunks"""
+    digest = hashlib.sha256()
+    size = 0
+    started = False
+    # Whitespace seen since the last non-whitespace byte; only hashed if more content follows
+    pending = b''
+    for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+        if not started:
+            chunk = chunk.lstrip(WHITESPACE)
+            if not chunk:
+                continue
+            started = True
+        body = chunk.rstrip(WHITESPACE)
+        if body:
+            digest.update(pending)
+            digest.update(body)
+            size += len(pending) + len(body)
+            pending = chunk[len(body):]
+        else:
+            pending += chunk
+    return digest.hexdigest(), size
+
+class Fixture:
+    """A test case stored out of line as ``<n>.in`` / ``<n>.out`` files
+
+    Nothing is read until the test runs: the input is loaded just before
+    execution, and outputs are compared by checksum against the expected
+    file, so the expected output is never held in memory.
+    """
+
+    # Characters of the expected output returned in results
+    PREVIEW_CHARS = 1024
+
+    def __init__(self, store: 'TestFixtures', input_path: str, output_path: str):
+        self.store = store
+        self.input_path = input_path
+        self.output_path = output_path
+
+    def open_input(self) -> BinaryIO:
+        """Open the input file for streaming"""
+        return open(self.input_path, 'rb')
+
+    def read_input(self) -> str:
+        """Read the whole input (for executors that need it in the request)"""
+        with open(self.input_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def input_checksum(self) -> str:
+        """sha256 of the input file"""
+        return self.store.checksum(self.input_path, stripped=False)[0]
+
+    def output_checksum(self) -> str:
+        """sha256 of the expected output file exactly as stored"""
+        return self.store.checksum(self.output_path, stripped=False)[0]
+
+    def expected_checksum(self) -> Tuple[str, int]:
+        """sha256 and size of the expected output, ignoring surrounding whitespace"""
+        return self.store.checksum(self.output_path, stripped=True)
+
+    def matches(self, actual_output: str) -> bool:
+        """Whether an output equals the expected output, ignoring surrounding whitespace"""
+        actual = actual_output.encode('utf-8').strip(WHITESPACE)
+        digest, size = self.expected_checksum()
+        return len(actual) == size and hashlib.sha256(actual).hexdigest() == digest
+
+    def preview(self) -> str:
+        """Beginning of the expected output, for results"""
+        with open(self.output_path, 'r', encoding='utf-8', errors='replace') as f:
+            text = f.read(self.PREVIEW_CHARS + 1)
+        if len(text) > self.PREVIEW_CHARS:
+            return text[:self.PREVIEW_CHARS].strip() + '...'
+        return text.strip()
+
+class TestFixtures:
+    """Out-of-line test case files for coding problems
+
+    A test case ``{"fixture": "large_1", "is_hidden": true}`` of problem
+    ``code_1`` refers to ``<fixtures_dir>/code_1/large_1.in`` and
+    ``large_1.out``, so megabyte-sized inputs stay out of the question bank.
+    File checksums are cached by (inode, mtime, size) and only recomputed
+    when a file changes.
+    """
+
+    _instances: Dict[str, 'TestFixtures'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, fixtures_dir: str):
+        self.fixtures_dir = fixtures_dir
+        self._lock = threading.Lock()
+        self._checksums: Dict[Tuple[str, bool], Tuple[Tuple, str, int]] = {}
+
+    @classmethod
+    def for_dir(cls, fixtures_dir: str) -> 'TestFixtures':
+        """Get the shared fixture store for a directory"""
+        with cls._instances_lock:
+            store = cls._instances.get(fixtures_dir)
+            if store is None:
+                store = cls._instances[fixtures_dir] = cls(fixtures_dir)
+            return store
+
+    def fixture(self, problem_id: str, name: str) -> Optional[Fixture]:
+        """Get a problem's fixture by name, or None if either name is not a plain file name"""
+        name = str(name)
+        if not _NAME_RE.match(str(problem_id)) or not _NAME_RE.match(name):
+            return None
+        base = os.path.join(self.fixtures_dir, str(problem_id), name)
+        return Fixture(self, base + '.in', base + '.out')
+
+    def test_cases(self, problem: Dict) -> List[Dict]:
+        """
+        A problem's test cases with fixture references resolved
+
+        Args:
+            problem: Problem dict from the question bank (not modified)
+
+        Returns:
+            Test cases; those with a 'fixture' name get a Fixture object in
+            its place. Inline test cases are returned as they are.
+        """
+        test_cases = []
+        for test_case in problem.get('test_cases', []):
+            if 'fixture' in test_case:
+                test_case = dict(test_case, fixture=self.fixture(problem.get('id'), test_case['fixture']))
+            test_cases.append(test_case)
+        return test_cases
+
+    def checksum(self, path: str, stripped: bool = False) -> Tuple[str, int]:
+        """
+        sha256 and size of a file, cached until the file changes
+
+        Args:
+            path: File to hash
+            stripped: Ignore leading and trailing whitespace
+
+        Raises:
+            OSError: If the file cannot be read
+        """
+        stat = os.stat(path)
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        key = (path, stripped)
+        with self._lock:
+            cached = self._checksums.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1], cached[2]
+
+        with open(path, 'rb') as f:
+            if stripped:
+                digest, size = _stripped_digest(f)
+            else:
+                hasher = hashlib.sha256()
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    hasher.update(chunk)
+                digest, size = hasher.hexdigest(), stat.st_size
+
+        with self._lock:
+            self._checksums[key] = (signature, digest, size)
+        return digest, size
@@ -0,0 +1,72 @@
+import fcntl
+import os
+import random
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+class UidLease:
+    """One uid of a UidPool, held until release()"""
+
+    def __init__(self, uid: int, fd: int):
+        self.uid = uid
+        self._fd: Optional[int] = fd
+
+    def release(self) -> None:
+        """Give the uid back (safe to call more than once)"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+class UidPool:
+    """Range of unprivileged uids handed out one per live sandbox
+
+    RLIMIT_NPROC counts every process of a uid, so sandboxes sharing one
+    uid share the limit: a fork bomb in one would keep the others from
+    starting anything. Each sandbox therefore runs as a uid nobody else is
+    using. A lease is an exclusive flock() on ``<lock_dir>/uid-<n>.lock``,
+    so all server processes draw from the same range, and a lease whose
+    holder dies is released with it.
+    """
+
+    # Seconds between attempts while every uid is in use
+    RETRY_INTERVAL = 0.01
+
+    def __init__(self, first_uid: int, count: int, lock_dir: str):
+        self.first_uid = first_uid
+        self.count = max(1, count)
+        self.lock_dir = lock_dir
+
+    def acquire(self, timeout: float) -> UidLease:
+        """
+        Lease a free uid, waiting up to timeout seconds for one
+
+        Raises:
+            TimeoutError: If every uid stayed in use
+        """
+        os.makedirs(self.lock_dir, mode=0o700, exist_ok=True)
+        deadline = time.monotonic() + timeout
+        while True:
+            # Start anywhere, so processes do not all contend for the first uids
+            start = random.randrange(self.count)
+            for i in range(self.count):
+                uid = self.first_uid + (start + i) % self.count
+                fd = os.open(os.path.join(self.lock_dir, f'uid-{uid}.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    os.close(fd)
+                    continue
+                return UidLease(uid, fd)
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f'All {self.count} sandbox uids are in use')
+            time.sleep(self.RETRY_INTERVAL)
+
+    @contextmanager
+    def lease(self, timeout: float) -> Iterator[int]:
+        """Hold a free uid for the duration of the block"""
+        lease = self.acquire(timeout)
+        try:
+            yield lease.uid
+        finally:
+            lease.release()
@@ -0,0 +1,14 @@
+import pytest
+
+from utils.storage import JSONStorage
+
+@pytest.fixture(autouse=True)
+def storage_defaults():
+    """Start every test with JSON files in the default format and nothing cached"""
+    JSONStorage.set_backend(None)
+    JSONStorage.set_format('pretty')
+    JSONStorage.invalidate_cache()
+    yield
+    JSONStorage.set_backend(None)
+    JSONStorage.set_format('pretty')
+    JSONStorage.invalidate_cache()
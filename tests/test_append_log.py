@@ -0,0 +1,94 @@
+import json
+import os
+
+from utils.append_log import AppendLog
+
+def _write_lines(path: str, *lines: bytes) -> None:
+    with open(path, 'ab') as f:
+        for line in lines:
+            f.write(line)
+
+def _line(username: str, record) -> bytes:
+    return (json.dumps({'username': username, 'record': record}) + '\n').encode('utf-8')
+
+def test_records_are_read_back_per_user(tmp_path):
+    log = AppendLog(str(tmp_path / 'feedback.jsonl'))
+    log.append('alice', {'n': 1})
+    log.append('bob', {'n': 2})
+    log.append('alice', {'n': 3})
+
+    assert log.get('alice') == [{'n': 1}, {'n': 3}]
+    assert log.get('bob') == [{'n': 2}]
+    assert log.get('carol') == []
+
+def test_torn_line_does_not_swallow_the_next_record(tmp_path):
+    path = str(tmp_path / 'feedback.jsonl')
+    log = AppendLog(path)
+    log.append('alice', {'n': 1})
+    # A writer crashed halfway through its record
+    _write_lines(path, b'{"username": "alice", "rec')
+
+    log.append('alice', {'n': 2})
+
+    assert log.get('alice') == [{'n': 1}, {'n': 2}]
+    assert AppendLog(path).read_all() == {'alice': [{'n': 1}, {'n': 2}]}
+
+def test_lines_written_by_other_processes_are_indexed(tmp_path):
+    path = str(tmp_path / 'feedback.jsonl')
+    log = AppendLog(path)
+    log.append('alice', {'n': 1})
+    assert log.get('alice') == [{'n': 1}]
+
+    _write_lines(path, _line('alice', {'n': 2}))
+
+    assert log.get('alice') == [{'n': 1}, {'n': 2}]
+
+def test_compaction_groups_records_and_persists_the_index(tmp_path):
+    path = str(tmp_path / 'feedback.jsonl')
+    log = AppendLog(path)
+    for n in range(6):
+        log.append('alice' if n % 2 else 'bob', {'n': n})
+    _write_lines(path, b'{"torn')
+
+    assert log.compact()
+
+    with open(path, 'rb') as f:
+        usernames = [json.loads(line)['username'] for line in f]
+    assert usernames == ['bob'] * 3 + ['alice'] * 3
+    assert os.path.exists(path + '.idx')
+    assert log.get('alice') == [{'n': 1}, {'n': 3}, {'n': 5}]
+
+    # A fresh process starts from the persisted index
+    fresh = AppendLog(path)
+    assert fresh.get('bob') == [{'n': 0}, {'n': 2}, {'n': 4}]
+    fresh.append('bob', {'n': 6})
+    assert fresh.get('bob')[-1] == {'n': 6}
+
+def test_compaction_keeps_records_appended_while_it_runs(tmp_path, monkeypatch):
+    path = str(tmp_path / 'feedback.jsonl')
+    log = AppendLog(path)
+    log.append('alice', {'n': 1})
+    lock_file = AppendLog._lock_file
+    appended = []
+
+    def lock_late(fd, exclusive=False):
+        # Another writer gets in after the snapshot was rewritten
+        if exclusive and not appended:
+            appended.append(AppendLog(path).append('alice', {'n': 2}))
+        lock_file(fd, exclusive)
+
+    monkeypatch.setattr(AppendLog, '_lock_file', staticmethod(lock_late))
+    assert log.compact()
+
+    assert appended == [True]
+    assert log.get('alice') == [{'n': 1}, {'n': 2}]
+    assert AppendLog(path).get('alice') == [{'n': 1}, {'n': 2}]
+
+def test_compaction_can_drop_records(tmp_path):
+    log = AppendLog(str(tmp_path / 'feedback.jsonl'))
+    for n in range(4):
+        log.append('alice', {'n': n})
+
+    assert log.compact(keep=lambda username, record: record['n'] >= 2)
+
+    assert log.get('alice') == [{'n': 2}, {'n': 3}]
@@ -0,0 +1,122 @@
+from contextlib import contextmanager
+
+import pytest
+
+from config import Config
+from services.code_executor import CodeExecutor
+from services.local_executor import LocalExecutor, Program
+from services.result_cache import ResultCache
+from services.test_fixtures import Fixture
+
+TEST_CASES = [
+    {'input': '1', 'expected_output': '1', 'is_hidden': False},
+    {'input': '2', 'expected_output': 'secret', 'is_hidden': True}
+]
+
+@pytest.fixture
+def result_cache(monkeypatch):
+    cache = ResultCache(64)
+    monkeypatch.setattr(Config, 'RESULT_CACHE_SIZE', 64)
+    monkeypatch.setattr(CodeExecutor, '_result_cache', cache)
+    return cache
+
+@pytest.fixture
+def local_build(monkeypatch, tmp_path):
+    """Make the local backend 'compile' every submission to the Program set up by the test"""
+    monkeypatch.setattr(Config, 'EXECUTION_BACKEND', 'local')
+    program = Program(str(tmp_path), 'c', ['./main'], True)
+    builds = []
+
+    @contextmanager
+    def compiled(self, code, language):
+        builds.append(code)
+        yield program
+
+    monkeypatch.setattr(LocalExecutor, 'compiled', compiled)
+    program.builds = builds
+    return program
+
+def test_compile_error_is_reported_once_without_expected_outputs(local_build, result_cache):
+    local_build.compile_output = "main.c:1: error: expected ';'"
+
+    response = CodeExecutor().execute_code('int main() {', 'c', TEST_CASES)
+
+    assert response['passed'] == 0 and response['failed'] == 2
+    assert response['compile_error'] == "main.c:1: error: expected ';'"
+    assert len(response['results']) == 1
+    result = response['results'][0]
+    assert result['status'] == 'Compilation Error'
+    assert 'expected_output' not in result and 'secret' not in repr(response)
+
+def test_compile_error_is_cached(local_build, result_cache):
+    local_build.compile_output = 'error'
+    executor = CodeExecutor()
+
+    executor.execute_code('int main() {', 'c', TEST_CASES)
+    response = executor.execute_code('int main() {', 'c', TEST_CASES)
+
+    assert local_build.builds == ['int main() {']
+    assert response['compile_error'] == 'error'
+    for key in (CodeExecutor._result_key('local', CodeExecutor._source_digest('int main() {'), 'c', test_case)
+                for test_case in TEST_CASES):
+        assert 'secret' not in repr(result_cache.get(key))
+
+def test_build_failure_is_an_internal_error_and_not_cached(local_build, result_cache):
+    local_build.build_error = 'Compiler did not finish (exit status -9)'
+    executor = CodeExecutor()
+
+    response = executor.execute_code('int main() {}', 'c', TEST_CASES)
+    executor.execute_code('int main() {}', 'c', TEST_CASES)
+
+    assert [result['status'] for result in response['results']] == ['Internal Error'] * 2
+    assert 'compile_error' not in response
+    assert len(local_build.builds) == 2
+
+def test_judge0_compile_errors_are_not_cached(monkeypatch, result_cache):
+    monkeypatch.setattr(Config, 'EXECUTION_BACKEND', 'judge0')
+    executor = CodeExecutor()
+    executor.api_key = 'key'
+    calls = []
+
+    def run_tests(code, language_id, test_cases, username=None):
+        calls.append(len(test_cases))
+        return [{'status': 'Compilation Error', 'compile_output': 'Compilation time limit exceeded',
+                 'expected_output': test_case['expected_output'], 'passed': False} for test_case in test_cases]
+
+    monkeypatch.setattr(executor, '_run_tests', run_tests)
+    executor.execute_code('int main() {}', 'c', TEST_CASES)
+    response = executor.execute_code('int main() {}', 'c', TEST_CASES)
+
+    assert calls == [2, 2]
+    assert 'secret' not in repr(response)
+
+def test_result_cache_only_keeps_deterministic_results():
+    cache = ResultCache(8)
+    cache.put('accepted', {'status': 'Accepted', 'passed': True, 'actual_output': '1'})
+    cache.put('timeout', {'status': 'Time Limit Exceeded', 'passed': False})
+    cache.put('compile', {'status': 'Compilation Error', 'compile_output': 'error'})
+    cache.put('diagnostic', {'status': 'Compilation Error', 'compile_output': 'error', 'deterministic': True})
+
+    assert cache.get('accepted')['actual_output'] == '1'
+    assert cache.get('timeout') is None
+    assert cache.get('compile') is None
+    assert cache.get('diagnostic')['compile_output'] == 'error'
+
+def test_source_digest_keeps_whitespace_inside_the_code():
+    digest = CodeExecutor._source_digest
+
+    assert digest('print("a")\r\n') == digest('print("a")\n')
+    # Trailing spaces inside a multi-line string are part of the program's output
+    assert digest('print("""a  \n""")\n') != digest('print("""a\n""")\n')
+
+def test_mock_execution_reports_a_missing_expected_output(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, 'EXECUTION_BACKEND', 'judge0')
+    (tmp_path / 'big.in').write_text('1\n')
+    fixture = Fixture(None, str(tmp_path / 'big.in'), str(tmp_path / 'big.out'))
+    executor = CodeExecutor()
+    executor.api_key = None
+
+    response = executor.execute_code('print(input())', 'python', [{'fixture': fixture}])
+
+    assert response['results'][0]['error'].startswith('Test fixture unavailable')
+    assert response['failed'] == 1
@@ -0,0 +1,189 @@
+import json
+import os
+
+import pytest
+
+from utils import journal
+from utils.sharded_storage import ShardedStorage
+from utils.storage import JSONStorage, StorageBatch
+
+def _bump_mtime(path: str) -> None:
+    """Make a rewrite visible to the cache even on coarse-grained file systems"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def _crash_on_rename(monkeypatch, target: str) -> None:
+    """Make the owner of the next batch die right before renaming target into place"""
+    real_replace = os.replace
+
+    def replace(src, dst):
+        if dst == target and src.endswith('.tmp'):
+            raise OSError('simulated crash')
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(journal.os, 'replace', replace)
+
+def _journal_entries(data_dir: str):
+    return [name for name in os.listdir(os.path.join(data_dir, StorageBatch.JOURNAL_DIR))
+            if name.endswith('.journal')]
+
+def test_cached_document_is_revalidated_after_external_write(tmp_path):
+    users_file = str(tmp_path / 'users.json')
+    JSONStorage.save_user('alice', {'level': 1}, users_file)
+    assert JSONStorage.get_user('alice', users_file)['level'] == 1
+
+    hits = JSONStorage.cache_stats()['hits']
+    assert JSONStorage.get_user('alice', users_file)['level'] == 1
+    assert JSONStorage.cache_stats()['hits'] == hits + 1
+
+    # Another worker rewrites the file behind the cache's back
+    document = json.loads((tmp_path / 'users.json').read_text())
+    document['alice']['level'] = 2
+    (tmp_path / 'users.json').write_text(json.dumps(document))
+    _bump_mtime(users_file)
+
+    assert JSONStorage.get_user('alice', users_file)['level'] == 2
+
+def test_cached_documents_are_not_shared_with_callers(tmp_path):
+    users_file = str(tmp_path / 'users.json')
+    JSONStorage.save_user('alice', {'skills': ['go']}, users_file)
+
+    JSONStorage.get_user('alice', users_file)['skills'].append('rust')
+
+    assert JSONStorage.get_user('alice', users_file)['skills'] == ['go']
+
+def test_batch_commits_every_collection(tmp_path):
+    users_file = str(tmp_path / 'users.json')
+    interviews_file = str(tmp_path / 'interviews.json')
+    feedback_file = str(tmp_path / 'feedback.jsonl')
+
+    with JSONStorage.batch() as batch:
+        batch.save_interview('alice', {'round': 'hr'}, interviews_file)
+        batch.save_feedback('alice', {'score': 80}, feedback_file)
+        batch.save_user('alice', {'interviews': 1}, users_file)
+
+    assert JSONStorage.get_user('alice', users_file)['interviews'] == 1
+    assert [i['round'] for i in JSONStorage.get_user_interviews('alice', interviews_file)] == ['hr']
+    assert [f['score'] for f in JSONStorage.get_user_feedback('alice', feedback_file)] == [80]
+    assert _journal_entries(str(tmp_path)) == []
+
+def test_recovery_finishes_a_batch_interrupted_between_renames(tmp_path, monkeypatch):
+    users_file = str(tmp_path / 'users.json')
+    interviews_file = str(tmp_path / 'interviews.json')
+    JSONStorage.save_user('alice', {'interviews': 0}, users_file)
+
+    _crash_on_rename(monkeypatch, interviews_file)
+    with JSONStorage.batch() as batch:
+        batch.save_interview('alice', {'round': 'hr'}, interviews_file)
+        batch.save_user('alice', {'interviews': 1}, users_file)
+    monkeypatch.undo()
+    assert len(_journal_entries(str(tmp_path))) == 1
+
+    assert JSONStorage.recover(str(tmp_path)) == 1
+    assert JSONStorage.get_user('alice', users_file)['interviews'] == 1
+    assert [i['round'] for i in JSONStorage.get_user_interviews('alice', interviews_file)] == ['hr']
+    assert _journal_entries(str(tmp_path)) == []
+
+def test_recovery_keeps_writes_made_after_the_crash(tmp_path, monkeypatch):
+    users_file = str(tmp_path / 'users.json')
+    interviews_file = str(tmp_path / 'interviews.json')
+    JSONStorage.save_user('alice', {'interviews': 0}, users_file)
+
+    _crash_on_rename(monkeypatch, interviews_file)
+    with JSONStorage.batch() as batch:
+        batch.save_interview('alice', {'round': 'hr'}, interviews_file)
+        batch.save_user('alice', {'interviews': 1}, users_file)
+    monkeypatch.undo()
+
+    # Another writer goes ahead before the server restarts
+    JSONStorage.save_interview('bob', {'round': 'technical'}, interviews_file)
+    JSONStorage.recover(str(tmp_path))
+
+    assert [i['round'] for i in JSONStorage.get_user_interviews('alice', interviews_file)] == ['hr']
+    assert [i['round'] for i in JSONStorage.get_user_interviews('bob', interviews_file)] == ['technical']
+    assert JSONStorage.get_user('alice', users_file)['interviews'] == 1
+
+def test_replaying_a_batch_twice_adds_nothing(tmp_path):
+    interviews_file = str(tmp_path / 'interviews.json')
+    operations = [[interviews_file, 'alice', 'record', {'round': 'hr', 'timestamp': 't'}]]
+
+    JSONStorage._replay_batch(operations)
+    JSONStorage._replay_batch(operations)
+
+    assert JSONStorage.get_user_interviews('alice', interviews_file) == [{'round': 'hr', 'timestamp': 't'}]
+
+def test_recovery_leaves_an_undecodable_file_alone(tmp_path, monkeypatch):
+    interviews_file = str(tmp_path / 'interviews.json')
+    JSONStorage.save_interview('alice', {'round': 'hr'}, interviews_file)
+
+    _crash_on_rename(monkeypatch, interviews_file)
+    with JSONStorage.batch() as batch:
+        batch.save_interview('alice', {'round': 'technical'}, interviews_file)
+    monkeypatch.undo()
+
+    (tmp_path / 'interviews.json').write_bytes(b'{"alice": [')
+    assert JSONStorage.recover(str(tmp_path)) == 0
+    assert (tmp_path / 'interviews.json').read_bytes() == b'{"alice": ['
+    # Kept for the next start
+    assert len(_journal_entries(str(tmp_path))) == 1
+
+def test_sharded_batch_recovery(tmp_path, monkeypatch):
+    storage = ShardedStorage(str(tmp_path / 'sharded'))
+    JSONStorage.set_backend(storage)
+    users_file = str(tmp_path / 'users.json')
+    interviews_file = str(tmp_path / 'interviews.json')
+    interviews_path = storage._user_path('alice', 'interviews')
+
+    _crash_on_rename(monkeypatch, interviews_path)
+    with JSONStorage.batch() as batch:
+        batch.save_interview('alice', {'round': 'hr'}, interviews_file)
+        batch.save_user('alice', {'interviews': 1}, users_file)
+    monkeypatch.undo()
+
+    storage.save_interview('alice', {'round': 'technical'}, interviews_file)
+    assert JSONStorage.recover(str(tmp_path / 'sharded')) == 1
+
+    assert sorted(i['round'] for i in storage.get_user_interviews('alice', interviews_file)) == ['hr', 'technical']
+    assert storage.get_user('alice', users_file)['interviews'] == 1
+
+def test_sharded_reads_headerless_msgpack_arrays(tmp_path):
+    msgpack = pytest.importorskip('msgpack')
+    storage = ShardedStorage(str(tmp_path))
+    interviews_file = str(tmp_path / 'interviews.json')
+    path = storage._user_path('alice', 'interviews')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Written before msgpack files got their header
+    with open(path, 'wb') as f:
+        f.write(msgpack.packb([{'round': 'hr'}], use_bin_type=True))
+
+    storage.save_interview('alice', {'round': 'technical'}, interviews_file)
+
+    assert [i['round'] for i in storage.get_user_interviews('alice', interviews_file)] == ['hr', 'technical']
+
+def test_sharded_storage_does_not_overwrite_an_undecodable_file(tmp_path):
+    storage = ShardedStorage(str(tmp_path))
+    interviews_file = str(tmp_path / 'interviews.json')
+    path = storage._user_path('alice', 'interviews')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'[{"round": ')
+
+    with pytest.raises(ValueError):
+        storage.get_user_interviews('alice', interviews_file)
+    with pytest.raises(ValueError):
+        storage.save_interview('alice', {'round': 'hr'}, interviews_file)
+    with open(path, 'rb') as f:
+        assert f.read() == b'[{"round": '
+
+def test_formats_can_be_mixed(tmp_path):
+    pytest.importorskip('msgpack')
+    users_file = str(tmp_path / 'users.json')
+    JSONStorage.save_user('alice', {'level': 1}, users_file)
+
+    JSONStorage.set_format('msgpack')
+    JSONStorage.save_user('bob', {'level': 2}, users_file)
+    JSONStorage.invalidate_cache()
+
+    assert (tmp_path / 'users.json').read_bytes().startswith(b'\xc1MPK')
+    assert JSONStorage.get_user('alice', users_file)['level'] == 1
+    assert JSONStorage.get_user('bob', users_file)['level'] == 2
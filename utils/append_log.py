@@ -0,0 +1,363 @@
+import argparse
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, single-process use only
+    fcntl = None
+
+class AppendLog:
+    """Append-only newline-delimited JSON log of per-user records
+
+    Each line is ``{"username": ..., "record": ...}``. Appends open the file
+    with O_APPEND and fsync, so saving a record costs O(record) no matter how
+    large the log is. A line left without its newline by a crashed writer is
+    terminated before the next append, so it never swallows a new record.
+    Reads go through an in-memory offset index of username -> [(offset,
+    length)], which is extended by scanning only the bytes appended since the
+    last lookup.
+
+    Compaction rewrites the log with each user's records stored contiguously
+    and persists the index next to the log (``<log>.idx``), so a fresh process
+    only has to scan what was appended after the last compaction. It runs in
+    a background thread once enough records were appended, or on demand
+    (``python -m utils.append_log compact``).
+    """
+
+    # Compact once this many records were appended since the last compaction
+    COMPACT_THRESHOLD = 5000
+
+    _instances: Dict[str, 'AppendLog'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: str, compact_threshold: Optional[int] = None):
+        self.path = path
+        self.index_path = path + '.idx'
+        self.compact_threshold = compact_threshold or AppendLog.COMPACT_THRESHOLD
+        self._lock = threading.RLock()
+        self._offsets: Dict[str, List[Tuple[int, int]]] = {}
+        self._inode = None
+        self._indexed_size = 0
+        self._tail_records = 0
+        self._compactor: Optional[threading.Thread] = None
+        # One compaction at a time; it does not hold _lock while rewriting
+        self._compact_lock = threading.Lock()
+
+    @classmethod
+    def for_path(cls, path: str) -> 'AppendLog':
+        """Get the shared log instance for a file path"""
+        with cls._instances_lock:
+            log = cls._instances.get(path)
+            if log is None:
+                log = cls(path)
+                cls._instances[path] = log
+            return log
+
+    @staticmethod
+    def _lock_file(fd: int, exclusive: bool = False) -> None:
+        """Take an advisory lock that is released when fd is closed"""
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    @staticmethod
+    def _terminator(fd: int) -> bytes:
+        """
+        Newline to write before appending, if the last line is torn
+
+        A crashed writer can leave a line without its newline; ending it
+        keeps the next record on its own line (the torn one is skipped).
+        """
+        size = os.fstat(fd).st_size
+        if size and os.pread(fd, 1, size - 1) != b'\n':
+            return b'\n'
+        return b''
+
+    @staticmethod
+    def _encode(username: str, record: Dict) -> bytes:
+        return (json.dumps({'username': username, 'record': record}, ensure_ascii=False) + '\n').encode('utf-8')
+
+    def append(self, username: str, record: Dict) -> bool:
+        """Append one record for a user and flush it to disk"""
+        data = self._encode(username, record)
+
+        try:
+            while True:
+                fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    self._lock_file(fd)
+                    # A concurrent compaction may have replaced the file while we
+                    # waited for the lock; append to the new file instead
+                    if os.fstat(fd).st_ino != os.stat(self.path).st_ino:
+                        continue
+                    os.write(fd, self._terminator(fd) + data)
+                    os.fsync(fd)
+                    break
+                finally:
+                    os.close(fd)
+        except OSError as e:
+            print(f"Error appending to {self.path}: {e}")
+            return False
+
+        with self._lock:
+            self._refresh()
+            if self._tail_records >= self.compact_threshold:
+                self._compact_in_background()
+        return True
+
+    def _compact_in_background(self) -> None:
+        """Start compacting unless a compaction is running already (call with the lock held)"""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, daemon=True,
+                                           name=f'compact-{os.path.basename(self.path)}')
+        self._compactor.start()
+
+    def get(self, username: str) -> List[Dict]:
+        """Get all records for a user in append order"""
+        if not os.path.exists(self.path):
+            return []
+
+        with self._lock:
+            while True:
+                self._refresh()
+                f = open(self.path, 'rb')
+                # Offsets are only valid for the file they were indexed from
+                if os.fstat(f.fileno()).st_ino == self._inode:
+                    break
+                f.close()
+            offsets = list(self._offsets.get(username, []))
+
+        records = []
+        with f:
+            for offset, length in offsets:
+                f.seek(offset)
+                entry = self._parse_line(f.read(length))
+                if entry is not None and entry['username'] == username:
+                    records.append(entry['record'])
+        return records
+
+    def read_all(self) -> Dict[str, List[Dict]]:
+        """Read every record grouped by username"""
+        grouped: Dict[str, List[Dict]] = {}
+        if not os.path.exists(self.path):
+            return grouped
+
+        with open(self.path, 'rb') as f:
+            for line in f:
+                entry = self._parse_line(line)
+                if entry is not None:
+                    grouped.setdefault(entry['username'], []).append(entry['record'])
+        return grouped
+
+    @staticmethod
+    def _parse_line(line: bytes) -> Optional[Dict]:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            # Torn write from a crashed process; skip it
+            return None
+        if not isinstance(entry, dict) or 'username' not in entry:
+            return None
+        return entry
+
+    def _refresh(self) -> None:
+        """Bring the offset index up to date with the file on disk"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self._reset_index(None)
+            return
+
+        if stat.st_ino != self._inode or stat.st_size < self._indexed_size:
+            # First use, or the log was compacted by another process
+            self._load_index_file(stat.st_ino)
+
+        if stat.st_size > self._indexed_size:
+            self._scan_from(self._indexed_size)
+
+    def _reset_index(self, inode) -> None:
+        self._offsets = {}
+        self._inode = inode
+        self._indexed_size = 0
+        self._tail_records = 0
+
+    def _load_index_file(self, inode: int) -> None:
+        """Load the index persisted by the last compaction, if it matches the log"""
+        self._reset_index(inode)
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if saved.get('inode') != inode:
+            return
+
+        self._offsets = {user: [tuple(o) for o in offsets] for user, offsets in saved['offsets'].items()}
+        self._indexed_size = saved['size']
+
+    def _scan_from(self, start: int) -> None:
+        """Index complete lines appended after start"""
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Record still being written; pick it up on the next refresh
+                    break
+                entry = self._parse_line(line)
+                if entry is not None:
+                    self._offsets.setdefault(entry['username'], []).append((offset, len(line)))
+                    self._tail_records += 1
+                offset += len(line)
+        self._indexed_size = offset
+
+    def compact(self, keep: Optional[Callable[[str, Dict], bool]] = None) -> bool:
+        """Rewrite the log grouped by user and persist its offset index
+
+        If keep is given, only records for which keep(username, record) is
+        true are carried over into the rewritten log.
+
+        The bulk of the log is rewritten from a snapshot of its size without
+        blocking readers or writers. Only copying the records appended in the
+        meantime and swapping the files happen under the exclusive file lock,
+        and only installing the new index under the instance lock.
+        """
+        if not os.path.exists(self.path):
+            return True
+
+        with self._compact_lock:
+            tmp_path = self.path + '.tmp'
+            try:
+                fd = os.open(self.path, os.O_RDONLY)
+            except FileNotFoundError:
+                return True
+            try:
+                inode = os.fstat(fd).st_ino
+                offsets: Dict[str, List[Tuple[int, int]]] = {}
+                with open(tmp_path, 'wb') as out:
+                    # Complete lines present now; a line being appended is left to the tail
+                    snapshot = self._last_line_end(fd, os.fstat(fd).st_size)
+                    grouped: Dict[str, List[Dict]] = {}
+                    for username, record in self._read_records(fd, 0, snapshot):
+                        grouped.setdefault(username, []).append(record)
+                    size = self._write_records(out, ((username, record) for username, records in grouped.items()
+                                                     for record in records), keep, offsets, 0)
+
+                    self._lock_file(fd, exclusive=True)
+                    if os.stat(self.path).st_ino != inode:
+                        # Another process compacted it already
+                        os.remove(tmp_path)
+                        return True
+                    # Appenders are locked out now, so the tail is complete
+                    size = self._write_records(out, self._read_records(fd, snapshot, os.fstat(fd).st_size),
+                                               keep, offsets, size)
+                    out.flush()
+                    os.fsync(out.fileno())
+
+                new_inode = os.stat(tmp_path).st_ino
+                index_tmp = self.index_path + '.tmp'
+                with open(index_tmp, 'w', encoding='utf-8') as f:
+                    json.dump({'inode': new_inode, 'size': size, 'offsets': offsets}, f)
+                os.replace(index_tmp, self.index_path)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Error compacting {self.path}: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return False
+            finally:
+                os.close(fd)
+
+        with self._lock:
+            self._offsets = offsets
+            self._inode = new_inode
+            self._indexed_size = size
+            self._tail_records = 0
+        return True
+
+    @staticmethod
+    def _last_line_end(fd: int, size: int) -> int:
+        """Offset just past the last newline before size (0 if there is none)"""
+        chunk = 65536
+        end = size
+        while end > 0:
+            start = max(0, end - chunk)
+            position = os.pread(fd, end - start, start).rfind(b'\n')
+            if position != -1:
+                return start + position + 1
+            end = start
+        return 0
+
+    def _read_records(self, fd: int, start: int, end: int):
+        """Yield (username, record) for the valid lines between two offsets"""
+        with os.fdopen(os.dup(fd), 'rb') as f:
+            f.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                line = f.readline(remaining)
+                if not line:
+                    break
+                remaining -= len(line)
+                entry = self._parse_line(line)
+                if entry is not None:
+                    yield entry['username'], entry['record']
+
+    def _write_records(self, out, records, keep: Optional[Callable[[str, Dict], bool]],
+                       offsets: Dict[str, List[Tuple[int, int]]], offset: int) -> int:
+        """Write records to a compacted log starting at offset, indexing them; returns the new size"""
+        for username, record in records:
+            if keep is not None and not keep(username, record):
+                continue
+            data = self._encode(username, record)
+            out.write(data)
+            offsets.setdefault(username, []).append((offset, len(data)))
+            offset += len(data)
+        return offset
+
+    def import_json(self, json_path: str) -> int:
+        """Append every record from a JSON {username: [records]} file, then compact"""
+        from utils.storage import JSONStorage
+
+        count = 0
+        with open(self.path, 'a+b') as f:
+            self._lock_file(f.fileno())
+            f.write(self._terminator(f.fileno()))
+            for username, records in JSONStorage.read_json(json_path).items():
+                for record in records:
+                    f.write(self._encode(username, record))
+                    count += 1
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.compact()
+        return count
+
+def main():
+    """Command line entry point for log maintenance"""
+    parser = argparse.ArgumentParser(description='Maintain append-only JSONL storage logs')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    compact_parser = subparsers.add_parser('compact', help='Group records by user and rebuild the index')
+    compact_parser.add_argument('log', nargs='+', help='Path to a .jsonl log')
+
+    import_parser = subparsers.add_parser('import', help='Convert a JSON history file into a .jsonl log')
+    import_parser.add_argument('json_file', help='Existing {username: [records]} JSON file')
+    import_parser.add_argument('--log', help='Target log (defaults to the same name with .jsonl)')
+
+    args = parser.parse_args()
+
+    if args.command == 'compact':
+        for path in args.log:
+            AppendLog(path).compact()
+            print(f"Compacted {path}")
+    else:
+        log_path = args.log or os.path.splitext(args.json_file)[0] + '.jsonl'
+        count = AppendLog(log_path).import_json(args.json_file)
+        print(f"Imported {count} records into {log_path}")
+
+if __name__ == '__main__':
+    main()
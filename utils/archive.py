@@ -0,0 +1,159 @@
+import argparse
+import gzip
+import json
+import os
+import shutil
+import threading
+import zlib
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+from utils.locks import file_lock
+
+class HistoryArchive:
+    """Compressed per-month archive of old history records
+
+    Each history collection gets a directory of month files next to the
+    storage files::
+
+        data/archive/interviews/2026-01.jsonl.gz     -> {"u": username, "r": record} per line
+        data/archive/interviews/2026-01.users.json   -> usernames present in that month
+
+    Month files are gzip streams made of one member per archival run, so
+    adding records copies the existing compressed bytes instead of
+    recompressing them. The users file lets per-user reads skip months that
+    hold nothing for that user.
+    """
+
+    # Archive directory, created next to the storage files
+    ARCHIVE_DIR = 'archive'
+
+    def __init__(self, archive_dir: str, collection: str):
+        self.archive_dir = archive_dir
+        self.collection = collection
+        self.collection_dir = os.path.join(archive_dir, collection)
+
+    @classmethod
+    def for_file(cls, file_path: str) -> 'HistoryArchive':
+        """Get the archive of the collection stored in file_path"""
+        archive_dir = os.path.join(os.path.dirname(file_path), cls.ARCHIVE_DIR)
+        collection = os.path.splitext(os.path.basename(file_path))[0]
+        return cls(archive_dir, collection)
+
+    def _month_path(self, month: str) -> str:
+        return os.path.join(self.collection_dir, f'{month}.jsonl.gz')
+
+    def _users_path(self, month: str) -> str:
+        return os.path.join(self.collection_dir, f'{month}.users.json')
+
+    def months(self) -> List[str]:
+        """List archived months, oldest first"""
+        if not os.path.isdir(self.collection_dir):
+            return []
+        return sorted(name[:-len('.jsonl.gz')] for name in os.listdir(self.collection_dir)
+                      if name.endswith('.jsonl.gz'))
+
+    def _month_users(self, month: str) -> Set[str]:
+        try:
+            with open(self._users_path(month), 'r', encoding='utf-8') as f:
+                return set(json.load(f))
+        except (OSError, ValueError):
+            return set()
+
+    @staticmethod
+    def _replace(path: str, write) -> None:
+        """Write a file through a temp file so readers never see it half written"""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def add(self, entries: Iterable[Tuple[str, Dict]]) -> bool:
+        """
+        Append (username, record) pairs to the month files of their timestamps
+
+        Returns:
+            True once every record is durably archived
+        """
+        by_month: Dict[str, List[Tuple[str, Dict]]] = {}
+        for username, record in entries:
+            by_month.setdefault(record['timestamp'][:7], []).append((username, record))
+
+        try:
+            os.makedirs(self.collection_dir, exist_ok=True)
+            for month, month_entries in sorted(by_month.items()):
+                with file_lock(self.collection_dir, month):
+                    self._add_month(month, month_entries)
+        except OSError as e:
+            print(f"Error archiving {self.collection}: {e}")
+            return False
+        return True
+
+    def _add_month(self, month: str, entries: List[Tuple[str, Dict]]) -> None:
+        # Publish the user list first: listing a user without records only
+        # costs a wasted scan, while the reverse would hide records
+        users = self._month_users(month) | {username for username, _ in entries}
+        users_data = json.dumps(sorted(users), ensure_ascii=False).encode('utf-8')
+        self._replace(self._users_path(month), lambda f: f.write(users_data))
+
+        lines = ''.join(
+            json.dumps({'u': username, 'r': record}, ensure_ascii=False) + '\n'
+            for username, record in entries
+        )
+        member = gzip.compress(lines.encode('utf-8'))
+        month_path = self._month_path(month)
+
+        def write(f) -> None:
+            if os.path.exists(month_path):
+                with open(month_path, 'rb') as existing:
+                    shutil.copyfileobj(existing, f)
+            f.write(member)
+
+        self._replace(month_path, write)
+
+    def iter_records(self, username: str) -> Iterator[Dict]:
+        """Stream a user's archived records, oldest month first"""
+        for month in self.months():
+            if username not in self._month_users(month):
+                continue
+
+            try:
+                with gzip.open(self._month_path(month), 'rt', encoding='utf-8') as f:
+                    for line in f:
+                        entry = json.loads(line)
+                        if entry['u'] == username:
+                            yield entry['r']
+            except (OSError, EOFError, ValueError, zlib.error) as e:
+                print(f"Error reading archive {self._month_path(month)}: {e}")
+
+def main():
+    """Command line entry point for moving old history records into the archive"""
+    from config import Config
+    from utils.storage import JSONStorage
+
+    parser = argparse.ArgumentParser(description='Move old history records into compressed monthly archives')
+    parser.add_argument('--days', type=int, default=Config.ARCHIVE_AFTER_DAYS,
+                        help='Archive records older than this many days')
+    parser.add_argument('files', nargs='*', default=[Config.INTERVIEWS_FILE, Config.SUBMISSIONS_FILE],
+                        help='History collections to archive')
+    args = parser.parse_args()
+
+    JSONStorage.set_format(Config.STORAGE_FORMAT)
+    if Config.STORAGE_BACKEND == 'sqlite':
+        from utils.sqlite_storage import SQLiteStorage
+        JSONStorage.set_backend(SQLiteStorage(Config.SQLITE_DB_FILE))
+    elif Config.STORAGE_BACKEND == 'sharded':
+        from utils.sharded_storage import ShardedStorage
+        JSONStorage.set_backend(ShardedStorage(Config.SHARDED_DATA_DIR))
+
+    for file_path in args.files:
+        count = JSONStorage.archive_history(file_path, args.days)
+        print(f"Archived {count} records from {file_path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+import hashlib
+import random
+from typing import Callable, Optional
+
+from flask import Response, request
+
+def listing_key(*parts) -> str:
+    """Short stable hash identifying a listing (bank version, filters, ...)"""
+    return hashlib.sha1('\x1f'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:20]
+
+def conditional_listing(key: str, build: Callable[[int], bytes], seed: Optional[int] = None) -> Response:
+    """
+    Serve a randomized JSON listing with a strong ETag and 304 support
+
+    The ETag is ``<key>.<seed>``: the listing key plus the seed used to pick
+    and order the items, so one ETag always names exactly one body. A client
+    revalidating an ETag whose key is still current gets ``304 Not Modified``
+    and keeps the listing it already has, without anything being rebuilt.
+
+    Args:
+        key: listing_key() of everything the listing depends on
+        build: Returns the serialized body for a seed
+        seed: Fixed seed requested by the client; only an ETag for this
+            seed is then considered current. Random if omitted.
+
+    Returns:
+        A 200 response with the body, or an empty 304 response
+    """
+    for etag in request.if_none_match.as_set(include_weak=True):
+        listing, _, etag_seed = etag.rpartition('.')
+        if listing == key and etag_seed.isdigit() and (seed is None or etag_seed == str(seed)):
+            response = Response(status=304)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+    if seed is None:
+        seed = random.getrandbits(32)
+    response = Response(build(seed), mimetype='application/json')
+    response.set_etag(f'{key}.{seed}')
+    # Let browsers keep the listing but revalidate it on every request
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
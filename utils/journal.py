@@ -0,0 +1,198 @@
+import json
+import os
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.locks import file_locks
+
+# Uncommitted batches younger than this may still be in progress in another worker
+RECOVERY_GRACE_SECONDS = 60
+
+# [path, username, kind, data]: one logical change of a batch (see commit_files)
+Operation = List
+
+def fsync_dir(dir_path: str) -> None:
+    """Persist renames/creations in a directory (no-op where unsupported)"""
+    try:
+        fd = os.open(dir_path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def commit_files(files: Dict[str, bytes], operations: List[Operation], journal_dir: str,
+                 locks: List[Tuple[str, str]], replay: Callable[[List[Operation]], None]) -> bool:
+    """
+    Replace several files and append to several logs as one crash-safe unit
+
+    New file contents are written to temp files next to their targets and
+    fsynced. The journal entry listing the pending renames and the logical
+    operations behind them is then made durable, which is the single commit
+    point: if the process dies before it, nothing changed; if it dies after,
+    recover() rolls the change forward.
+
+    The caller must hold the locks for the files being replaced, and the
+    entry records them so recover() works under the same locks. recover()
+    does not rename leftover temp files, since another writer may have
+    replaced their target since: it replays the operations for targets not
+    yet renamed onto the current files instead.
+
+    Args:
+        files: Target path -> full serialized contents
+        operations: [path, username, kind, data] changes the contents were
+            built from; those on paths not in files (AppendLog collections)
+            are applied by replay after the renames
+        journal_dir: Directory for journal entries, scanned by recover()
+        locks: (collection, key) pairs of the file_locks held by the caller
+        replay: Applies operations onto the current files; must be safe to repeat
+
+    Returns:
+        True if the change was committed
+    """
+    os.makedirs(journal_dir, exist_ok=True)
+    txid = uuid.uuid4().hex
+    pending_path = os.path.join(journal_dir, f'{txid}.pending')
+    journal_path = os.path.join(journal_dir, f'{txid}.journal')
+    renames = [(f'{path}.{txid}.tmp', path) for path in files]
+
+    try:
+        # Best-effort list of temp files so recover() can clean up after a
+        # crash that happens before the commit point
+        with open(pending_path, 'w', encoding='utf-8') as f:
+            json.dump({'temps': [tmp for tmp, _ in renames]}, f)
+
+        for tmp_path, path in renames:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(files[path])
+                f.flush()
+                os.fsync(f.fileno())
+
+        journal_tmp = journal_path + '.tmp'
+        with open(journal_tmp, 'w', encoding='utf-8') as f:
+            json.dump({'renames': renames, 'locks': locks, 'operations': operations},
+                      f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(journal_tmp, journal_path)
+        fsync_dir(journal_dir)
+    except OSError as e:
+        print(f"Error staging storage batch: {e}")
+        _discard(pending_path)
+        return False
+
+    try:
+        _apply(journal_path, replay, recovering=False)
+        os.remove(pending_path)
+    except (OSError, ValueError) as e:
+        # Committed already; recover() will finish applying it
+        print(f"Error applying storage batch {txid}: {e}")
+    return True
+
+def _read(journal_path: str) -> Optional[Dict]:
+    try:
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        # Already applied by its owner
+        return None
+
+def _apply(journal_path: str, replay: Callable[[List[Operation]], None], recovering: bool) -> None:
+    """
+    Roll a committed journal entry forward (call with its locks held); safe to repeat
+
+    Its owner renames the temp files into place, as nobody can have written
+    the targets while it held their locks. In recovery a target whose temp
+    file is left was not renamed, and may have been written by others after
+    the owner died: the temp file is dropped and the target's operations are
+    replayed onto its current contents, so neither change is lost.
+    """
+    journal = _read(journal_path)
+    if journal is None:
+        return
+
+    applied = set()
+    for tmp_path, path in journal['renames']:
+        if not os.path.exists(tmp_path):
+            # A missing temp file means the rename already happened
+            applied.add(path)
+        elif not recovering:
+            os.replace(tmp_path, path)
+            applied.add(path)
+    for dir_path in {os.path.dirname(path) or '.' for path in applied}:
+        fsync_dir(dir_path)
+
+    replay([operation for operation in journal['operations'] if operation[0] not in applied])
+
+    for tmp_path, _ in journal['renames']:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    try:
+        os.remove(journal_path)
+    except FileNotFoundError:
+        pass
+
+def _discard(pending_path: str) -> None:
+    """Remove temp files of a batch that never reached its commit point"""
+    try:
+        with open(pending_path, 'r', encoding='utf-8') as f:
+            temps = json.load(f).get('temps', [])
+    except (OSError, ValueError):
+        temps = []
+
+    for tmp_path in temps:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    if os.path.exists(pending_path):
+        os.remove(pending_path)
+
+def recover(journal_dir: str, replay: Callable[[List[Operation]], None]) -> int:
+    """
+    Finish or discard batches interrupted by a crash
+
+    Args:
+        journal_dir: Directory passed to commit_files
+        replay: Applies operations onto the current files (see commit_files)
+
+    Returns:
+        Number of committed batches that were rolled forward
+    """
+    if not os.path.isdir(journal_dir):
+        return 0
+
+    recovered = 0
+    cutoff = time.time() - RECOVERY_GRACE_SECONDS
+    entries = sorted(os.listdir(journal_dir))
+
+    # Committed batches are rolled forward under their locks, so a batch its
+    # owner is still applying is finished first; replaying one twice is harmless
+    for name in entries:
+        if name.endswith('.journal'):
+            journal_path = os.path.join(journal_dir, name)
+            journal = _read(journal_path)
+            if journal is None:
+                continue
+            try:
+                with file_locks(tuple(key) for key in journal['locks']):
+                    _apply(journal_path, replay, recovering=True)
+            except (OSError, ValueError) as e:
+                # Left in place to retry on the next start
+                print(f"Error recovering storage batch {name}: {e}")
+                continue
+            recovered += 1
+
+    for name in entries:
+        path = os.path.join(journal_dir, name)
+        if not os.path.exists(path) or os.path.getmtime(path) > cutoff:
+            continue
+        if name.endswith('.journal.tmp'):
+            os.remove(path)
+        elif name.endswith('.pending') and not os.path.exists(path[:-len('.pending')] + '.journal'):
+            _discard(path)
+
+    return recovered
@@ -0,0 +1,70 @@
+import os
+import threading
+import zlib
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locks only
+    fcntl = None
+
+# Keys of each collection are spread over this many lock files
+LOCK_STRIPES = 64
+# Key used when the whole file is the unit of update
+WHOLE_FILE = '*'
+
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+def lock_path(collection_path: str, key: str = WHOLE_FILE) -> str:
+    """
+    Lock file guarding one key of a collection
+
+    Keys are hashed onto LOCK_STRIPES lock files per collection, so writers
+    for different users rarely share a lock and the number of lock files stays
+    bounded. Lock files live in a ``.locks`` directory next to the collection.
+    """
+    directory = os.path.join(os.path.dirname(collection_path) or '.', '.locks')
+    name = os.path.basename(collection_path)
+    stripe = zlib.crc32(key.encode('utf-8')) % LOCK_STRIPES
+    return os.path.join(directory, f'{name}.{stripe}.lock')
+
+def _thread_lock(path: str) -> threading.Lock:
+    with _thread_locks_guard:
+        lock = _thread_locks.get(path)
+        if lock is None:
+            lock = _thread_locks[path] = threading.Lock()
+        return lock
+
+@contextmanager
+def _hold_path(path: str) -> Iterator[None]:
+    # The thread lock keeps threads of this process from queueing on flock;
+    # flock excludes other worker processes
+    with _thread_lock(path):
+        if fcntl is None:
+            yield
+            return
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+@contextmanager
+def file_lock(collection_path: str, key: str = WHOLE_FILE) -> Iterator[None]:
+    """Hold the exclusive advisory lock for one key of a collection"""
+    with _hold_path(lock_path(collection_path, key)):
+        yield
+
+@contextmanager
+def file_locks(keys: Iterable[Tuple[str, str]]) -> Iterator[None]:
+    """Hold the locks for several (collection, key) pairs, acquired in a fixed order"""
+    paths: List[str] = sorted({lock_path(collection, key) for collection, key in keys})
+    with ExitStack() as stack:
+        for path in paths:
+            stack.enter_context(_hold_path(path))
+        yield
@@ -0,0 +1,228 @@
+import json
+import mmap
+import os
+import re
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+# A JSON string, using the unrolled form so long strings match without backtracking
+_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+STRING_RE = re.compile(_STRING)
+# Everything up to the next bracket outside a string
+SKIP_RE = re.compile(rb'(?:[^"{}\[\]]+|' + _STRING + rb')*')
+SCALAR_RE = re.compile(rb'[^,}\]\s]+')
+WHITESPACE_RE = re.compile(rb'\s*')
+
+# Sentinel distinguishing "key not in document" from a stored null
+MISSING = object()
+
+class RecordIndex:
+    """Byte-offset index of the top-level keys of a JSON object file
+
+    Lookups memory-map the file and scan it key by key, skipping values
+    without decoding them, and stop as soon as the requested key has been
+    found. Offsets of every key passed on the way are remembered and saved to
+    a sidecar file (``<file>.offsets``), so later lookups - in this or any
+    other process - seek straight to the record and decode only its bytes.
+
+    The sidecar holds one JSON line per scan with the offsets it found, so
+    saving costs O(new keys): lines are appended, and the file is only
+    rewritten once the document changes. The index is tied to the file's
+    (inode, mtime, size) and rebuilt lazily when the file changes; lines
+    recorded for another version are ignored.
+    """
+
+    _instances: Dict[str, 'RecordIndex'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+        self.sidecar_path = path + '.offsets'
+        self._lock = threading.Lock()
+        self._signature = None
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+        # Offsets found since the sidecar was last written
+        self._unsaved: Dict[str, Tuple[int, int]] = {}
+        # Whether the sidecar has lines for this version of the file to append to
+        self._sidecar_current = False
+        # Position of the next unscanned key, or None once the scan is complete
+        self._resume_at: Optional[int] = 0
+
+    @classmethod
+    def for_path(cls, path: str) -> 'RecordIndex':
+        """Get the shared index for a file path"""
+        with cls._instances_lock:
+            index = cls._instances.get(path)
+            if index is None:
+                index = cls._instances[path] = cls(path)
+            return index
+
+    def lookup(self, key: str, decode=json.loads) -> Any:
+        """
+        Get the value stored under a top-level key
+
+        Args:
+            key: Top-level key to look up
+            decode: Function turning the value's bytes into an object
+
+        Returns:
+            The decoded value, or MISSING if the key is absent
+
+        Raises:
+            ValueError: If the file is not a JSON object document
+        """
+        try:
+            f = open(self.path, 'rb')
+        except OSError:
+            return MISSING
+
+        with f:
+            # Sign the opened file, not the path, in case it is replaced meanwhile
+            stat = os.fstat(f.fileno())
+            if stat.st_size == 0:
+                return MISSING
+            signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        with mm:
+            with self._lock:
+                if signature != self._signature:
+                    self._load_sidecar(signature)
+
+                span = self._offsets.get(key)
+                if span is None and self._resume_at is not None:
+                    try:
+                        span = self._scan(mm, key)
+                    finally:
+                        self._save_sidecar()
+
+            if span is None:
+                return MISSING
+            return decode(mm[span[0]:span[1]])
+
+    def _load_sidecar(self, signature: Tuple) -> None:
+        """Adopt the offsets saved for this version of the file"""
+        self._signature = signature
+        self._offsets = {}
+        self._unsaved = {}
+        self._sidecar_current = False
+        self._resume_at = 0
+
+        try:
+            with open(self.sidecar_path, 'rb') as f:
+                lines = f.readlines()
+        except OSError:
+            return
+
+        for line in lines:
+            try:
+                saved = json.loads(line)
+            except ValueError:
+                # Torn line from a crashed writer
+                continue
+            if not isinstance(saved, dict) or tuple(saved.get('signature', ())) != signature:
+                continue
+            self._sidecar_current = True
+            self._offsets.update((key, tuple(span)) for key, span in saved['offsets'].items())
+            # Every line covers all keys before its resume position (lines
+            # from several processes may overlap), so the furthest one wins
+            resume_at = saved['resume_at']
+            if self._resume_at is not None and (resume_at is None or resume_at > self._resume_at):
+                self._resume_at = resume_at
+
+        if lines and not lines[-1].endswith(b'\n'):
+            # Appending would join the unterminated last line: rewrite instead
+            self._sidecar_current = False
+
+    def _save_sidecar(self) -> None:
+        """Append the offsets found since the last save"""
+        line = (json.dumps({
+            'signature': list(self._signature),
+            'resume_at': self._resume_at,
+            'offsets': self._unsaved if self._sidecar_current else self._offsets
+        }, ensure_ascii=False) + '\n').encode('utf-8')
+
+        tmp_path = f"{self.sidecar_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if self._sidecar_current:
+                # O_APPEND writes of one line do not interleave between processes
+                fd = os.open(self.sidecar_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, line)
+                finally:
+                    os.close(fd)
+            else:
+                # Lines for an older version of the file are of no use: start over
+                with open(tmp_path, 'wb') as f:
+                    f.write(line)
+                os.replace(tmp_path, self.sidecar_path)
+                self._sidecar_current = True
+            self._unsaved = {}
+        except OSError as e:
+            # The index is only an optimisation; lookups still work without it
+            print(f"Error writing {self.sidecar_path}: {e}")
+
+    def _scan(self, mm: mmap.mmap, key: str) -> Optional[Tuple[int, int]]:
+        """Index keys from the resume position until key is found or the object ends"""
+        pos = self._resume_at
+        if pos == 0:
+            pos = WHITESPACE_RE.match(mm, 0).end()
+            if mm[pos:pos + 1] != b'{':
+                raise ValueError(f'{self.path} is not a JSON object document')
+            pos += 1
+
+        while True:
+            pos = WHITESPACE_RE.match(mm, pos).end()
+            if mm[pos:pos + 1] == b'}':
+                self._resume_at = None
+                return None
+
+            match = STRING_RE.match(mm, pos)
+            if match is None:
+                raise ValueError(f'Malformed JSON key at byte {pos} of {self.path}')
+            current = json.loads(match.group())
+
+            pos = WHITESPACE_RE.match(mm, match.end()).end()
+            if mm[pos:pos + 1] != b':':
+                raise ValueError(f'Expected ":" at byte {pos} of {self.path}')
+            start = WHITESPACE_RE.match(mm, pos + 1).end()
+            end = self._skip_value(mm, start)
+            self._offsets[current] = self._unsaved[current] = (start, end)
+
+            pos = WHITESPACE_RE.match(mm, end).end()
+            if mm[pos:pos + 1] == b',':
+                pos += 1
+            self._resume_at = pos
+
+            if current == key:
+                return (start, end)
+
+    def _skip_value(self, mm: mmap.mmap, pos: int) -> int:
+        """Return the offset just past the JSON value starting at pos"""
+        first = mm[pos:pos + 1]
+
+        if first == b'"':
+            match = STRING_RE.match(mm, pos)
+            if match is None:
+                raise ValueError(f'Unterminated string at byte {pos} of {self.path}')
+            return match.end()
+
+        if first not in (b'{', b'['):
+            match = SCALAR_RE.match(mm, pos)
+            if match is None:
+                raise ValueError(f'Expected a value at byte {pos} of {self.path}')
+            return match.end()
+
+        depth = 0
+        while True:
+            char = mm[pos:pos + 1]
+            if char in (b'{', b'['):
+                depth += 1
+            elif char in (b'}', b']'):
+                depth -= 1
+                if depth == 0:
+                    return pos + 1
+            elif not char:
+                raise ValueError(f'Unexpected end of {self.path}')
+            # Jump over strings and plain characters to the next bracket
+            pos = SKIP_RE.match(mm, pos + 1).end()
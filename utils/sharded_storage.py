@@ -0,0 +1,294 @@
+import argparse
+import copy
+import hashlib
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from utils import journal
+from utils.locks import file_lock, file_locks
+from utils.storage import JSONStorage, StorageBatch
+
+class ShardedStorage:
+    """Per-user file storage backend exposing the same methods as JSONStorage
+
+    Every collection is a directory with one small JSON file per user::
+
+        data/users/<hash-prefix>/<username>.json        -> user record
+        data/interviews/<hash-prefix>/<username>.json   -> list of interviews
+
+    Each collection directory carries a ``manifest.json`` describing its
+    layout (hash, prefix length, record kind). The manifest is read once per
+    process, after which a lookup touches exactly one file and writes to
+    different users never touch the same file.
+    """
+
+    MANIFEST_VERSION = 1
+    PREFIX_LENGTH = 2
+    # Collections that hold a list of records per user
+    HISTORY_COLLECTIONS = ('interviews', 'feedback', 'submissions')
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self._manifests: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _collection(file_path: str) -> str:
+        """Map a JSON file path to its collection directory name"""
+        return os.path.splitext(os.path.basename(file_path))[0]
+
+    def _manifest(self, collection: str) -> Dict:
+        """Load (or create) the layout manifest for a collection directory"""
+        with self._lock:
+            manifest = self._manifests.get(collection)
+            if manifest is not None:
+                return manifest
+
+            collection_dir = os.path.join(self.root_dir, collection)
+            manifest_path = os.path.join(collection_dir, 'manifest.json')
+            manifest = JSONStorage.read_json(manifest_path)
+
+            if not manifest:
+                manifest = {
+                    'version': ShardedStorage.MANIFEST_VERSION,
+                    'collection': collection,
+                    'kind': 'history' if collection in ShardedStorage.HISTORY_COLLECTIONS else 'record',
+                    'hash': 'sha1',
+                    'prefix_length': ShardedStorage.PREFIX_LENGTH,
+                    'created_at': datetime.now().isoformat()
+                }
+                os.makedirs(collection_dir, exist_ok=True)
+                self._write_file(manifest_path, manifest)
+
+            self._manifests[collection] = manifest
+            return manifest
+
+    def _user_path(self, username: str, collection: str) -> str:
+        """Path of the file holding one user's data in a collection"""
+        manifest = self._manifest(collection)
+        digest = hashlib.new(manifest['hash'], username.encode('utf-8')).hexdigest()
+        prefix = digest[:manifest['prefix_length']]
+        return os.path.join(self.root_dir, collection, prefix, quote(username, safe='') + '.json')
+
+    @staticmethod
+    def _write_file(file_path: str, data) -> bool:
+        """Write a file atomically and durably so readers never see a partial document"""
+        tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(JSONStorage._serialize(data))
+                # The data must be on disk before the rename, or a crash can
+                # leave the new name pointing at an empty file
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, file_path)
+            journal.fsync_dir(os.path.dirname(file_path))
+            return True
+        except OSError as e:
+            print(f"Error writing to {file_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+    @staticmethod
+    def _read_file(file_path: str, default):
+        """
+        Decode a file, or return default if it does not exist
+
+        Raises:
+            ValueError: If the file exists but cannot be decoded; callers
+                must not go on to overwrite it with fresh data
+        """
+        try:
+            with open(file_path, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return default
+        try:
+            return JSONStorage._deserialize(raw)
+        except ValueError as e:
+            raise ValueError(f'Cannot decode {file_path}: {e}')
+
+    def _user_lock(self, username: str, file_path: str):
+        """Striped lock for one user's file in a collection"""
+        return file_lock(os.path.join(self.root_dir, self._collection(file_path)), username)
+
+    def _get_records(self, username: str, file_path: str) -> List[Dict]:
+        return self._read_file(self._user_path(username, self._collection(file_path)), [])
+
+    def _append_record(self, username: str, record: Dict, file_path: str) -> bool:
+        record['timestamp'] = datetime.now().isoformat()
+        path = self._user_path(username, self._collection(file_path))
+        with self._user_lock(username, file_path):
+            records = self._read_file(path, [])
+            records.append(copy.deepcopy(record))
+            return self._write_file(path, records)
+
+    def list_users(self, file_path: str) -> List[str]:
+        """List usernames stored in a collection"""
+        collection_dir = os.path.join(self.root_dir, self._collection(file_path))
+        usernames = []
+        if not os.path.isdir(collection_dir):
+            return usernames
+
+        for shard in os.scandir(collection_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.json'):
+                    usernames.append(unquote(entry.name[:-len('.json')]))
+        return usernames
+
+    def get_user(self, username: str, users_file: str) -> Optional[Dict]:
+        """Get user data by username"""
+        return self._read_file(self._user_path(username, self._collection(users_file)), None)
+
+    def save_user(self, username: str, user_data: Dict, users_file: str) -> bool:
+        """Save or update user data"""
+        path = self._user_path(username, self._collection(users_file))
+
+        with self._user_lock(username, users_file):
+            if not os.path.exists(path):
+                user_data['created_at'] = datetime.now().isoformat()
+
+            user_data['updated_at'] = datetime.now().isoformat()
+            return self._write_file(path, user_data)
+
+    def get_user_interviews(self, username: str, interviews_file: str) -> List[Dict]:
+        """Get all interviews for a user"""
+        return self._get_records(username, interviews_file)
+
+    def save_interview(self, username: str, interview_data: Dict, interviews_file: str) -> bool:
+        """Save interview data for a user"""
+        return self._append_record(username, interview_data, interviews_file)
+
+    def get_user_feedback(self, username: str, feedback_file: str) -> List[Dict]:
+        """Get all feedback for a user"""
+        return self._get_records(username, feedback_file)
+
+    def save_feedback(self, username: str, feedback_data: Dict, feedback_file: str) -> bool:
+        """Save feedback data for a user"""
+        return self._append_record(username, feedback_data, feedback_file)
+
+    def get_user_submissions(self, username: str, submissions_file: str) -> List[Dict]:
+        """Get all coding submissions for a user"""
+        return self._get_records(username, submissions_file)
+
+    def save_submission(self, username: str, submission_data: Dict, submissions_file: str) -> bool:
+        """Save a coding submission for a user"""
+        return self._append_record(username, submission_data, submissions_file)
+
+    def update_user_skills(self, username: str, skills_data: Dict, users_file: str) -> bool:
+        """Update user's skill data"""
+        path = self._user_path(username, self._collection(users_file))
+
+        with self._user_lock(username, users_file):
+            user = self._read_file(path, None)
+
+            if user is None:
+                return False
+
+            user['skills'] = skills_data
+            user['updated_at'] = datetime.now().isoformat()
+            return self._write_file(path, user)
+
+    def commit_batch(self, operations: List[Tuple[str, str, Dict, str]]) -> bool:
+        """Apply staged StorageBatch operations to the per-user files in one journaled commit"""
+        keys = [
+            (os.path.join(self.root_dir, self._collection(file_path)), username)
+            for _, username, _, file_path in operations
+        ]
+        with file_locks(keys):
+            return self._commit_batch_locked(operations, keys)
+
+    def _commit_batch_locked(self, operations: List[Tuple[str, str, Dict, str]],
+                             keys: List[Tuple[str, str]]) -> bool:
+        files: Dict[str, object] = {}
+        logged = []
+        now = datetime.now().isoformat()
+
+        for kind, username, data, file_path in operations:
+            path = self._user_path(username, self._collection(file_path))
+            if kind == 'user':
+                if path not in files and not os.path.exists(path):
+                    data['created_at'] = now
+                data['updated_at'] = now
+                files[path] = copy.deepcopy(data)
+                logged.append([path, None, 'user', copy.deepcopy(data)])
+            else:
+                data['timestamp'] = now
+                if path not in files:
+                    files[path] = self._read_file(path, [])
+                files[path].append(copy.deepcopy(data))
+                logged.append([path, None, 'record', copy.deepcopy(data)])
+
+        journal_dir = os.path.join(self.root_dir, StorageBatch.JOURNAL_DIR)
+        serialized = {path: JSONStorage._serialize(data) for path, data in files.items()}
+        return journal.commit_files(serialized, logged, journal_dir, keys, JSONStorage._replay_batch)
+
+    def archive_history(self, file_path: str, is_old: Callable[[Dict], bool], archive) -> int:
+        """Move records matching is_old into the archive; returns how many moved"""
+        collection = self._collection(file_path)
+        archived = 0
+
+        for username in self.list_users(file_path):
+            path = self._user_path(username, collection)
+            with self._user_lock(username, file_path):
+                records = self._read_file(path, [])
+                old = [record for record in records if is_old(record)]
+                if not old or not archive.add((username, record) for record in old):
+                    continue
+
+                recent = [record for record in records if not is_old(record)]
+                if self._write_file(path, recent):
+                    archived += len(old)
+
+        return archived
+
+    def migrate_from_json(self, users_file: str, interviews_file: str, feedback_file: str,
+                          submissions_file: Optional[str] = None) -> Dict[str, int]:
+        """
+        Split existing single-file JSON storage into per-user files
+
+        Returns:
+            Number of users written per collection
+        """
+        counts = {}
+        history_files = [interviews_file, feedback_file]
+        if submissions_file:
+            history_files.append(submissions_file)
+
+        for file_path in [users_file] + history_files:
+            collection = self._collection(file_path)
+            documents = JSONStorage.read_json(file_path)
+            for username, data in documents.items():
+                self._write_file(self._user_path(username, collection), data)
+            counts[collection] = len(documents)
+
+        return counts
+
+def main():
+    """Command line entry point for the one-shot JSON -> sharded layout migration"""
+    from config import Config
+
+    parser = argparse.ArgumentParser(description='Split JSON storage files into per-user shards')
+    parser.add_argument('--root', default=Config.SHARDED_DATA_DIR, help='Directory holding the collection directories')
+    parser.add_argument('--users', default=Config.USERS_FILE)
+    parser.add_argument('--interviews', default=Config.INTERVIEWS_FILE)
+    parser.add_argument('--feedback', default=Config.FEEDBACK_FILE)
+    parser.add_argument('--submissions', default=Config.SUBMISSIONS_FILE)
+    args = parser.parse_args()
+
+    storage = ShardedStorage(args.root)
+    counts = storage.migrate_from_json(args.users, args.interviews, args.feedback, args.submissions)
+
+    print(f"Migrated into {args.root}:")
+    for collection, count in counts.items():
+        print(f"  {collection}: {count} users")
+
+if __name__ == '__main__':
+    main()
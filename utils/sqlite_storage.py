@@ -0,0 +1,311 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.storage import JSONStorage
+
+class SQLiteStorage:
+    """SQLite storage backend exposing the same methods as JSONStorage
+
+    Each collection lives in its own table keyed by username with the record
+    body stored as a JSON column. The database runs in WAL mode so several
+    worker processes can read and write concurrently, and every write only
+    touches the affected rows instead of rewriting the whole collection.
+
+    The file arguments accepted by the methods are only used to pick the
+    collection (``data/users.json`` -> ``users``), so routes can keep passing
+    the Config file paths unchanged.
+    """
+
+    COLLECTIONS = ('users', 'interviews', 'feedback', 'submissions')
+
+    def __init__(self, db_path: str, timeout: float = 30.0):
+        self.db_path = db_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'PRAGMA busy_timeout={int(self.timeout * 1000)}')
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self) -> None:
+        """Create tables and indexes if they don't exist"""
+        conn = self._connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS users (
+                username TEXT PRIMARY KEY,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS interviews (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_interviews_username ON interviews(username);
+            CREATE TABLE IF NOT EXISTS feedback (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_feedback_username ON feedback(username);
+            CREATE TABLE IF NOT EXISTS submissions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_submissions_username ON submissions(username);
+        """)
+
+    @staticmethod
+    def _collection(file_path: str) -> str:
+        """Map a JSON file path to its table name"""
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        if name not in SQLiteStorage.COLLECTIONS:
+            raise ValueError(f'Unknown storage collection: {file_path}')
+        return name
+
+    def _get_records(self, username: str, table: str) -> List[Dict]:
+        rows = self._connect().execute(
+            f'SELECT data FROM {table} WHERE username = ? ORDER BY id', (username,)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def _append_record(self, username: str, record: Dict, table: str) -> bool:
+        try:
+            self._connect().execute(
+                f'INSERT INTO {table} (username, data) VALUES (?, ?)',
+                (username, json.dumps(record, ensure_ascii=False))
+            )
+            return True
+        except sqlite3.Error as e:
+            print(f"Error writing to {table}: {e}")
+            return False
+
+    def get_user(self, username: str, users_file: str) -> Optional[Dict]:
+        """Get user data by username"""
+        table = self._collection(users_file)
+        row = self._connect().execute(
+            f'SELECT data FROM {table} WHERE username = ?', (username,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_user(self, username: str, user_data: Dict, users_file: str) -> bool:
+        """Save or update user data"""
+        table = self._collection(users_file)
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            exists = conn.execute(
+                f'SELECT 1 FROM {table} WHERE username = ?', (username,)
+            ).fetchone()
+
+            if not exists:
+                user_data['created_at'] = datetime.now().isoformat()
+
+            user_data['updated_at'] = datetime.now().isoformat()
+            conn.execute(
+                f'INSERT OR REPLACE INTO {table} (username, data) VALUES (?, ?)',
+                (username, json.dumps(user_data, ensure_ascii=False))
+            )
+            conn.execute('COMMIT')
+            return True
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            print(f"Error writing to {table}: {e}")
+            return False
+
+    def get_user_interviews(self, username: str, interviews_file: str) -> List[Dict]:
+        """Get all interviews for a user"""
+        return self._get_records(username, self._collection(interviews_file))
+
+    def save_interview(self, username: str, interview_data: Dict, interviews_file: str) -> bool:
+        """Save interview data for a user"""
+        interview_data['timestamp'] = datetime.now().isoformat()
+        return self._append_record(username, interview_data, self._collection(interviews_file))
+
+    def get_user_feedback(self, username: str, feedback_file: str) -> List[Dict]:
+        """Get all feedback for a user"""
+        return self._get_records(username, self._collection(feedback_file))
+
+    def save_feedback(self, username: str, feedback_data: Dict, feedback_file: str) -> bool:
+        """Save feedback data for a user"""
+        feedback_data['timestamp'] = datetime.now().isoformat()
+        return self._append_record(username, feedback_data, self._collection(feedback_file))
+
+    def get_user_submissions(self, username: str, submissions_file: str) -> List[Dict]:
+        """Get all coding submissions for a user"""
+        return self._get_records(username, self._collection(submissions_file))
+
+    def save_submission(self, username: str, submission_data: Dict, submissions_file: str) -> bool:
+        """Save a coding submission for a user"""
+        submission_data['timestamp'] = datetime.now().isoformat()
+        return self._append_record(username, submission_data, self._collection(submissions_file))
+
+    def update_user_skills(self, username: str, skills_data: Dict, users_file: str) -> bool:
+        """Update user's skill data"""
+        table = self._collection(users_file)
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                f'SELECT data FROM {table} WHERE username = ?', (username,)
+            ).fetchone()
+
+            if not row:
+                conn.execute('ROLLBACK')
+                return False
+
+            user = json.loads(row[0])
+            user['skills'] = skills_data
+            user['updated_at'] = datetime.now().isoformat()
+            conn.execute(
+                f'UPDATE {table} SET data = ? WHERE username = ?',
+                (json.dumps(user, ensure_ascii=False), username)
+            )
+            conn.execute('COMMIT')
+            return True
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            print(f"Error writing to {table}: {e}")
+            return False
+
+    def commit_batch(self, operations: List[Tuple[str, str, Dict, str]]) -> bool:
+        """Apply staged StorageBatch operations in a single transaction"""
+        conn = self._connect()
+        now = datetime.now().isoformat()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for kind, username, data, file_path in operations:
+                table = self._collection(file_path)
+                if kind == 'user':
+                    exists = conn.execute(
+                        f'SELECT 1 FROM {table} WHERE username = ?', (username,)
+                    ).fetchone()
+                    if not exists:
+                        data['created_at'] = now
+                    data['updated_at'] = now
+                    conn.execute(
+                        f'INSERT OR REPLACE INTO {table} (username, data) VALUES (?, ?)',
+                        (username, json.dumps(data, ensure_ascii=False))
+                    )
+                else:
+                    data['timestamp'] = now
+                    conn.execute(
+                        f'INSERT INTO {table} (username, data) VALUES (?, ?)',
+                        (username, json.dumps(data, ensure_ascii=False))
+                    )
+            conn.execute('COMMIT')
+            return True
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            print(f"Error committing storage batch: {e}")
+            return False
+
+    def archive_history(self, file_path: str, is_old: Callable[[Dict], bool], archive) -> int:
+        """Move records matching is_old into the archive; returns how many moved"""
+        table = self._collection(file_path)
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            old = []
+            for row_id, username, data in conn.execute(f'SELECT id, username, data FROM {table} ORDER BY id'):
+                record = json.loads(data)
+                if is_old(record):
+                    old.append((row_id, username, record))
+
+            if not old or not archive.add((username, record) for _, username, record in old):
+                conn.execute('ROLLBACK')
+                return 0
+
+            conn.executemany(f'DELETE FROM {table} WHERE id = ?', [(row_id,) for row_id, _, _ in old])
+            conn.execute('COMMIT')
+            return len(old)
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            print(f"Error archiving {table}: {e}")
+            return 0
+
+    def migrate_from_json(self, users_file: str, interviews_file: str, feedback_file: str,
+                          submissions_file: Optional[str] = None) -> Dict[str, int]:
+        """
+        Import existing JSON storage files into the database
+
+        Existing rows for the imported usernames are replaced, so running the
+        migration twice does not duplicate interview or feedback history.
+
+        Returns:
+            Number of records imported per collection
+        """
+        counts = {}
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            users = JSONStorage.read_json(users_file)
+            conn.executemany(
+                'INSERT OR REPLACE INTO users (username, data) VALUES (?, ?)',
+                [(username, json.dumps(data, ensure_ascii=False)) for username, data in users.items()]
+            )
+            counts['users'] = len(users)
+
+            history_files = [interviews_file, feedback_file]
+            if submissions_file:
+                history_files.append(submissions_file)
+
+            for file_path in history_files:
+                table = self._collection(file_path)
+                history = JSONStorage.read_json(file_path)
+                rows = [
+                    (username, json.dumps(record, ensure_ascii=False))
+                    for username, records in history.items()
+                    for record in records
+                ]
+                conn.executemany(
+                    f'DELETE FROM {table} WHERE username = ?', [(username,) for username in history]
+                )
+                conn.executemany(f'INSERT INTO {table} (username, data) VALUES (?, ?)', rows)
+                counts[table] = len(rows)
+
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        return counts
+
+def main():
+    """Command line entry point for the one-shot JSON -> SQLite migration"""
+    from config import Config
+
+    parser = argparse.ArgumentParser(description='Migrate JSON storage files into SQLite')
+    parser.add_argument('--db', default=Config.SQLITE_DB_FILE, help='SQLite database path')
+    parser.add_argument('--users', default=Config.USERS_FILE)
+    parser.add_argument('--interviews', default=Config.INTERVIEWS_FILE)
+    parser.add_argument('--feedback', default=Config.FEEDBACK_FILE)
+    parser.add_argument('--submissions', default=Config.SUBMISSIONS_FILE)
+    args = parser.parse_args()
+
+    storage = SQLiteStorage(args.db)
+    counts = storage.migrate_from_json(args.users, args.interviews, args.feedback, args.submissions)
+
+    print(f"Migrated into {args.db}:")
+    for collection, count in counts.items():
+        print(f"  {collection}: {count} records")
+
+if __name__ == '__main__':
+    main()
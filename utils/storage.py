@@ -1,100 +1,652 @@
+import copy
 import json
 import os
-from datetime import datetime
-from typing import Dict, List, Any, Optional
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+from utils import journal
+from utils.append_log import AppendLog
+from utils.archive import HistoryArchive
+from utils.locks import file_lock, file_locks, WHOLE_FILE
+from utils.record_index import RecordIndex, MISSING
+
+# Optional codecs for faster or smaller storage files
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+# Prefix of msgpack files; 0xc1 is never used by msgpack and cannot start a JSON or UTF-8 text
+MSGPACK_MAGIC = b'\xc1MPK'
 
 class JSONStorage:
     """Simple JSON file-based storage system"""
-    
+
+    # Parsed documents keyed by file path. Each entry is (signature, data) where
+    # the signature is the file's (inode, mtime, size) at the time it was parsed.
+    # Cached documents are shared and must never be mutated in place.
+    _cache: Dict[str, Tuple[Tuple, Dict]] = {}
+    _cache_lock = threading.Lock()
+    _cache_hits = 0
+    _cache_misses = 0
+
+    # On-disk encoding used for writes: 'pretty', 'compact', 'orjson', 'msgpack' or 'zstd'.
+    # Reads detect the encoding from the file contents, so formats can be mixed.
+    FORMATS = ('pretty', 'compact', 'orjson', 'msgpack', 'zstd')
+    _format = 'pretty'
+
+    # Optional backend (e.g. SQLiteStorage) that serves the per-user
+    # collection methods below instead of the JSON files
+    _backend = None
+
+    @staticmethod
+    def set_backend(backend) -> None:
+        """Route user/interview/feedback operations to another backend, or back to JSON files if None"""
+        JSONStorage._backend = backend
+
+    @staticmethod
+    def set_format(name: str) -> str:
+        """Choose the encoding for future writes, falling back if its codec is missing"""
+        available = {
+            'pretty': True,
+            'compact': True,
+            'orjson': orjson is not None,
+            'msgpack': msgpack is not None,
+            'zstd': zstandard is not None
+        }
+
+        if name not in available:
+            raise ValueError(f'Unknown storage format: {name}. Choose from {", ".join(JSONStorage.FORMATS)}')
+        if not available[name]:
+            print(f"⚠️  Storage format '{name}' needs an optional package that is not installed; using 'compact'")
+            name = 'compact'
+
+        JSONStorage._format = name
+        return name
+
+    @staticmethod
+    def _serialize(data: Dict) -> bytes:
+        """Encode a document the way it is stored on disk"""
+        fmt = JSONStorage._format
+
+        if fmt == 'pretty':
+            return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+        if fmt == 'orjson':
+            return orjson.dumps(data)
+        if fmt == 'msgpack':
+            return MSGPACK_MAGIC + msgpack.packb(data, use_bin_type=True)
+        if fmt == 'zstd':
+            compact = orjson.dumps(data) if orjson is not None else JSONStorage._dump_compact(data)
+            return zstandard.ZstdCompressor(level=3).compress(compact)
+        return JSONStorage._dump_compact(data)
+
+    @staticmethod
+    def _dump_compact(data: Dict) -> bytes:
+        return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    @staticmethod
+    def _deserialize(raw: bytes) -> Dict:
+        """Decode stored bytes in any supported format; raises ValueError if unreadable"""
+        if raw.startswith(ZSTD_MAGIC):
+            if zstandard is None:
+                raise ValueError('zstd-compressed file but zstandard is not installed')
+            try:
+                raw = zstandard.ZstdDecompressor().decompress(raw)
+            except zstandard.ZstdError as e:
+                raise ValueError(str(e))
+
+        if raw.startswith(MSGPACK_MAGIC):
+            return JSONStorage._unpack(raw[len(MSGPACK_MAGIC):])
+        # Files written before the header was added start with a map or array marker
+        # (fixmap/fixarray, map16/32, array16/32), which no JSON text does
+        if raw and (0x80 <= raw[0] <= 0x9f or 0xdc <= raw[0] <= 0xdf):
+            return JSONStorage._unpack(raw)
+
+        if orjson is not None:
+            return orjson.loads(raw)
+        return json.loads(raw.decode('utf-8'))
+
+    @staticmethod
+    def _unpack(raw: bytes):
+        if msgpack is None:
+            raise ValueError('MessagePack file but msgpack is not installed')
+        try:
+            return msgpack.unpackb(raw, raw=False)
+        except Exception as e:
+            raise ValueError(f'Invalid MessagePack data: {e}')
+
     @staticmethod
     def read_json(file_path: str) -> Dict:
         """Read data from JSON file"""
         if not os.path.exists(file_path):
             return {}
-        
+
+        if file_path.endswith('.jsonl'):
+            return AppendLog.for_path(file_path).read_all()
+
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
+            with open(file_path, 'rb') as f:
+                return JSONStorage._deserialize(f.read())
+        except ValueError:
             return {}
-    
+
     @staticmethod
     def write_json(file_path: str, data: Dict) -> bool:
         """Write data to JSON file"""
+        # The caller keeps ownership of data, so drop any cached copy instead
+        # of caching an object that may still change
+        JSONStorage.invalidate_cache(file_path)
+
+        # Write a temp file and rename it over the target, so concurrent readers
+        # in other workers see either the old or the new document, never a
+        # truncated one
+        tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            with open(tmp_path, 'wb') as f:
+                f.write(JSONStorage._serialize(data))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, file_path)
             return True
         except Exception as e:
             print(f"Error writing to {file_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+    @staticmethod
+    def update_json(file_path: str, update: Callable[[Dict], Optional[bool]]) -> bool:
+        """
+        Read-modify-write a JSON file while holding its lock
+
+        Args:
+            file_path: File to update
+            update: Called with a private copy of the document to modify in
+                place; returning False cancels the write
+
+        Returns:
+            True if the document was written
+        """
+        with file_lock(file_path):
+            document = JSONStorage.read_json(file_path)
+            if update(document) is False:
+                return False
+            return JSONStorage._write_document(file_path, document)
+
+    @staticmethod
+    def _update_document(file_path: str, update: Callable[[Dict], Optional[bool]]) -> bool:
+        """Like update_json, but update gets a shallow copy of the cached document
+
+        update must replace top-level entries rather than modify them in place,
+        since nested values are shared with the cache.
+        """
+        with file_lock(file_path):
+            document = dict(JSONStorage._load_document(file_path))
+            if update(document) is False:
+                return False
+            return JSONStorage._write_document(file_path, document)
+
+    @staticmethod
+    def _file_signature(file_path: str) -> Optional[Tuple]:
+        """Identify the current version of a file without reading it"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def _load_document(file_path: str) -> Dict:
+        """Return the parsed document, re-reading the file only if it changed.
+
+        The returned dict is shared with other callers and must be treated as
+        read-only; copy records before modifying them.
+        """
+        signature = JSONStorage._file_signature(file_path)
+        if signature is None:
+            return {}
+
+        with JSONStorage._cache_lock:
+            entry = JSONStorage._cache.get(file_path)
+            if entry is not None and entry[0] == signature:
+                JSONStorage._cache_hits += 1
+                return entry[1]
+            JSONStorage._cache_misses += 1
+
+        data = JSONStorage.read_json(file_path)
+
+        with JSONStorage._cache_lock:
+            JSONStorage._cache[file_path] = (signature, data)
+        return data
+
+    @staticmethod
+    def _lookup(file_path: str, key: str, default: Any, stream: bool) -> Any:
+        """Get one top-level entry of a document as a private copy
+
+        With stream=True a document that is not already cached is not parsed
+        as a whole; the entry is located through the file's RecordIndex and
+        only its bytes are decoded, so memory stays bounded by the record size.
+        """
+        if stream:
+            signature = JSONStorage._file_signature(file_path)
+            with JSONStorage._cache_lock:
+                entry = JSONStorage._cache.get(file_path)
+                cached = entry is not None and entry[0] == signature
+
+            if not cached:
+                try:
+                    value = RecordIndex.for_path(file_path).lookup(key, JSONStorage._deserialize)
+                except ValueError:
+                    # Not a JSON text document (e.g. msgpack/zstd); parse it whole
+                    pass
+                else:
+                    return default if value is MISSING else value
+
+        document = JSONStorage._load_document(file_path)
+        return copy.deepcopy(document.get(key, default))
+
+    @staticmethod
+    def _write_document(file_path: str, data: Dict) -> bool:
+        """Write a document owned by the storage layer and keep it cached"""
+        if not JSONStorage.write_json(file_path, data):
+            return False
+
+        signature = JSONStorage._file_signature(file_path)
+        if signature is not None:
+            with JSONStorage._cache_lock:
+                JSONStorage._cache[file_path] = (signature, data)
+        return True
+
+    @staticmethod
+    def invalidate_cache(file_path: Optional[str] = None) -> None:
+        """Drop the cached document for file_path, or every document if omitted"""
+        with JSONStorage._cache_lock:
+            if file_path is None:
+                JSONStorage._cache.clear()
+            else:
+                JSONStorage._cache.pop(file_path, None)
+
+    @staticmethod
+    def cache_stats() -> Dict[str, Any]:
+        """Report read cache hit/miss counters"""
+        with JSONStorage._cache_lock:
+            hits = JSONStorage._cache_hits
+            misses = JSONStorage._cache_misses
+            entries = len(JSONStorage._cache)
+
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'entries': entries,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0
+        }
+
+    @staticmethod
+    def batch() -> 'StorageBatch':
+        """Start a unit of work that commits writes to several collections together"""
+        return StorageBatch()
+
+    @staticmethod
+    def recover(data_dir: str) -> int:
+        """Finish batches interrupted by a crash; call once at startup"""
+        return journal.recover(os.path.join(data_dir, StorageBatch.JOURNAL_DIR), JSONStorage._replay_batch)
+
+    @staticmethod
+    def _replay_batch(operations: List[journal.Operation]) -> None:
+        """
+        Apply journaled batch operations onto the current files (with the batch's locks held)
+
+        Each operation is [path, username, kind, data]. Kind 'user' sets the
+        user's entry to data; any other kind appends data as a record unless
+        an equal record is already there, so replaying twice adds nothing.
+        username is None for files holding one user's data directly
+        (ShardedStorage).
+
+        Raises:
+            ValueError: If a file cannot be decoded; it is left untouched
+            OSError: If a file cannot be written
+        """
+        documents: Dict[str, Any] = {}
+        for path, username, kind, data in operations:
+            if path.endswith('.jsonl'):
+                log = AppendLog.for_path(path)
+                if data not in log.get(username):
+                    log.append(username, data)
+                continue
+
+            if path not in documents:
+                try:
+                    with open(path, 'rb') as f:
+                        documents[path] = JSONStorage._deserialize(f.read())
+                except FileNotFoundError:
+                    documents[path] = None
+                except ValueError as e:
+                    raise ValueError(f'Cannot decode {path}: {e}')
+
+            if username is None:
+                records = documents[path] or []
+                if kind == 'user':
+                    documents[path] = data
+                elif data not in records:
+                    documents[path] = records + [data]
+            else:
+                document = documents[path] = documents[path] or {}
+                records = document.get(username, [])
+                if kind == 'user':
+                    document[username] = data
+                elif data not in records:
+                    document[username] = records + [data]
+
+        for path, document in documents.items():
+            if not JSONStorage.write_json(path, document):
+                raise OSError(f'Cannot write {path}')
+        for dir_path in {os.path.dirname(path) or '.' for path in documents}:
+            journal.fsync_dir(dir_path)
+
+    @staticmethod
+    def _commit_batch(operations: List[Tuple[str, str, Dict, str]]) -> bool:
+        """Apply staged batch operations to the JSON files in one journaled commit"""
+        json_files = {file_path for _, _, _, file_path in operations if not file_path.endswith('.jsonl')}
+        with file_locks((file_path, WHOLE_FILE) for file_path in json_files):
+            return JSONStorage._commit_batch_locked(operations)
+
+    @staticmethod
+    def _commit_batch_locked(operations: List[Tuple[str, str, Dict, str]]) -> bool:
+        documents: Dict[str, Dict] = {}
+        logged = []
+        now = datetime.now().isoformat()
+
+        for kind, username, data, file_path in operations:
+            if kind != 'user':
+                data['timestamp'] = now
+                logged.append([file_path, username, 'record', copy.deepcopy(data)])
+                if file_path.endswith('.jsonl'):
+                    continue
+
+            if file_path not in documents:
+                documents[file_path] = dict(JSONStorage._load_document(file_path))
+            document = documents[file_path]
+
+            if kind == 'user':
+                if username not in document:
+                    data['created_at'] = now
+                data['updated_at'] = now
+                document[username] = copy.deepcopy(data)
+                logged.append([file_path, username, 'user', copy.deepcopy(data)])
+            else:
+                document[username] = document.get(username, []) + [copy.deepcopy(data)]
+
+        first_file = operations[0][3]
+        journal_dir = os.path.join(os.path.dirname(first_file), StorageBatch.JOURNAL_DIR)
+        files = {path: JSONStorage._serialize(document) for path, document in documents.items()}
+
+        for path in documents:
+            JSONStorage.invalidate_cache(path)
+        locks = [(path, WHOLE_FILE) for path in documents]
+        if not journal.commit_files(files, logged, journal_dir, locks, JSONStorage._replay_batch):
             return False
-    
+
+        for path, document in documents.items():
+            signature = JSONStorage._file_signature(path)
+            if signature is not None:
+                with JSONStorage._cache_lock:
+                    JSONStorage._cache[path] = (signature, document)
+        return True
+
     @staticmethod
-    def get_user(username: str, users_file: str) -> Optional[Dict]:
-        """Get user data by username"""
-        users = JSONStorage.read_json(users_file)
-        return users.get(username)
-    
+    def get_user(username: str, users_file: str, stream: bool = False) -> Optional[Dict]:
+        """Get user data by username
+
+        Read-only callers can pass stream=True to avoid parsing every user
+        when the users file is not already cached.
+        """
+        if JSONStorage._backend is not None:
+            return JSONStorage._backend.get_user(username, users_file)
+
+        return JSONStorage._lookup(users_file, username, None, stream)
+
     @staticmethod
     def save_user(username: str, user_data: Dict, users_file: str) -> bool:
         """Save or update user data"""
-        users = JSONStorage.read_json(users_file)
-        
-        if username not in users:
-            user_data['created_at'] = datetime.now().isoformat()
-        
-        user_data['updated_at'] = datetime.now().isoformat()
-        users[username] = user_data
-        
-        return JSONStorage.write_json(users_file, users)
-    
-    @staticmethod
-    def get_user_interviews(username: str, interviews_file: str) -> List[Dict]:
-        """Get all interviews for a user"""
-        interviews = JSONStorage.read_json(interviews_file)
-        return interviews.get(username, [])
-    
+        if JSONStorage._backend is not None:
+            return JSONStorage._backend.save_user(username, user_data, users_file)
+
+        def update(users: Dict) -> None:
+            if username not in users:
+                user_data['created_at'] = datetime.now().isoformat()
+
+            user_data['updated_at'] = datetime.now().isoformat()
+            users[username] = copy.deepcopy(user_data)
+
+        return JSONStorage._update_document(users_file, update)
+
+    @staticmethod
+    def _get_records(username: str, file_path: str, stream: bool = False) -> List[Dict]:
+        """Get a user's records from a {username: [records]} collection"""
+        if file_path.endswith('.jsonl'):
+            return AppendLog.for_path(file_path).get(username)
+
+        return JSONStorage._lookup(file_path, username, [], stream)
+
+    @staticmethod
+    def _append_record(username: str, record: Dict, file_path: str) -> bool:
+        """Append a timestamped record to a {username: [records]} collection"""
+        record['timestamp'] = datetime.now().isoformat()
+
+        # Append-only logs cost O(record) per write instead of a full rewrite
+        if file_path.endswith('.jsonl'):
+            return AppendLog.for_path(file_path).append(username, record)
+
+        def update(collection: Dict) -> None:
+            collection[username] = collection.get(username, []) + [copy.deepcopy(record)]
+
+        return JSONStorage._update_document(file_path, update)
+
+    @staticmethod
+    def _with_archived(username: str, file_path: str, records: List[Dict]) -> List[Dict]:
+        """Prepend a user's archived records to their recent ones"""
+        # A crash during archival can leave a record in both tiers; show it once
+        seen = {json.dumps(record, sort_keys=True) for record in records}
+        archived = []
+        for record in HistoryArchive.for_file(file_path).iter_records(username):
+            key = json.dumps(record, sort_keys=True)
+            if key not in seen:
+                seen.add(key)
+                archived.append(record)
+        return archived + records
+
+    @staticmethod
+    def archive_history(file_path: str, max_age_days: int) -> int:
+        """
+        Move history records older than max_age_days into the monthly archive
+
+        Records are written to the archive before they are removed from the
+        collection, so a crash can duplicate a record but never lose it.
+
+        Args:
+            file_path: History collection (interviews, submissions, ...)
+            max_age_days: Age after which a record is archived
+
+        Returns:
+            Number of records archived
+        """
+        cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+
+        def is_old(record: Dict) -> bool:
+            timestamp = record.get('timestamp')
+            return isinstance(timestamp, str) and timestamp < cutoff
+
+        archive = HistoryArchive.for_file(file_path)
+        if JSONStorage._backend is not None:
+            return JSONStorage._backend.archive_history(file_path, is_old, archive)
+
+        if file_path.endswith('.jsonl'):
+            log = AppendLog.for_path(file_path)
+            old = [(username, record) for username, records in log.read_all().items()
+                   for record in records if is_old(record)]
+            # Timestamps only grow, so records appended meanwhile are kept
+            if not old or not archive.add(old) or not log.compact(lambda _, record: not is_old(record)):
+                return 0
+            return len(old)
+
+        archived = []
+
+        def update(collection: Dict) -> Optional[bool]:
+            for username, records in collection.items():
+                archived.extend((username, record) for record in records if is_old(record))
+            if not archived or not archive.add(archived):
+                return False
+
+            for username in list(collection):
+                recent = [record for record in collection[username] if not is_old(record)]
+                if recent:
+                    collection[username] = recent
+                else:
+                    del collection[username]
+
+        if not JSONStorage.update_json(file_path, update):
+            return 0
+        return len(archived)
+
+    @staticmethod
+    def get_user_interviews(username: str, interviews_file: str, stream: bool = False,
+                            include_archived: bool = False) -> List[Dict]:
+        """Get a user's recent interviews, plus archived ones if include_archived"""
+        if JSONStorage._backend is not None:
+            interviews = JSONStorage._backend.get_user_interviews(username, interviews_file)
+        else:
+            interviews = JSONStorage._get_records(username, interviews_file, stream)
+
+        if include_archived:
+            return JSONStorage._with_archived(username, interviews_file, interviews)
+        return interviews
+
     @staticmethod
     def save_interview(username: str, interview_data: Dict, interviews_file: str) -> bool:
         """Save interview data for a user"""
-        interviews = JSONStorage.read_json(interviews_file)
-        
-        if username not in interviews:
-            interviews[username] = []
-        
-        interview_data['timestamp'] = datetime.now().isoformat()
-        interviews[username].append(interview_data)
-        
-        return JSONStorage.write_json(interviews_file, interviews)
-    
-    @staticmethod
-    def get_user_feedback(username: str, feedback_file: str) -> List[Dict]:
+        if JSONStorage._backend is not None:
+            return JSONStorage._backend.save_interview(username, interview_data, interviews_file)
+
+        return JSONStorage._append_record(username, interview_data, interviews_file)
+
+    @staticmethod
+    def get_user_feedback(username: str, feedback_file: str, stream: bool = False) -> List[Dict]:
         """Get all feedback for a user"""
-        feedback = JSONStorage.read_json(feedback_file)
-        return feedback.get(username, [])
-    
+        if JSONStorage._backend is not None:
+            return JSONStorage._backend.get_user_feedback(username, feedback_file)
+
+        return JSONStorage._get_records(username, feedback_file, stream)
+
     @staticmethod
     def save_feedback(username: str, feedback_data: Dict, feedback_file: str) -> bool:
         """Save feedback data for a user"""
-        feedback = JSONStorage.read_json(feedback_file)
-        
-        if username not in feedback:
-            feedback[username] = []
-        
-        feedback_data['timestamp'] = datetime.now().isoformat()
-        feedback[username].append(feedback_data)
-        
-        return JSONStorage.write_json(feedback_file, feedback)
-    
+        if JSONStorage._backend is not None:
+            return JSONStorage._backend.save_feedback(username, feedback_data, feedback_file)
+
+        return JSONStorage._append_record(username, feedback_data, feedback_file)
+
+    @staticmethod
+    def get_user_submissions(username: str, submissions_file: str, include_archived: bool = False) -> List[Dict]:
+        """Get a user's recent coding submissions, plus archived ones if include_archived"""
+        if JSONStorage._backend is not None:
+            submissions = JSONStorage._backend.get_user_submissions(username, submissions_file)
+        else:
+            submissions = JSONStorage._get_records(username, submissions_file)
+
+        if include_archived:
+            return JSONStorage._with_archived(username, submissions_file, submissions)
+        return submissions
+
+    @staticmethod
+    def save_submission(username: str, submission_data: Dict, submissions_file: str) -> bool:
+        """Save a coding submission for a user"""
+        if JSONStorage._backend is not None:
+            return JSONStorage._backend.save_submission(username, submission_data, submissions_file)
+
+        return JSONStorage._append_record(username, submission_data, submissions_file)
+
     @staticmethod
     def update_user_skills(username: str, skills_data: Dict, users_file: str) -> bool:
         """Update user's skill data"""
-        users = JSONStorage.read_json(users_file)
-        
-        if username not in users:
-            return False
-        
-        users[username]['skills'] = skills_data
-        users[username]['updated_at'] = datetime.now().isoformat()
-        
-        return JSONStorage.write_json(users_file, users)
+        if JSONStorage._backend is not None:
+            return JSONStorage._backend.update_user_skills(username, skills_data, users_file)
+
+        def update(users: Dict) -> Optional[bool]:
+            if username not in users:
+                return False
+
+            users[username] = dict(users[username])
+            users[username]['skills'] = copy.deepcopy(skills_data)
+            users[username]['updated_at'] = datetime.now().isoformat()
+
+        return JSONStorage._update_document(users_file, update)
+
+class StorageBatch:
+    """Unit of work staging writes to several collections
+
+    Nothing is written until commit(); then every touched file is rewritten at
+    most once and all changes become durable together, so a crash can never
+    leave, e.g., a user's interview count and interview history out of sync.
+
+    Usage:
+        with JSONStorage.batch() as batch:
+            batch.save_interview(username, interview_data, Config.INTERVIEWS_FILE)
+            batch.save_user(username, user, Config.USERS_FILE)
+    """
+
+    # Journal directory, created next to the storage files
+    JOURNAL_DIR = '.journal'
+
+    def __init__(self):
+        self._operations: List[Tuple[str, str, Dict, str]] = []
+        self.committed = False
+
+    def save_user(self, username: str, user_data: Dict, users_file: str) -> None:
+        self._operations.append(('user', username, user_data, users_file))
+
+    def save_interview(self, username: str, interview_data: Dict, interviews_file: str) -> None:
+        self._operations.append(('record', username, interview_data, interviews_file))
+
+    def save_feedback(self, username: str, feedback_data: Dict, feedback_file: str) -> None:
+        self._operations.append(('record', username, feedback_data, feedback_file))
+
+    def save_submission(self, username: str, submission_data: Dict, submissions_file: str) -> None:
+        self._operations.append(('record', username, submission_data, submissions_file))
+
+    def commit(self) -> bool:
+        """Write all staged changes; returns False if nothing was written"""
+        if not self._operations:
+            self.committed = True
+            return True
+
+        if JSONStorage._backend is not None:
+            self.committed = JSONStorage._backend.commit_batch(self._operations)
+        else:
+            self.committed = JSONStorage._commit_batch(self._operations)
+
+        self._operations = []
+        return self.committed
+
+    def __enter__(self) -> 'StorageBatch':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        if exc_type is None:
+            self.commit()
+        else:
+            # Drop staged changes if the caller failed part-way through
+            self._operations = []
+        return False